@@ -1,22 +1,29 @@
-from flask import Flask
+from flask import Flask, request
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask_migrate import Migrate
 from config.config import config
+from app.utils.revocation import revocation_store
+from app.utils.metrics import request_metrics
+from app.utils.slow_queries import slow_query_log
+from app.utils import json_provider
 
 db = SQLAlchemy()
 jwt = JWTManager()
 migrate = Migrate()
 
-def create_app(config_name='default'):
+def create_app(config_name='default', overrides=None):
     app = Flask(__name__)
     app.config.from_object(config[config_name])
+    if overrides:
+        app.config.update(overrides)
     
     # Initialize extensions
     db.init_app(app)
     jwt.init_app(app)
     migrate.init_app(app, db)
+    revocation_store.init_app(app)
     CORS(app, origins=app.config['CORS_ORIGINS'])
     
     # JWT configuration
@@ -24,16 +31,31 @@ def create_app(config_name='default'):
     def user_identity_lookup(user):
         return str(user)
     
+    @jwt.token_in_blocklist_loader
+    def check_if_token_revoked(_jwt_header, jwt_data):
+        return revocation_store.is_revoked(jwt_data['jti'])
+    
     @jwt.user_lookup_loader
     def user_lookup_callback(_jwt_header, jwt_data):
         identity = jwt_data["sub"]
         try:
             user_id = int(identity)
             from app.models.user import User
-            return User.query.filter_by(id=user_id).one_or_none()
+            return User.get_cached(user_id)
         except (ValueError, TypeError):
             return None
     
+    # Set before metrics, which times the provider's dumps
+    json_provider.init_app(app)
+    
+    # Per-route query counts and timings, exposed at /api/metrics
+    request_metrics.init_app(app)
+    slow_query_log.init_app(app)
+    
+    # Buffer reading-progress heartbeats and flush them in batches
+    from app.services.progress import progress_buffer
+    progress_buffer.init_app(app)
+    
     # Register blueprints
     from app.views.auth import auth_bp
     from app.views.feeds import feeds_bp
@@ -48,4 +70,11 @@ def create_app(config_name='default'):
     def health_check():
         return {'status': 'healthy', 'message': 'WiseRSS API is running'}
     
+    if app.config['METRICS_ENABLED']:
+        @app.route('/api/metrics')
+        def metrics():
+            if not request_metrics.authorized(request, app.config['METRICS_TOKEN']):
+                return {'error': 'Metrics token required'}, 401, {'WWW-Authenticate': 'Bearer'}
+            return request_metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+    
     return app
\ No newline at end of file
@@ -1,6 +1,11 @@
 from .user import User
+from .feed_source import FeedSource
 from .feed import Feed
 from .article import Article
+from .article_body import ArticleBody
 from .user_article import UserArticle
+from .highlight import Highlight
+from .archived_article import ArchivedArticle
+from .article_tombstone import ArticleTombstone
 
-__all__ = ['User', 'Feed', 'Article', 'UserArticle']
\ No newline at end of file
+__all__ = ['User', 'FeedSource', 'Feed', 'Article', 'ArticleBody', 'UserArticle', 'Highlight', 'ArchivedArticle', 'ArticleTombstone']
\ No newline at end of file
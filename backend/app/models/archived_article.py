@@ -0,0 +1,46 @@
+from datetime import datetime
+from app import db
+from app.utils.compression import CompressedText
+
+class ArchivedArticle(db.Model):
+    """Cold copy of an article removed by the retention policy.
+    
+    Only the fields needed to identify and re-read the article are kept,
+    with its body inline so it survives the body store's cleanup. Rows are
+    never read by the API.
+    """
+    __tablename__ = 'archived_articles'
+    
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)  # Original article id
+    source_id = db.Column(db.Integer, nullable=False)
+    
+    title = db.Column(db.String(500), nullable=False)
+    summary = db.Column(CompressedText())
+    content = db.deferred(db.Column(CompressedText()))
+    url = db.Column(db.String(1000), nullable=False)
+    author = db.Column(db.String(200))
+    guid = db.Column(db.String(500))
+    
+    published_at = db.Column(db.DateTime)
+    created_at = db.Column(db.DateTime)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Ingestion checks incoming guids against a source's archive
+    __table_args__ = (
+        db.Index('ix_archived_articles_source_guid', 'source_id', 'guid'),
+    )
+    
+    @classmethod
+    def find_archived_guids(cls, source_id, guids):
+        """Return the guids of a source that were archived, in a single query"""
+        guids = [guid for guid in guids if guid]
+        if not guids:
+            return set()
+        rows = db.session.query(cls.guid).filter(
+            cls.source_id == source_id,
+            cls.guid.in_(guids)
+        ).all()
+        return {row.guid for row in rows}
+    
+    def __repr__(self):
+        return f'<ArchivedArticle {self.title[:50]}...>'
\ No newline at end of file
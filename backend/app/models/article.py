@@ -1,17 +1,38 @@
 from datetime import datetime
 from app import db
+from app.utils.search import register_search_index
+from app.utils.compression import CompressedText
+from app.utils.json_provider import json_list, raw_json
+from sqlalchemy import or_, and_
 import hashlib
 
+# Marks a to_dict argument the caller did not preload, as opposed to a preloaded None
+_NOT_LOADED = object()
+
+# Keys of Article.to_dict, for field projection
+ARTICLE_FIELDS = (
+    'id', 'feed_id', 'feed_name', 'title', 'summary', 'content', 'url', 'author',
+    'published_at', 'updated_at', 'created_at', 'image_url', 'media_urls', 'category',
+    'tags', 'word_count', 'read_time'
+)
+USER_FIELDS = ('is_read', 'is_bookmarked', 'reading_status', 'user_rating', 'has_notes', 'read_at')
+SUMMARY_FIELDS = frozenset(ARTICLE_FIELDS + USER_FIELDS) - {'content'}
+
+# Large columns worth deferring in SQL when their field is not requested
+DEFERRABLE_FIELDS = ('summary', 'content', 'media_urls', 'tags')
+
 class Article(db.Model):
     __tablename__ = 'articles'
     
     id = db.Column(db.Integer, primary_key=True)
-    feed_id = db.Column(db.Integer, db.ForeignKey('feeds.id'), nullable=False)
+    source_id = db.Column(db.Integer, db.ForeignKey('feed_sources.id'), nullable=False)
     
     # Article content
     title = db.Column(db.String(500), nullable=False)
-    summary = db.Column(db.Text)
-    content = db.Column(db.Text)
+    # Bodies are stored compressed, and content is only loaded (and decompressed) when read
+    summary = db.Column(CompressedText())
+    content = db.deferred(db.Column(CompressedText()))  # Legacy, moved to article_bodies by migrate-bodies
+    body_hash = db.Column(db.String(64), db.ForeignKey('article_bodies.hash'), index=True)  # Shared body, see get_content()
     url = db.Column(db.String(1000), nullable=False)
     
     # Article metadata
@@ -38,9 +59,17 @@ class Article(db.Model):
     
     # Relationships
     user_articles = db.relationship('UserArticle', backref='article', lazy='dynamic', cascade='all, delete-orphan')
+    highlights = db.relationship('Highlight', backref='article', lazy='dynamic', cascade='all, delete-orphan')
     
-    def __init__(self, feed_id, title, url, **kwargs):
-        self.feed_id = feed_id
+    # One row per guid per source, so concurrent ingestion cannot duplicate entries;
+    # listings read a source's articles newest first, with id as the tie-breaker
+    __table_args__ = (
+        db.UniqueConstraint('source_id', 'guid', name='article_source_guid_unique'),
+        db.Index('ix_articles_source_published', 'source_id', 'published_at', 'id'),
+    )
+    
+    def __init__(self, source_id, title, url, **kwargs):
+        self.source_id = source_id
         self.title = title
         self.url = url
         for key, value in kwargs.items():
@@ -67,11 +96,7 @@ class Article(db.Model):
     
     def set_tags(self, tags_list):
         """Set tags from a list"""
-        import json
-        if isinstance(tags_list, list):
-            self.tags = json.dumps(tags_list)
-        else:
-            self.tags = None
+        self.tags = json_list(tags_list)
     
     def get_media_urls(self):
         """Get media URLs as a list"""
@@ -85,11 +110,20 @@ class Article(db.Model):
     
     def set_media_urls(self, media_list):
         """Set media URLs from a list"""
-        import json
-        if isinstance(media_list, list):
-            self.media_urls = json.dumps(media_list)
-        else:
-            self.media_urls = None
+        self.media_urls = json_list(media_list)
+    
+    def get_content(self):
+        """Article body, from the shared body store or the legacy column"""
+        if self.body_hash:
+            from app.models.article_body import ArticleBody
+            return ArticleBody.get_content(self.body_hash)
+        return self.content
+    
+    @staticmethod
+    def prefetch_bodies(articles):
+        """Load the bodies of a page of articles into the body cache with one query"""
+        from app.models.article_body import ArticleBody
+        ArticleBody.get_many(article.body_hash for article in articles)
     
     def calculate_read_time(self):
         """Calculate estimated reading time"""
@@ -110,31 +144,53 @@ class Article(db.Model):
         """Get UserArticle for specific user"""
         return self.user_articles.filter_by(user_id=user_id).first()
     
-    def to_dict(self, user_id=None):
-        """Convert article to dictionary"""
+    def get_feed(self, user_id):
+        """Get the user's subscription that this article reached them through"""
+        from app.models.feed import Feed
+        return Feed.query.filter_by(source_id=self.source_id, user_id=user_id).first()
+    
+    def to_dict(self, user_id=None, feed=None, user_article=_NOT_LOADED, fields=None):
+        """Convert article to dictionary.
+        
+        Pass the user's `feed` and `user_article` (None when the user has no
+        state yet) when they were loaded by the query, to avoid per-article
+        lookups. `fields` limits the keys returned (id is always included);
+        large columns that are not requested are neither loaded nor decoded.
+        """
+        def wanted(key):
+            return fields is None or key in fields
+        
+        if feed is None and user_id:
+            feed = self.get_feed(user_id)
+        
         result = {
             'id': self.id,
-            'feed_id': self.feed_id,
-            'feed_name': self.feed.title if self.feed else None,
+            'feed_id': feed.id if feed else None,
+            'feed_name': feed.title if feed else self.source.title,
             'title': self.title,
-            'summary': self.summary,
-            'content': self.content,
             'url': self.url,
             'author': self.author,
-            'published_at': self.published_at.isoformat() if self.published_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'published_at': self.published_at,
+            'updated_at': self.updated_at,
+            'created_at': self.created_at,
             'image_url': self.image_url,
-            'media_urls': self.get_media_urls(),
             'category': self.category,
-            'tags': self.get_tags(),
             'word_count': self.word_count,
             'read_time': self.read_time
         }
+        if wanted('summary'):
+            result['summary'] = self.summary
+        if wanted('content'):
+            result['content'] = self.get_content()
+        if wanted('media_urls'):
+            result['media_urls'] = raw_json(self.media_urls)
+        if wanted('tags'):
+            result['tags'] = raw_json(self.tags)
         
         # Include user-specific data if user_id provided
         if user_id:
-            user_article = self.get_user_article(user_id)
+            if user_article is _NOT_LOADED:
+                user_article = self.get_user_article(user_id)
             if user_article:
                 result.update({
                     'is_read': user_article.is_read,
@@ -142,7 +198,7 @@ class Article(db.Model):
                     'reading_status': user_article.reading_status,
                     'user_rating': user_article.rating,
                     'has_notes': bool(user_article.notes),
-                    'read_at': user_article.read_at.isoformat() if user_article.read_at else None
+                    'read_at': user_article.read_at
                 })
             else:
                 result.update({
@@ -154,6 +210,8 @@ class Article(db.Model):
                     'read_at': None
                 })
         
+        if fields is not None:
+            result = {key: value for key, value in result.items() if key == 'id' or key in fields}
         return result
     
     @classmethod
@@ -162,9 +220,134 @@ class Article(db.Model):
         return cls.query.filter_by(content_hash=content_hash).first()
     
     @classmethod
-    def find_by_guid(cls, feed_id, guid):
-        """Find article by feed and guid"""
-        return cls.query.filter_by(feed_id=feed_id, guid=guid).first()
+    def find_by_guid(cls, source_id, guid):
+        """Find article by source and guid"""
+        return cls.query.filter_by(source_id=source_id, guid=guid).first()
+    
+    @classmethod
+    def query_for_user(cls, user_id):
+        """Query articles from the sources a user subscribes to, joined with their Feed"""
+        from app.models.feed import Feed
+        return db.session.query(cls).join(Feed, and_(
+            Feed.source_id == cls.source_id,
+            Feed.user_id == user_id
+        ))
+    
+    @classmethod
+    def query_with_user_state(cls, user_id):
+        """Query (Article, Feed, UserArticle) rows for a user in a single statement"""
+        from app.models.feed import Feed
+        from app.models.user_article import UserArticle
+        return cls.query_for_user(user_id).outerjoin(UserArticle, and_(
+            UserArticle.article_id == cls.id,
+            UserArticle.user_id == user_id
+        )).add_entity(Feed).add_entity(UserArticle)
+    
+    @classmethod
+    def find_existing_keys(cls, source_id, guids, content_hashes):
+        """Return the guids and content hashes a source already has, in a single query"""
+        guids = [guid for guid in guids if guid]
+        content_hashes = [h for h in content_hashes if h]
+        if not guids and not content_hashes:
+            return set(), set()
+        
+        rows = db.session.query(cls.guid, cls.content_hash).filter(
+            cls.source_id == source_id,
+            or_(cls.guid.in_(guids), cls.content_hash.in_(content_hashes))
+        ).all()
+        return {row.guid for row in rows}, {row.content_hash for row in rows}
+    
+    @classmethod
+    def bulk_insert(cls, articles):
+        """Insert transient articles in one statement, skipping rows that already exist"""
+        if not articles:
+            return
+        from app.utils.sql import insert_ignore
+        from app.models.article_body import ArticleBody
+        
+        # Identical bodies are stored once, whichever source they come from
+        body_hashes = ArticleBody.store(article.content for article in articles)
+        
+        now = datetime.utcnow()
+        columns = [column.key for column in cls.__table__.columns if column.key != 'id']
+        rows = []
+        for article in articles:
+            row = {key: getattr(article, key) for key in columns}
+            row['body_hash'] = body_hashes.get(article.content)
+            row['content'] = None
+            row['created_at'] = row['created_at'] or now
+            row['updated_at'] = row['updated_at'] or now
+            rows.append(row)
+        
+        db.session.execute(insert_ignore(cls.__table__), rows)
+        
+        # Make the new rows searchable in the same transaction
+        from app.utils.search import index_articles
+        for source_id in {article.source_id for article in articles}:
+            index_articles(cls.query.filter(
+                cls.source_id == source_id,
+                cls.guid.in_([article.guid for article in articles if article.source_id == source_id])
+            ))
+    
+    @classmethod
+    def compress_bodies(cls, batch_size=500):
+        """Rewrite summaries and contents stored before compression was enabled.
+        
+        On MySQL the TEXT columns are first converted to MEDIUMBLOB. Rows are
+        rewritten in batches by id, so the migration can be interrupted and
+        run again. Returns the number of rows rewritten.
+        """
+        from sqlalchemy import table, column, select
+        from app.utils.compression import decompress_text, is_compressed
+        from app.utils.search import drop_legacy_fulltext_index
+        from app.utils.sql import get_dialect_name
+        
+        if get_dialect_name() == 'mysql':
+            # The old FULLTEXT index covers content and would block the conversion
+            drop_legacy_fulltext_index()
+            data_type = db.session.execute(db.text(
+                'SELECT data_type FROM information_schema.columns '
+                'WHERE table_schema = DATABASE() AND table_name = :table AND column_name = :column'
+            ), {'table': cls.__tablename__, 'column': 'content'}).scalar()
+            if data_type != 'mediumblob':
+                db.session.execute(db.text(
+                    f'ALTER TABLE {cls.__tablename__} MODIFY summary MEDIUMBLOB, MODIFY content MEDIUMBLOB'
+                ))
+            db.session.commit()
+        
+        # Untyped columns return the stored values as they are
+        raw = table(cls.__tablename__, column('id'), column('summary'), column('content'))
+        threshold = cls.__table__.c.content.type.threshold
+        
+        def needs_compression(value):
+            # Legacy TEXT values, and plain blobs large enough to be worth compressing
+            if value is None or is_compressed(value):
+                return False
+            return isinstance(value, str) or len(value) >= threshold
+        
+        rewritten = 0
+        last_id = 0
+        while True:
+            rows = db.session.execute(
+                select(raw.c.id, raw.c.summary, raw.c.content)
+                .where(raw.c.id > last_id).order_by(raw.c.id).limit(batch_size)
+            ).all()
+            if not rows:
+                return rewritten
+            last_id = rows[-1].id
+            
+            updates = [
+                {'id': row.id, 'summary': decompress_text(row.summary) if row.summary is not None else None,
+                 'content': decompress_text(row.content) if row.content is not None else None}
+                for row in rows
+                if needs_compression(row.summary) or needs_compression(row.content)
+            ]
+            if updates:
+                db.session.execute(db.update(cls), updates)
+            db.session.commit()
+            rewritten += len(updates)
     
     def __repr__(self):
-        return f'<Article {self.title[:50]}...>'
\ No newline at end of file
+        return f'<Article {self.title[:50]}...>'
+
+register_search_index(Article.__table__)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import hashlib
+from datetime import datetime
+from flask import current_app
+from app import db
+from app.utils.cache import TTLCache
+from app.utils.compression import CompressedText
+
+# Bodies never change under their hash, so cached entries only expire to bound memory.
+# Created on first use with ARTICLE_BODY_CACHE_SIZE entries.
+_body_cache = None
+
+def get_body_cache():
+    """The process-wide body cache, sized from the config of the first app that uses it"""
+    global _body_cache
+    if _body_cache is None:
+        _body_cache = TTLCache(maxsize=current_app.config['ARTICLE_BODY_CACHE_SIZE'])
+    return _body_cache
+
+class ArticleBody(db.Model):
+    """Article content stored once per distinct body, keyed by its SHA-256 hash"""
+    __tablename__ = 'article_bodies'
+    
+    hash = db.Column(db.String(64), primary_key=True)
+    content = db.Column(CompressedText(), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @staticmethod
+    def hash_content(content):
+        """Key of a body in the store"""
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    
+    @classmethod
+    def store(cls, contents):
+        """Save bodies that are not stored yet, in one statement. Returns {content: hash}."""
+        from app.utils.sql import insert_ignore
+        
+        hashes = {content: cls.hash_content(content) for content in contents if content}
+        if hashes:
+            db.session.execute(insert_ignore(cls.__table__), [
+                {'hash': body_hash, 'content': content, 'created_at': datetime.utcnow()}
+                for content, body_hash in hashes.items()
+            ])
+        return hashes
+    
+    @classmethod
+    def get_many(cls, hashes):
+        """Look up bodies by hash, from the cache first and the rest in a single query"""
+        cache = get_body_cache()
+        found = {}
+        missing = []
+        for body_hash in set(hashes):
+            if not body_hash:
+                continue
+            content = cache.get(body_hash)
+            if content is None:
+                missing.append(body_hash)
+            else:
+                found[body_hash] = content
+        
+        if missing:
+            ttl = current_app.config['ARTICLE_BODY_CACHE_TTL']
+            rows = db.session.query(cls.hash, cls.content).filter(cls.hash.in_(missing)).all()
+            for row in rows:
+                cache.set(row.hash, row.content, ttl)
+                found[row.hash] = row.content
+        return found
+    
+    @classmethod
+    def get_content(cls, body_hash):
+        """Content for one hash, or None"""
+        return cls.get_many([body_hash]).get(body_hash)
+    
+    @classmethod
+    def delete_unreferenced(cls, hashes):
+        """Delete the given bodies that no article points to any more"""
+        from app.models.article import Article
+        
+        hashes = [body_hash for body_hash in set(hashes) if body_hash]
+        if not hashes:
+            return
+        referenced = db.session.query(Article.body_hash).filter(Article.body_hash.in_(hashes))
+        cls.query.filter(
+            cls.hash.in_(hashes),
+            cls.hash.notin_(referenced)
+        ).delete(synchronize_session=False)
+        cache = get_body_cache()
+        for body_hash in hashes:
+            cache.delete(body_hash)
+    
+    @classmethod
+    def migrate_articles(cls, batch_size=500):
+        """Move content stored on the articles table into the body store.
+        
+        Runs in batches and clears each migrated column, so it can be
+        interrupted and run again. Returns (articles migrated, bodies stored).
+        """
+        from app.models.article import Article
+        
+        migrated = stored = 0
+        while True:
+            rows = db.session.query(Article.id, Article.content).filter(
+                Article.body_hash.is_(None),
+                Article.content.isnot(None)
+            ).limit(batch_size).all()
+            if not rows:
+                return migrated, stored
+            
+            existing = {
+                body_hash for (body_hash,) in db.session.query(cls.hash).filter(
+                    cls.hash.in_({cls.hash_content(row.content) for row in rows})
+                )
+            }
+            hashes = cls.store(row.content for row in rows)
+            db.session.execute(db.update(Article), [
+                {'id': row.id, 'body_hash': hashes.get(row.content), 'content': None}
+                for row in rows
+            ])
+            db.session.commit()
+            migrated += len(rows)
+            stored += len(set(hashes.values()) - existing)
+    
+    def __repr__(self):
+        return f'<ArticleBody {self.hash[:12]}>'
\ No newline at end of file
@@ -0,0 +1,29 @@
+from datetime import datetime
+from app import db
+
+class ArticleTombstone(db.Model):
+    """The guid of an article the retention policy deleted without archiving it.
+    
+    Keeps delete mode from storing the same entry again while it is still
+    in the source's feed, at the cost of one small row per article.
+    """
+    __tablename__ = 'article_tombstones'
+    
+    source_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    guid = db.Column(db.String(500), primary_key=True)
+    removed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @classmethod
+    def find_removed_guids(cls, source_id, guids):
+        """Return the guids of a source that were deleted, in a single query"""
+        guids = [guid for guid in guids if guid]
+        if not guids:
+            return set()
+        rows = db.session.query(cls.guid).filter(
+            cls.source_id == source_id,
+            cls.guid.in_(guids)
+        ).all()
+        return {row.guid for row in rows}
+    
+    def __repr__(self):
+        return f'<ArticleTombstone source={self.source_id} guid={self.guid}>'
\ No newline at end of file
@@ -1,11 +1,15 @@
 from datetime import datetime
+from sqlalchemy import case
 from app import db
+from app.utils.json_provider import json_list, raw_json
 
 class Feed(db.Model):
+    """A user's subscription to a shared FeedSource"""
     __tablename__ = 'feeds'
     
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    source_id = db.Column(db.Integer, db.ForeignKey('feed_sources.id'), nullable=False, index=True)
     
     # Feed information
     title = db.Column(db.String(200), nullable=False)
@@ -26,21 +30,29 @@ class Feed(db.Model):
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    last_fetched = db.Column(db.DateTime)
-    last_modified = db.Column(db.String(100))  # HTTP Last-Modified header
-    etag = db.Column(db.String(100))  # HTTP ETag header
     
-    # Feed statistics
+    # Fetch state, copied from the source by FeedSource.sync_subscriptions
+    last_fetched = db.Column(db.DateTime)
     total_articles = db.Column(db.Integer, default=0)
     fetch_errors = db.Column(db.Integer, default=0)
     last_error = db.Column(db.Text)
     
+    # Per-user counters, kept up to date on ingestion and read state changes
+    unread_count = db.Column(db.Integer, default=0, nullable=False)
+    bookmarked_count = db.Column(db.Integer, default=0, nullable=False)
+    archived_count = db.Column(db.Integer, default=0, nullable=False)
+    new_today = db.Column(db.Integer, default=0, nullable=False)  # articles added on new_today_date (UTC)
+    new_today_date = db.Column(db.Date)
+    
     # Feed image/icon
     image_url = db.Column(db.String(500))
     favicon_url = db.Column(db.String(500))
     
-    # Relationships
-    articles = db.relationship('Article', backref='feed', lazy='dynamic', cascade='all, delete-orphan')
+    # A user subscribes to each source at most once; the feed list is ordered by updated_at
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'source_id', name='feed_user_source_unique'),
+        db.Index('ix_feeds_user_updated', 'user_id', 'updated_at'),
+    )
     
     def __init__(self, user_id, title, url, **kwargs):
         self.user_id = user_id
@@ -49,6 +61,15 @@ class Feed(db.Model):
         for key, value in kwargs.items():
             if hasattr(self, key):
                 setattr(self, key, value)
+        
+        if self.source is None and self.source_id is None:
+            from app.models.feed_source import FeedSource
+            self.source = FeedSource.get_or_create(url)
+            self.last_fetched = self.source.last_fetched
+            self.total_articles = self.source.total_articles
+            self.fetch_errors = self.source.fetch_errors
+            self.last_error = self.source.last_error
+            self.unread_count = self.source.total_articles or 0
     
     def get_tags(self):
         """Get tags as a list"""
@@ -62,30 +83,7 @@ class Feed(db.Model):
     
     def set_tags(self, tags_list):
         """Set tags from a list"""
-        import json
-        if isinstance(tags_list, list):
-            self.tags = json.dumps(tags_list)
-        else:
-            self.tags = None
-    
-    def update_stats(self):
-        """Update feed statistics"""
-        self.total_articles = self.articles.count()
-        db.session.commit()
-    
-    def mark_fetch_success(self):
-        """Mark successful fetch"""
-        self.last_fetched = datetime.utcnow()
-        self.fetch_errors = 0
-        self.last_error = None
-        db.session.commit()
-    
-    def mark_fetch_error(self, error_message):
-        """Mark fetch error"""
-        self.fetch_errors += 1
-        self.last_error = str(error_message)
-        self.last_fetched = datetime.utcnow()
-        db.session.commit()
+        self.tags = json_list(tags_list)
     
     def get_status(self):
         """Get feed status"""
@@ -107,26 +105,88 @@ class Feed(db.Model):
             'url': self.url,
             'site_url': self.site_url,
             'category': self.category,
-            'tags': self.get_tags(),
+            'tags': raw_json(self.tags),
             'language': self.language,
             'is_active': self.is_active,
             'auto_update': self.auto_update,
             'update_interval': self.update_interval,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'last_fetched': self.last_fetched.isoformat() if self.last_fetched else None,
+            'source_id': self.source_id,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'last_fetched': self.last_fetched,
             'total_articles': self.total_articles,
             'fetch_errors': self.fetch_errors,
             'last_error': self.last_error,
+            'unread_count': self.unread_count,
             'image_url': self.image_url,
             'favicon_url': self.favicon_url,
             'status': self.get_status()
         }
         
         if include_articles:
-            result['articles'] = [article.to_dict() for article in self.articles]
+            from sqlalchemy.orm import undefer
+            from app.models.article import Article
+            articles = self.source.articles.options(undefer(Article.content)).all()
+            Article.prefetch_bodies(articles)
+            result['articles'] = [
+                article.to_dict(user_id=self.user_id, feed=self)
+                for article in articles
+            ]
         
         return result
     
+    def get_new_today(self, today=None):
+        """Articles added today; the counter is stale once its date has passed"""
+        today = today or datetime.utcnow().date()
+        return self.new_today if self.new_today_date == today else 0
+    
+    def recount_stats(self):
+        """Recompute the counters from the articles and the user's article state"""
+        from app.models.article import Article
+        from app.models.user_article import UserArticle
+        
+        now = datetime.utcnow()
+        # Like the ingestion counter, only count today's articles that arrived after subscribing
+        since = max(datetime(now.year, now.month, now.day), self.created_at or now)
+        total, new_today = db.session.query(
+            db.func.count(Article.id),
+            db.func.sum(case((Article.created_at >= since, 1), else_=0))
+        ).filter(Article.source_id == self.source_id).one()
+        read, bookmarked, archived = db.session.query(
+            db.func.sum(case((UserArticle.is_read == True, 1), else_=0)),
+            db.func.sum(case((UserArticle.is_bookmarked == True, 1), else_=0)),
+            db.func.sum(case((UserArticle.reading_status == 'archive', 1), else_=0))
+        ).join(Article, Article.id == UserArticle.article_id).filter(
+            UserArticle.user_id == self.user_id,
+            Article.source_id == self.source_id
+        ).one()
+        
+        self.total_articles = total
+        self.unread_count = total - (read or 0)
+        self.bookmarked_count = bookmarked or 0
+        self.archived_count = archived or 0
+        self.new_today = new_today or 0
+        self.new_today_date = now.date()
+    
+    @classmethod
+    def adjust_counters(cls, user_id, source_id, deltas):
+        """Atomically add deltas such as {'unread_count': -1} to a user's subscription.
+        
+        A counter that would go negative has drifted from the article state;
+        the update is skipped and the subscription is recounted instead.
+        """
+        if not deltas:
+            return
+        query = cls.query.filter_by(user_id=user_id, source_id=source_id)
+        updated = query.filter(*[
+            getattr(cls, key) + delta >= 0 for key, delta in deltas.items() if delta < 0
+        ]).update({
+            getattr(cls, key): getattr(cls, key) + delta for key, delta in deltas.items()
+        }, synchronize_session=False)
+        if not updated:
+            feed = query.first()
+            if feed:
+                feed.recount_stats()
+    
     def __repr__(self):
         return f'<Feed {self.title}>'
\ No newline at end of file
@@ -0,0 +1,239 @@
+import random
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
+from flask import current_app
+from sqlalchemy import case
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+def normalize_feed_url(url):
+    """Normalize a feed URL so that equivalent spellings share one source"""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or 'http').lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not (scheme == 'http' and port == 80) and not (scheme == 'https' and port == 443):
+        host = f'{host}:{port}'
+    if parts.username:
+        userinfo = parts.username + (f':{parts.password}' if parts.password else '')
+        host = f'{userinfo}@{host}'
+    return urlunsplit((scheme, host, parts.path or '/', parts.query, ''))
+
+class FeedSource(db.Model):
+    """A feed URL that is fetched once and shared by every subscribed user"""
+    __tablename__ = 'feed_sources'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    url = db.Column(db.String(500), unique=True, nullable=False)  # Normalized RSS feed URL
+    
+    # Information published by the feed itself
+    title = db.Column(db.String(200))
+    description = db.Column(db.Text)
+    site_url = db.Column(db.String(500))
+    image_url = db.Column(db.String(500))
+    
+    # Fetch scheduling
+    fetch_interval = db.Column(db.Integer)  # adaptive polling interval in seconds
+    next_fetch_at = db.Column(db.DateTime, index=True)
+    retention_days = db.Column(db.Integer)  # overrides ARTICLE_RETENTION_DAYS, 0 keeps articles forever
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_fetched = db.Column(db.DateTime)
+    last_modified = db.Column(db.String(100))  # HTTP Last-Modified header
+    etag = db.Column(db.String(100))  # HTTP ETag header
+    
+    # Source statistics
+    total_articles = db.Column(db.Integer, default=0)
+    fetch_errors = db.Column(db.Integer, default=0)
+    last_error = db.Column(db.Text)
+    
+    # Relationships
+    subscriptions = db.relationship('Feed', backref='source', lazy='dynamic')
+    articles = db.relationship('Article', backref='source', lazy='dynamic', cascade='all, delete-orphan')
+    
+    def __init__(self, url, **kwargs):
+        self.url = normalize_feed_url(url)
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+    
+    @classmethod
+    def find_by_url(cls, url):
+        """Find source by (normalized) URL"""
+        return cls.query.filter_by(url=normalize_feed_url(url)).first()
+    
+    @classmethod
+    def get_or_create(cls, url):
+        """Get the shared source for a URL, creating it if needed"""
+        source = cls.find_by_url(url)
+        if source:
+            return source
+        
+        source = cls(url=url)
+        try:
+            # Savepoint so a concurrent insert of the same URL does not abort the caller
+            with db.session.begin_nested():
+                db.session.add(source)
+        except IntegrityError:
+            source = cls.find_by_url(url)
+        return source
+    
+    def get_preferred_interval(self):
+        """Shortest update_interval among the active subscriptions"""
+        from app.models.feed import Feed
+        interval = db.session.query(db.func.min(Feed.update_interval)).filter(
+            Feed.source_id == self.id,
+            Feed.is_active == True
+        ).scalar()
+        return interval or current_app.config['RSS_UPDATE_INTERVAL']
+    
+    def get_retention_cutoff(self, now=None):
+        """Articles published and ingested before this time are due for retention, or None"""
+        days = self.retention_days
+        if days is None:
+            days = current_app.config['ARTICLE_RETENTION_DAYS']
+        if not days or days <= 0:
+            return None
+        return (now or datetime.utcnow()) - timedelta(days=days)
+    
+    def update_stats(self):
+        """Recount source statistics"""
+        self.total_articles = self.articles.count()
+    
+    def record_new_articles(self, count, now=None):
+        """Add freshly ingested articles to the counters of the source and every subscription"""
+        if not count:
+            return
+        from app.models.feed import Feed
+        today = (now or datetime.utcnow()).date()
+        self.total_articles = (self.total_articles or 0) + count
+        # new_today is assigned before new_today_date, which MySQL's SET order relies on
+        Feed.query.filter_by(source_id=self.id).update({
+            Feed.unread_count: Feed.unread_count + count,
+            Feed.new_today: case((Feed.new_today_date == today, Feed.new_today + count), else_=count),
+            Feed.new_today_date: today
+        }, synchronize_session=False)
+    
+    def sync_subscriptions(self):
+        """Copy fetch state to every subscription with a single UPDATE"""
+        from app.models.feed import Feed
+        Feed.query.filter_by(source_id=self.id).update({
+            'last_fetched': self.last_fetched,
+            'fetch_errors': self.fetch_errors,
+            'last_error': self.last_error,
+            'total_articles': self.total_articles
+        })
+    
+    def adapt_fetch_interval(self, new_articles, now=None):
+        """Stretch or shrink the polling interval to follow the feed's publish rate"""
+        config = current_app.config
+        now = now or datetime.utcnow()
+        interval = self.fetch_interval or self.get_preferred_interval()
+        
+        if not new_articles:
+            interval *= 1.5
+        elif self.last_fetched:
+            # Aim for about one new article per poll, smoothed with the previous interval
+            elapsed = max((now - self.last_fetched).total_seconds(), 1)
+            interval = (interval + elapsed / new_articles) / 2
+        
+        interval = min(max(interval, config['RSS_MIN_UPDATE_INTERVAL']), config['RSS_MAX_UPDATE_INTERVAL'])
+        self.fetch_interval = int(interval)
+        self.next_fetch_at = now + timedelta(seconds=self.fetch_interval)
+    
+    def mark_fetch_success(self, etag=None, last_modified=None):
+        """Mark successful fetch and remember the HTTP cache validators"""
+        self.last_fetched = datetime.utcnow()
+        self.fetch_errors = 0
+        self.last_error = None
+        self.etag = etag
+        self.last_modified = last_modified
+        self.sync_subscriptions()
+        db.session.commit()
+    
+    def mark_not_modified(self):
+        """Mark a fetch that returned 304 Not Modified"""
+        self.last_fetched = datetime.utcnow()
+        if self.fetch_errors:
+            self.fetch_errors = 0
+            self.last_error = None
+        self.sync_subscriptions()
+        db.session.commit()
+    
+    def mark_fetch_error(self, error_message):
+        """Mark fetch error and back off before the next attempt"""
+        now = datetime.utcnow()
+        self.fetch_errors = (self.fetch_errors or 0) + 1
+        self.last_error = str(error_message)
+        self.last_fetched = now
+        self.next_fetch_at = now + timedelta(seconds=self.get_backoff_delay())
+        self.sync_subscriptions()
+        db.session.commit()
+    
+    def get_backoff_delay(self):
+        """Seconds to wait after the current run of failures, with jitter.
+        
+        Delays grow exponentially from RSS_BACKOFF_BASE up to RSS_BACKOFF_MAX.
+        Once the circuit breaker is open the source is only probed every
+        RSS_CIRCUIT_BREAKER_RESET seconds.
+        """
+        config = current_app.config
+        if self.fetch_errors >= config['RSS_CIRCUIT_BREAKER_THRESHOLD']:
+            delay = config['RSS_CIRCUIT_BREAKER_RESET']
+        else:
+            delay = min(config['RSS_BACKOFF_BASE'] * 2 ** (self.fetch_errors - 1), config['RSS_BACKOFF_MAX'])
+        # Equal jitter keeps failing sources from retrying in lockstep
+        return delay / 2 + random.uniform(0, delay / 2)
+    
+    def is_backing_off(self, now=None):
+        """Whether the source failed recently and is not due for a retry yet"""
+        now = now or datetime.utcnow()
+        return bool(self.fetch_errors) and self.next_fetch_at is not None and self.next_fetch_at > now
+    
+    def get_circuit_state(self, now=None):
+        """Circuit breaker state: closed, open, or half_open when a probe is due"""
+        if (self.fetch_errors or 0) < current_app.config['RSS_CIRCUIT_BREAKER_THRESHOLD']:
+            return 'closed'
+        return 'open' if self.is_backing_off(now) else 'half_open'
+    
+    def remove_subscription(self, feed):
+        """Delete a subscription and the user's state and highlights for this source's articles.
+        
+        The source and its articles are deleted once nobody subscribes to it,
+        along with its archive and the article bodies no other source shares.
+        """
+        from app.models.archived_article import ArchivedArticle
+        from app.models.article import Article
+        from app.models.article_tombstone import ArticleTombstone
+        from app.models.article_body import ArticleBody
+        from app.models.user_article import UserArticle
+        from app.models.highlight import Highlight
+        from app.utils.search import unindex_articles
+        
+        article_ids = db.session.query(Article.id).filter(Article.source_id == self.id)
+        for model in (UserArticle, Highlight):
+            model.query.filter(
+                model.user_id == feed.user_id,
+                model.article_id.in_(article_ids)
+            ).delete(synchronize_session=False)
+        db.session.delete(feed)
+        db.session.flush()
+        
+        if self.subscriptions.count() == 0:
+            unindex_articles(article_ids)
+            for model in (UserArticle, Highlight):
+                model.query.filter(model.article_id.in_(article_ids)).delete(synchronize_session=False)
+            body_hashes = [row.body_hash for row in db.session.query(Article.body_hash).filter(
+                Article.source_id == self.id,
+                Article.body_hash.isnot(None)
+            ).distinct()]
+            Article.query.filter_by(source_id=self.id).delete(synchronize_session=False)
+            for model in (ArchivedArticle, ArticleTombstone):
+                model.query.filter_by(source_id=self.id).delete(synchronize_session=False)
+            ArticleBody.delete_unreferenced(body_hashes)
+            db.session.delete(self)
+    
+    def __repr__(self):
+        return f'<FeedSource {self.url}>'
\ No newline at end of file
@@ -0,0 +1,98 @@
+from datetime import datetime
+from app import db
+
+class Highlight(db.Model):
+    """A passage a user highlighted in an article"""
+    __tablename__ = 'highlights'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    article_id = db.Column(db.Integer, db.ForeignKey('articles.id'), nullable=False)
+    
+    # Highlighted passage
+    text = db.Column(db.Text, nullable=False)
+    start_pos = db.Column(db.Integer)
+    end_pos = db.Column(db.Integer)
+    color = db.Column(db.String(20), default='yellow')
+    
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # Highlights are listed per user and article, and checked per article by retention
+    __table_args__ = (
+        db.Index('ix_highlights_user_article', 'user_id', 'article_id'),
+        db.Index('ix_highlights_article', 'article_id'),
+    )
+    
+    def __init__(self, user_id, article_id, text, **kwargs):
+        self.user_id = user_id
+        self.article_id = article_id
+        self.text = text
+        for key, value in kwargs.items():
+            if hasattr(self, key):
+                setattr(self, key, value)
+    
+    def to_dict(self):
+        """Convert highlight to dictionary"""
+        return {
+            'id': self.id,
+            'text': self.text,
+            'start_pos': self.start_pos,
+            'end_pos': self.end_pos,
+            'color': self.color,
+            'created_at': self.created_at
+        }
+    
+    @classmethod
+    def for_article(cls, user_id, article_id):
+        """Query a user's highlights on an article, oldest first"""
+        return cls.query.filter_by(user_id=user_id, article_id=article_id).order_by(cls.id)
+    
+    @classmethod
+    def migrate_json(cls, batch_size=500):
+        """Move highlights stored as JSON on user_articles into this table.
+        
+        Runs in batches and clears each migrated blob, so it can be
+        interrupted and run again. Returns (rows migrated, highlights created).
+        """
+        import json
+        from app.models.user_article import UserArticle
+        
+        migrated = created = 0
+        while True:
+            user_articles = UserArticle.query.filter(UserArticle.highlights.isnot(None)).limit(batch_size).all()
+            if not user_articles:
+                return migrated, created
+            
+            rows = []
+            for user_article in user_articles:
+                try:
+                    items = json.loads(user_article.highlights)
+                except ValueError:
+                    items = []
+                for item in items if isinstance(items, list) else []:
+                    if not isinstance(item, dict) or not item.get('text'):
+                        continue
+                    try:
+                        created_at = datetime.fromisoformat(item['created_at'])
+                    except (KeyError, TypeError, ValueError):
+                        created_at = user_article.updated_at or datetime.utcnow()
+                    rows.append({
+                        'user_id': user_article.user_id,
+                        'article_id': user_article.article_id,
+                        'text': item['text'],
+                        'start_pos': item.get('start_pos'),
+                        'end_pos': item.get('end_pos'),
+                        'color': item.get('color') or 'yellow',
+                        'created_at': created_at
+                    })
+                user_article.highlights = None
+            
+            if rows:
+                db.session.execute(cls.__table__.insert(), rows)
+            db.session.commit()
+            migrated += len(user_articles)
+            created += len(rows)
+    
+    def __repr__(self):
+        return f'<Highlight user={self.user_id} article={self.article_id}>'
\ No newline at end of file
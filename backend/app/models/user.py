@@ -1,7 +1,14 @@
 from datetime import datetime
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import make_transient_to_detached
 from app import db
+from app.utils.cache import TTLCache
 import bcrypt
 
+# Column values of recently loaded users, keyed by id
+_user_cache = TTLCache()
+
 class User(db.Model):
     __tablename__ = 'users'
     
@@ -24,6 +31,7 @@ class User(db.Model):
     # Relationships
     feeds = db.relationship('Feed', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     user_articles = db.relationship('UserArticle', backref='user', lazy='dynamic', cascade='all, delete-orphan')
+    highlights = db.relationship('Highlight', backref='user', lazy='dynamic', cascade='all, delete-orphan')
     
     def __init__(self, username, email, password):
         self.username = username
@@ -52,8 +60,8 @@ class User(db.Model):
             'email': self.email,
             'is_active': self.is_active,
             'is_admin': self.is_admin,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'last_login': self.last_login.isoformat() if self.last_login else None,
+            'created_at': self.created_at,
+            'last_login': self.last_login,
             'preferences': {
                 'theme': self.theme,
                 'language': self.language,
@@ -62,5 +70,32 @@ class User(db.Model):
             }
         }
     
+    @classmethod
+    def get_cached(cls, user_id):
+        """Get a user by id, rebuilding it from the cache instead of querying when possible.
+        
+        The cached copy is attached to the session, so it can be modified and
+        committed like a queried user. Updates and deletes invalidate it.
+        """
+        values = _user_cache.get(user_id)
+        if values is None:
+            user = cls.query.filter_by(id=user_id).one_or_none()
+            if user is not None:
+                values = {column.key: getattr(user, column.key) for column in cls.__table__.columns}
+                _user_cache.set(user_id, values, current_app.config['USER_CACHE_TTL'])
+            return user
+        
+        user = cls.__mapper__.class_manager.new_instance()
+        for key, value in values.items():
+            setattr(user, key, value)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+    
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _invalidate_cached_user(mapper, connection, target):
+    """Drop a changed user (profile, password, deactivation) from the cache"""
+    _user_cache.delete(target.id)
\ No newline at end of file
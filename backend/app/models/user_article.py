@@ -1,6 +1,23 @@
+from collections import defaultdict
 from datetime import datetime
 from app import db
 
+# Feed counters and the state column each one counts; an article without a UserArticle is unread
+COUNTER_FLAGS = {
+    'unread_count': ('is_read', lambda value: not value),
+    'bookmarked_count': ('is_bookmarked', lambda value: bool(value)),
+    'archived_count': ('reading_status', lambda value: value == 'archive')
+}
+
+# Column values of a UserArticle that has not been touched yet
+STATE_DEFAULTS = {
+    'is_read': False,
+    'is_bookmarked': False,
+    'reading_status': 'unread',
+    'reading_position': 0.0,
+    'reading_time': 0
+}
+
 class UserArticle(db.Model):
     __tablename__ = 'user_articles'
     
@@ -16,7 +33,7 @@ class UserArticle(db.Model):
     # User interaction
     rating = db.Column(db.Integer)  # 1-5 stars
     notes = db.Column(db.Text)
-    highlights = db.Column(db.Text)  # JSON string of highlights
+    highlights = db.Column(db.Text)  # Legacy JSON highlights, moved to the highlights table by migrate-highlights
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -28,8 +45,13 @@ class UserArticle(db.Model):
     reading_position = db.Column(db.Float, default=0.0)  # 0.0 to 1.0
     reading_time = db.Column(db.Integer, default=0)  # seconds spent reading
     
-    # Unique constraint to prevent duplicate entries
-    __table_args__ = (db.UniqueConstraint('user_id', 'article_id', name='user_article_unique'),)
+    # Unique constraint to prevent duplicate entries; status filters and per-article
+    # lookups (retention, removing a source) each get their own index
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'article_id', name='user_article_unique'),
+        db.Index('ix_user_articles_user_status', 'user_id', 'reading_status', 'article_id'),
+        db.Index('ix_user_articles_article', 'article_id'),
+    )
     
     def __init__(self, user_id, article_id, **kwargs):
         self.user_id = user_id
@@ -38,24 +60,42 @@ class UserArticle(db.Model):
             if hasattr(self, key):
                 setattr(self, key, value)
     
+    def get_counter_flags(self):
+        """Which feed counters this article currently counts towards"""
+        return {key: flag(getattr(self, column)) for key, (column, flag) in COUNTER_FLAGS.items()}
+    
+    def update_feed_counters(self, before, source_id=None):
+        """Apply the change since the `before` flags to the user's feed counters"""
+        after = self.get_counter_flags()
+        deltas = {key: int(after[key]) - int(before[key]) for key in after if after[key] != before[key]}
+        if deltas:
+            from app.models.feed import Feed
+            Feed.adjust_counters(self.user_id, source_id or self.article.source_id, deltas)
+    
     def mark_as_read(self):
         """Mark article as read"""
+        before = self.get_counter_flags()
         self.is_read = True
         self.reading_status = 'read'
         self.read_at = datetime.utcnow()
+        self.update_feed_counters(before)
         db.session.commit()
     
     def mark_as_unread(self):
         """Mark article as unread"""
+        before = self.get_counter_flags()
         self.is_read = False
         self.reading_status = 'unread'
         self.read_at = None
+        self.update_feed_counters(before)
         db.session.commit()
     
     def toggle_bookmark(self):
         """Toggle bookmark status"""
+        before = self.get_counter_flags()
         self.is_bookmarked = not self.is_bookmarked
         self.bookmarked_at = datetime.utcnow() if self.is_bookmarked else None
+        self.update_feed_counters(before)
         db.session.commit()
         return self.is_bookmarked
     
@@ -63,6 +103,7 @@ class UserArticle(db.Model):
         """Set reading status"""
         valid_statuses = ['unread', 'reading', 'read', 'later', 'archive']
         if status in valid_statuses:
+            before = self.get_counter_flags()
             self.reading_status = status
             if status == 'read' and not self.is_read:
                 self.is_read = True
@@ -70,6 +111,7 @@ class UserArticle(db.Model):
             elif status == 'unread':
                 self.is_read = False
                 self.read_at = None
+            self.update_feed_counters(before)
             db.session.commit()
     
     def set_rating(self, rating):
@@ -85,39 +127,25 @@ class UserArticle(db.Model):
     
     def get_highlights(self):
         """Get highlights as a list"""
-        if self.highlights:
-            import json
-            try:
-                return json.loads(self.highlights)
-            except:
-                return []
-        return []
+        from app.models.highlight import Highlight
+        return [highlight.to_dict() for highlight in Highlight.for_article(self.user_id, self.article_id)]
     
     def add_highlight(self, text, start_pos=None, end_pos=None, color='yellow'):
         """Add a highlight"""
-        highlights = self.get_highlights()
-        highlight = {
-            'id': len(highlights) + 1,
-            'text': text,
-            'start_pos': start_pos,
-            'end_pos': end_pos,
-            'color': color,
-            'created_at': datetime.utcnow().isoformat()
-        }
-        highlights.append(highlight)
-        
-        import json
-        self.highlights = json.dumps(highlights)
+        from app.models.highlight import Highlight
+        highlight = Highlight(self.user_id, self.article_id, text, start_pos=start_pos, end_pos=end_pos, color=color)
+        db.session.add(highlight)
         db.session.commit()
-        return highlight
+        return highlight.to_dict()
     
     def remove_highlight(self, highlight_id):
         """Remove a highlight by ID"""
-        highlights = self.get_highlights()
-        highlights = [h for h in highlights if h.get('id') != highlight_id]
-        
-        import json
-        self.highlights = json.dumps(highlights) if highlights else None
+        from app.models.highlight import Highlight
+        Highlight.query.filter_by(
+            id=highlight_id,
+            user_id=self.user_id,
+            article_id=self.article_id
+        ).delete(synchronize_session=False)
         db.session.commit()
     
     def update_reading_progress(self, position, time_spent=0):
@@ -143,22 +171,205 @@ class UserArticle(db.Model):
             'rating': self.rating,
             'notes': self.notes,
             'highlights': self.get_highlights(),
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'read_at': self.read_at.isoformat() if self.read_at else None,
-            'bookmarked_at': self.bookmarked_at.isoformat() if self.bookmarked_at else None,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
+            'read_at': self.read_at,
+            'bookmarked_at': self.bookmarked_at,
             'reading_position': self.reading_position,
             'reading_time': self.reading_time
         }
     
+    @classmethod
+    def upsert(cls, user_id, article_ids, values, where=None):
+        """Write `values` for the user and articles with INSERT ... ON CONFLICT / ON DUPLICATE KEY UPDATE.
+        
+        New rows get STATE_DEFAULTS for the other columns, existing rows only
+        have `values` overwritten (and only when they match `where`, if given),
+        so concurrent writers never hit the unique constraint. One statement
+        per 1000 articles. Returns the number of rows written.
+        """
+        from app.utils.sql import upsert
+        
+        now = datetime.utcnow()
+        insert_values = {**STATE_DEFAULTS, 'created_at': now, **values, 'updated_at': now}
+        stmt = upsert(cls.__table__, ['user_id', 'article_id'], list(values) + ['updated_at'], where=where)
+        written = 0
+        for start in range(0, len(article_ids), 1000):
+            chunk = article_ids[start:start + 1000]
+            params = [{'user_id': user_id, 'article_id': article_id, **insert_values} for article_id in chunk]
+            written += db.session.execute(stmt, params[0] if len(params) == 1 else params).rowcount
+        return written
+    
+    @classmethod
+    def add_progress(cls, entries):
+        """Write buffered reading progress in one upsert.
+        
+        Each entry has user_id, article_id, reading_position (the latest
+        position, which replaces the stored one) and reading_time (seconds to
+        add to the stored total).
+        """
+        if not entries:
+            return
+        from app.utils.sql import upsert
+        
+        now = datetime.utcnow()
+        stmt = upsert(cls.__table__, ['user_id', 'article_id'], ['reading_position', 'updated_at'],
+                      increment_columns=['reading_time'])
+        db.session.execute(stmt, [
+            {**STATE_DEFAULTS, 'created_at': now, 'updated_at': now, **entry}
+            for entry in entries
+        ])
+    
+    @classmethod
+    def lock_states(cls, user_id, article_ids):
+        """Create the missing rows for the articles and lock all of them, without committing.
+        
+        Returns {article_id: (is_read, is_bookmarked, reading_status)} as read
+        under the lock. The INSERT comes first so that SQLite takes its write
+        lock before the read; MySQL and PostgreSQL hold the row locks from
+        SELECT ... FOR UPDATE. Concurrent writers to the same rows therefore
+        see each other's changes, and counter deltas computed from these
+        states are never applied twice.
+        """
+        from app.utils.sql import insert_ignore
+        
+        now = datetime.utcnow()
+        states = {}
+        for start in range(0, len(article_ids), 1000):
+            chunk = article_ids[start:start + 1000]
+            db.session.execute(insert_ignore(cls.__table__), [
+                {'user_id': user_id, 'article_id': article_id, **STATE_DEFAULTS, 'created_at': now, 'updated_at': now}
+                for article_id in chunk
+            ])
+            rows = db.session.query(cls.article_id, cls.is_read, cls.is_bookmarked, cls.reading_status).filter(
+                cls.user_id == user_id,
+                cls.article_id.in_(chunk)
+            ).with_for_update().all()
+            states.update((row[0], tuple(row[1:])) for row in rows)
+        return states
+    
+    @classmethod
+    def apply_state(cls, user_id, article, values, current=None):
+        """Write `values` for one article and adjust the feed counters, without committing.
+        
+        `current` is the user's UserArticle as read by the request (None when
+        there is none). The write is a single upsert that only applies while
+        the stored state still matches `current`, so the counter deltas taken
+        from it are exact, and the counters are adjusted with one conditional
+        UPDATE. If another request changed the state in between, or on MySQL
+        where upserts take no condition, the row is locked and re-read
+        instead. Returns a UserArticle with the resulting state.
+        """
+        from sqlalchemy.orm.attributes import set_committed_value
+        from app.models.feed import Feed
+        from app.utils.sql import get_dialect_name
+        
+        if get_dialect_name() == 'mysql':
+            return cls._apply_state_locked(user_id, article, values)
+        
+        before = {column: getattr(current, column) if current else STATE_DEFAULTS[column]
+                  for column, _ in COUNTER_FLAGS.values()}
+        unchanged = db.and_(*[cls.__table__.c[column].is_not_distinct_from(value) for column, value in before.items()])
+        if not cls.upsert(user_id, [article.id], values, where=unchanged):
+            return cls._apply_state_locked(user_id, article, values)
+        
+        after = {**before, **values}
+        Feed.adjust_counters(user_id, article.source_id, {
+            key: int(flag(after[column])) - int(flag(before[column]))
+            for key, (column, flag) in COUNTER_FLAGS.items()
+            if flag(after[column]) != flag(before[column])
+        })
+        
+        values = {**values, 'updated_at': datetime.utcnow()}
+        if current is None:
+            return cls(user_id, article.id, **{**STATE_DEFAULTS, **values})
+        # The row was written with Core; update the loaded object without marking it dirty
+        for key, value in values.items():
+            set_committed_value(current, key, value)
+        return current
+    
+    @classmethod
+    def _apply_state_locked(cls, user_id, article, values):
+        """apply_state for when the stored state is unknown: create, lock and re-read the row first"""
+        from app.utils.sql import insert_ignore
+        
+        now = datetime.utcnow()
+        db.session.execute(insert_ignore(cls.__table__), {
+            'user_id': user_id, 'article_id': article.id, **STATE_DEFAULTS, 'created_at': now, 'updated_at': now
+        })
+        # Locked after the INSERT for the same reasons as in lock_states
+        state = cls.query.filter_by(user_id=user_id, article_id=article.id).with_for_update().populate_existing().one()
+        before = state.get_counter_flags()
+        
+        for key, value in values.items():
+            setattr(state, key, value)
+        state.updated_at = datetime.utcnow()
+        db.session.flush()
+        state.update_feed_counters(before, source_id=article.source_id)
+        return state
+    
+    @classmethod
+    def bulk_apply(cls, user_id, article_query, values):
+        """Set `values` on the user's state for every article in `article_query`, in one transaction.
+        
+        `article_query` must only select articles the user can access. Articles
+        already in the requested state are skipped; the rest are locked, written
+        with one set-based upsert per 1000 rows and the feed counters are
+        adjusted once per source from the locked state. Returns the number of
+        articles changed.
+        """
+        from app.models.article import Article
+        from app.models.feed import Feed
+        
+        state_columns = [key for key in ('is_read', 'is_bookmarked', 'reading_status') if key in values]
+        rows = article_query.outerjoin(cls, db.and_(
+            cls.article_id == Article.id,
+            cls.user_id == user_id
+        )).filter(db.or_(
+            cls.id.is_(None),
+            *[getattr(cls, key).is_distinct_from(values[key]) for key in state_columns]
+        )).with_entities(Article.id, Article.source_id).all()
+        if not rows:
+            return 0
+        
+        source_ids = dict(rows)
+        states = cls.lock_states(user_id, list(source_ids))
+        
+        deltas = defaultdict(lambda: defaultdict(int))
+        article_ids = []
+        for article_id, state in states.items():
+            before = dict(zip(('is_read', 'is_bookmarked', 'reading_status'), state))
+            # Another request may have applied the change since the first read
+            if state_columns and all(before[key] == values[key] for key in state_columns):
+                continue
+            after = {**before, **values}
+            for key, (column, flag) in COUNTER_FLAGS.items():
+                deltas[source_ids[article_id]][key] += int(flag(after[column])) - int(flag(before[column]))
+            article_ids.append(article_id)
+        if not article_ids:
+            db.session.commit()
+            return 0
+        
+        cls.upsert(user_id, article_ids, values)
+        
+        for source_id, source_deltas in deltas.items():
+            Feed.adjust_counters(user_id, source_id, {key: delta for key, delta in source_deltas.items() if delta})
+        db.session.commit()
+        return len(article_ids)
+    
     @classmethod
     def get_or_create(cls, user_id, article_id):
         """Get existing UserArticle or create new one"""
         user_article = cls.query.filter_by(user_id=user_id, article_id=article_id).first()
         if not user_article:
-            user_article = cls(user_id=user_id, article_id=article_id)
-            db.session.add(user_article)
+            # INSERT that skips an existing row, so a concurrent request cannot violate user_article_unique
+            from app.utils.sql import insert_ignore
+            now = datetime.utcnow()
+            db.session.execute(insert_ignore(cls.__table__), {
+                'user_id': user_id, 'article_id': article_id, **STATE_DEFAULTS, 'created_at': now, 'updated_at': now
+            })
             db.session.commit()
+            user_article = cls.query.filter_by(user_id=user_id, article_id=article_id).one()
         return user_article
     
     def __repr__(self):
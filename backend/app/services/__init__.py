@@ -0,0 +1,6 @@
+from .fetcher import refresh_sources
+from .scheduler import FeedScheduler
+from .progress import progress_buffer
+from .retention import apply_retention
+
+__all__ = ['refresh_sources', 'FeedScheduler', 'progress_buffer', 'apply_retention']
\ No newline at end of file
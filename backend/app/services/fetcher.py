@@ -0,0 +1,320 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import feedparser
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+from app import db
+from app.models.article import Article
+from app.models.archived_article import ArchivedArticle
+from app.models.article_tombstone import ArticleTombstone
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'WiseRSS/1.0 (+https://github.com/tzyi/wiseRSS)'
+
+class FetchResult:
+    """Outcome of fetching a single feed source"""
+    
+    def __init__(self, source_id, entries=None, feed_info=None, error=None,
+                 not_modified=False, etag=None, last_modified=None):
+        self.source_id = source_id
+        self.entries = entries or []
+        self.feed_info = feed_info or {}
+        self.error = error
+        self.not_modified = not_modified
+        self.etag = etag
+        self.last_modified = last_modified
+        self.new_articles = 0
+    
+    @property
+    def ok(self):
+        return self.error is None
+    
+    def __repr__(self):
+        return f'<FetchResult source={self.source_id} ok={self.ok} new={self.new_articles}>'
+
+class HostCircuit:
+    """Tracks connection failures per host during a single refresh run.
+    
+    After `threshold` consecutive connection errors or timeouts against a
+    host, the remaining feeds on that host fail fast instead of each tying
+    up a worker until the request timeout.
+    """
+    
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self._failures = {}
+        self._lock = threading.Lock()
+    
+    def is_open(self, host):
+        with self._lock:
+            return self._failures.get(host, 0) >= self.threshold
+    
+    def record_failure(self, host):
+        with self._lock:
+            self._failures[host] = self._failures.get(host, 0) + 1
+    
+    def record_success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+
+def create_session(pool_size):
+    """Create an HTTP session whose connection pool matches the worker count"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['User-Agent'] = USER_AGENT
+    return session
+
+def _parse_datetime(entry):
+    """Convert feedparser's UTC struct_time into a naive UTC datetime"""
+    for key in ('published_parsed', 'updated_parsed', 'created_parsed'):
+        value = entry.get(key)
+        if value:
+            try:
+                return datetime(*value[:6])
+            except (TypeError, ValueError):
+                continue
+    return None
+
+def _entry_image(entry):
+    """Find the best image URL for an entry"""
+    for key in ('media_thumbnail', 'media_content'):
+        for media in entry.get(key) or []:
+            if media.get('url') and media.get('medium', 'image') == 'image':
+                return media['url']
+    for enclosure in entry.get('enclosures') or []:
+        if enclosure.get('type', '').startswith('image/') and enclosure.get('href'):
+            return enclosure['href']
+    return None
+
+def parse_entry(entry):
+    """Turn a feedparser entry into keyword arguments for Article"""
+    url = entry.get('link')
+    if not url:
+        return None
+    
+    content = None
+    if entry.get('content'):
+        content = entry['content'][0].get('value')
+    
+    return {
+        'title': (entry.get('title') or url)[:500],
+        'url': url[:1000],
+        'guid': (entry.get('id') or url)[:500],
+        'summary': entry.get('summary'),
+        'content': content,
+        'author': (entry.get('author') or '')[:200] or None,
+        'published_at': _parse_datetime(entry),
+        'image_url': (_entry_image(entry) or '')[:1000] or None,
+        'media_urls': [e['href'] for e in entry.get('enclosures') or [] if e.get('href')],
+        'tags': [t['term'] for t in entry.get('tags') or [] if t.get('term')]
+    }
+
+def conditional_headers(etag, last_modified):
+    """Build the validator headers for a conditional GET"""
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
+
+def _validator(value):
+    """Only keep validators that fit the Feed columns; a truncated one would never match"""
+    if value and len(value) <= 100:
+        return value
+    return None
+
+def fetch_feed(session, source_id, url, timeout, max_entries, etag=None, last_modified=None, host_circuit=None):
+    """Download and parse a feed. Runs in a worker thread and never touches the database."""
+    host = urlsplit(url).hostname or ''
+    if host_circuit and host_circuit.is_open(host):
+        return FetchResult(source_id, error=f'Skipped: host {host} is not responding')
+    
+    try:
+        try:
+            response = session.get(url, timeout=timeout, headers=conditional_headers(etag, last_modified))
+        except (requests.ConnectionError, requests.Timeout):
+            if host_circuit:
+                host_circuit.record_failure(host)
+            raise
+        if host_circuit:
+            host_circuit.record_success(host)
+        
+        if response.status_code == 304:
+            return FetchResult(source_id, not_modified=True)
+        response.raise_for_status()
+        
+        headers = {key.lower(): value for key, value in response.headers.items()}
+        headers.setdefault('content-location', response.url)
+        parsed = feedparser.parse(response.content, response_headers=headers)
+        
+        if parsed.bozo and not parsed.entries:
+            return FetchResult(source_id, error=f'Invalid feed: {parsed.get("bozo_exception")}')
+        
+        entries = []
+        for entry in parsed.entries[:max_entries]:
+            data = parse_entry(entry)
+            if data:
+                entries.append(data)
+        
+        feed_info = {
+            'title': parsed.feed.get('title'),
+            'site_url': parsed.feed.get('link'),
+            'description': parsed.feed.get('subtitle'),
+            'image_url': (parsed.feed.get('image') or {}).get('href')
+        }
+        return FetchResult(
+            source_id,
+            entries=entries,
+            feed_info=feed_info,
+            etag=_validator(response.headers.get('ETag')),
+            last_modified=_validator(response.headers.get('Last-Modified'))
+        )
+        
+    except requests.RequestException as e:
+        return FetchResult(source_id, error=str(e))
+    except Exception as e:
+        logger.exception('Unexpected error fetching %s', url)
+        return FetchResult(source_id, error=str(e))
+
+def build_article(source_id, data):
+    """Create a transient Article from parsed entry data"""
+    data = dict(data)
+    tags = data.pop('tags')
+    media_urls = data.pop('media_urls')
+    
+    article = Article(source_id=source_id, **data)
+    article.set_tags(tags)
+    article.set_media_urls(media_urls)
+    article.calculate_read_time()
+    return article
+
+def store_entries(source, entries):
+    """Insert entries that the source does not have yet and return how many were added.
+    
+    Existing guids and content hashes are resolved with one set-based query
+    and the new rows go in with a single multi-row INSERT. Entries the
+    retention policy archived or deleted are not stored again.
+    """
+    candidates = {}
+    for data in entries:
+        candidates.setdefault(data['guid'], build_article(source.id, data))
+    if not candidates:
+        return 0
+    
+    articles = list(candidates.values())
+    existing_guids, existing_hashes = Article.find_existing_keys(
+        source.id,
+        [article.guid for article in articles],
+        [article.content_hash for article in articles]
+    )
+    # Undated entries pass the cutoff check, so also skip the ones retention already removed
+    guids = [article.guid for article in articles]
+    archived_guids = ArchivedArticle.find_archived_guids(source.id, guids) | ArticleTombstone.find_removed_guids(source.id, guids)
+    
+    new_articles = []
+    seen_hashes = set(existing_hashes)
+    # Entries older than the retention window would only be removed again
+    cutoff = source.get_retention_cutoff()
+    for article in articles:
+        if article.guid in existing_guids or article.guid in archived_guids or article.content_hash in seen_hashes:
+            continue
+        if cutoff and article.published_at and article.published_at < cutoff:
+            continue
+        seen_hashes.add(article.content_hash)
+        new_articles.append(article)
+    
+    Article.bulk_insert(new_articles)
+    return len(new_articles)
+
+# Column sizes for the feed-level fields copied onto FeedSource
+FEED_INFO_LENGTHS = {'title': 200, 'description': None, 'site_url': 500, 'image_url': 500}
+
+def apply_result(source, result):
+    """Persist the outcome of a fetch for a source and its subscriptions"""
+    if not result.ok:
+        source.mark_fetch_error(result.error)
+        return
+    
+    if result.not_modified:
+        source.adapt_fetch_interval(0)
+        source.mark_not_modified()
+        return
+    
+    try:
+        for key, value in result.feed_info.items():
+            if value and not getattr(source, key):
+                setattr(source, key, value[:FEED_INFO_LENGTHS[key]])
+        
+        result.new_articles = store_entries(source, result.entries)
+        source.adapt_fetch_interval(result.new_articles)
+        source.record_new_articles(result.new_articles)
+        source.mark_fetch_success(etag=result.etag, last_modified=result.last_modified)
+    except Exception as e:
+        db.session.rollback()
+        logger.exception('Error storing articles for source %s', result.source_id)
+        result.error = str(e)
+        source.mark_fetch_error(e)
+
+def refresh_sources(sources, max_workers=None, timeout=None, force=False):
+    """Fetch feed sources concurrently and store their new articles.
+    
+    Each source is fetched once no matter how many users subscribe to it.
+    Network I/O and parsing happen in a thread pool bounded by
+    RSS_FETCH_CONCURRENCY; results are written to the database from the
+    calling thread as they complete. Sources that are backing off after
+    failures are skipped unless `force` is set, and sources whose circuit
+    breaker is open are probed with the shorter RSS_PROBE_TIMEOUT.
+    Returns one FetchResult per fetched source.
+    """
+    config = current_app.config
+    max_workers = max_workers or config['RSS_FETCH_CONCURRENCY']
+    timeout = timeout or config['RSS_REQUEST_TIMEOUT']
+    probe_timeout = min(timeout, config['RSS_PROBE_TIMEOUT'])
+    max_entries = config['RSS_MAX_ARTICLES_PER_FEED']
+    
+    now = datetime.utcnow()
+    sources_by_id = {
+        source.id: source for source in sources
+        if force or not source.is_backing_off(now)
+    }
+    if not sources_by_id:
+        return []
+    
+    jobs = [
+        (
+            source.id, source.url, source.etag, source.last_modified,
+            timeout if source.get_circuit_state(now) == 'closed' else probe_timeout
+        )
+        for source in sources_by_id.values()
+    ]
+    workers = min(max_workers, len(jobs))
+    results = []
+    
+    host_circuit = HostCircuit(config['RSS_HOST_FAILURE_THRESHOLD'])
+    session = create_session(workers)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='feed-fetch') as executor:
+            futures = [
+                executor.submit(
+                    fetch_feed, session, source_id, url, source_timeout, max_entries,
+                    etag, last_modified, host_circuit
+                )
+                for source_id, url, etag, last_modified, source_timeout in jobs
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                apply_result(sources_by_id[result.source_id], result)
+                results.append(result)
+    finally:
+        session.close()
+    
+    return results
\ No newline at end of file
@@ -0,0 +1,100 @@
+import atexit
+import logging
+import threading
+import time
+
+from app import db
+from app.models.user_article import UserArticle
+
+logger = logging.getLogger(__name__)
+
+class ProgressBuffer:
+    """Coalesces reading-progress heartbeats in memory and writes them in batches.
+    
+    Heartbeats for the same user and article are merged: the latest position
+    wins and the reading time adds up. A background thread flushes the buffer
+    every READING_PROGRESS_FLUSH_INTERVAL seconds with a single upsert, and
+    whatever is left is flushed when the worker process exits.
+    """
+    
+    def __init__(self):
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._app = None
+        self._thread = None
+        self.interval = 10
+    
+    def init_app(self, app):
+        self._app = app
+        self.interval = app.config['READING_PROGRESS_FLUSH_INTERVAL']
+    
+    def record(self, user_id, article_id, position, time_spent=0):
+        """Buffer a heartbeat"""
+        key = (user_id, article_id)
+        with self._lock:
+            entry = self._pending.get(key)
+            if entry is None:
+                self._pending[key] = {
+                    'user_id': user_id,
+                    'article_id': article_id,
+                    'reading_position': position,
+                    'reading_time': time_spent
+                }
+            else:
+                entry['reading_position'] = position
+                entry['reading_time'] += time_spent
+        self._ensure_started()
+    
+    def pop(self, user_id, article_id):
+        """Take the buffered progress for one article out of the buffer, or None"""
+        with self._lock:
+            return self._pending.pop((user_id, article_id), None)
+    
+    def flush(self):
+        """Write everything buffered so far. Returns the number of rows written."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        
+        try:
+            UserArticle.add_progress(list(pending.values()))
+            db.session.commit()
+            return len(pending)
+        except Exception:
+            db.session.rollback()
+            logger.exception('Error flushing reading progress, retrying on the next flush')
+            self._requeue(pending)
+            return 0
+    
+    def _requeue(self, pending):
+        """Merge entries from a failed flush back under any newer heartbeats"""
+        with self._lock:
+            for key, entry in pending.items():
+                newer = self._pending.get(key)
+                if newer is None:
+                    self._pending[key] = entry
+                else:
+                    newer['reading_time'] += entry['reading_time']
+    
+    def _ensure_started(self):
+        if self._thread is not None or self._app is None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='progress-flush', daemon=True)
+            self._thread.start()
+        atexit.register(self._flush_at_exit)
+    
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with self._app.app_context():
+                self.flush()
+    
+    def _flush_at_exit(self):
+        with self._app.app_context():
+            self.flush()
+
+progress_buffer = ProgressBuffer()
\ No newline at end of file
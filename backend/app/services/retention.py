@@ -0,0 +1,163 @@
+import logging
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, or_, func, select, literal
+from app import db
+from app.models.article import Article
+from app.models.article_body import ArticleBody
+from app.models.archived_article import ArchivedArticle
+from app.models.article_tombstone import ArticleTombstone
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.highlight import Highlight
+from app.models.user_article import UserArticle, COUNTER_FLAGS, STATE_DEFAULTS
+from app.utils.search import unindex_articles
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_COLUMNS = ('id', 'source_id', 'title', 'summary', 'content', 'url', 'author',
+                   'guid', 'published_at', 'created_at', 'archived_at')
+
+class RetentionResult:
+    """Outcome of applying the retention policy to one feed source"""
+    
+    def __init__(self, source_id, cutoff):
+        self.source_id = source_id
+        self.cutoff = cutoff
+        self.removed = 0
+        self.batches = 0
+    
+    def __repr__(self):
+        return f'<RetentionResult source={self.source_id} removed={self.removed}>'
+
+def _user_investment():
+    """Articles someone bookmarked, rated, annotated or highlighted, which are always kept"""
+    invested = db.session.query(UserArticle.id).filter(
+        UserArticle.article_id == Article.id,
+        or_(
+            UserArticle.is_bookmarked == True,
+            UserArticle.rating.isnot(None),
+            and_(UserArticle.notes.isnot(None), UserArticle.notes != ''),
+            UserArticle.highlights.isnot(None)
+        )
+    ).exists()
+    highlighted = db.session.query(Highlight.id).filter(Highlight.article_id == Article.id).exists()
+    return or_(invested, highlighted)
+
+def find_expired(source_id, cutoff, after_id=0, limit=500):
+    """Ids of a source's articles published and ingested before `cutoff` that nobody invested in"""
+    rows = db.session.query(Article.id).filter(
+        Article.source_id == source_id,
+        Article.id > after_id,
+        Article.created_at < cutoff,
+        or_(Article.published_at.is_(None), Article.published_at < cutoff),
+        ~_user_investment()
+    ).order_by(Article.id).limit(limit).all()
+    return [row.id for row in rows]
+
+def _counter_deltas(source_id, article_ids):
+    """Per-user Feed counter changes for removing articles from a source"""
+    removed = len(article_ids)
+    # Subscribers without a UserArticle row count every article with the default state
+    defaults = {key: int(counts(STATE_DEFAULTS[column])) for key, (column, counts) in COUNTER_FLAGS.items()}
+    counted = {
+        user_id: {key: removed * value for key, value in defaults.items()}
+        for (user_id,) in db.session.query(Feed.user_id).filter(Feed.source_id == source_id)
+    }
+    
+    columns = [getattr(UserArticle, column) for column, _ in COUNTER_FLAGS.values()]
+    rows = db.session.query(UserArticle.user_id, *columns).filter(UserArticle.article_id.in_(article_ids))
+    for user_id, *values in rows:
+        if user_id not in counted:
+            continue
+        for (key, (_, counts)), value in zip(COUNTER_FLAGS.items(), values):
+            counted[user_id][key] += int(counts(value)) - defaults[key]
+    
+    return {
+        user_id: {key: -count for key, count in counts.items() if count}
+        for user_id, counts in counted.items()
+    }
+
+def remove_articles(source_id, article_ids, archive=True, now=None):
+    """Remove one chunk of a source's articles, keeping counters, search and bodies consistent.
+    
+    With `archive` the articles are first copied to archived_articles in a
+    single INSERT ... SELECT, otherwise only their guids are kept in
+    article_tombstones. Does not commit.
+    """
+    if not article_ids:
+        return
+    now = now or datetime.utcnow()
+    
+    if archive:
+        content = func.coalesce(ArticleBody.content, Article.content)
+        db.session.execute(ArchivedArticle.__table__.insert().from_select(ARCHIVE_COLUMNS, select(
+            Article.id, Article.source_id, Article.title, Article.summary, content, Article.url,
+            Article.author, Article.guid, Article.published_at, Article.created_at, literal(now)
+        ).select_from(Article).outerjoin(
+            ArticleBody, ArticleBody.hash == Article.body_hash
+        ).where(Article.id.in_(article_ids))))
+    else:
+        db.session.execute(ArticleTombstone.__table__.insert().from_select(
+            ('source_id', 'guid', 'removed_at'),
+            select(Article.source_id, Article.guid, literal(now)).where(
+                Article.id.in_(article_ids),
+                Article.guid.isnot(None)
+            )
+        ))
+    
+    for user_id, deltas in _counter_deltas(source_id, article_ids).items():
+        Feed.adjust_counters(user_id, source_id, deltas)
+    FeedSource.query.filter_by(id=source_id).update({
+        FeedSource.total_articles: FeedSource.total_articles - len(article_ids)
+    }, synchronize_session=False)
+    
+    body_hashes = [row.body_hash for row in db.session.query(Article.body_hash).filter(
+        Article.id.in_(article_ids),
+        Article.body_hash.isnot(None)
+    ).distinct()]
+    unindex_articles(article_ids)
+    UserArticle.query.filter(UserArticle.article_id.in_(article_ids)).delete(synchronize_session=False)
+    Article.query.filter(Article.id.in_(article_ids)).delete(synchronize_session=False)
+    ArticleBody.delete_unreferenced(body_hashes)
+
+def apply_source_retention(source, batch_size=None, archive=None, now=None):
+    """Expire a source's old articles in chunks, committing after each one"""
+    config = current_app.config
+    batch_size = batch_size or config['ARTICLE_RETENTION_BATCH_SIZE']
+    if archive is None:
+        archive = config['ARTICLE_RETENTION_MODE'] != 'delete'
+    now = now or datetime.utcnow()
+    
+    result = RetentionResult(source.id, source.get_retention_cutoff(now))
+    if result.cutoff is None:
+        return result
+    
+    last_id = 0
+    while True:
+        article_ids = find_expired(source.id, result.cutoff, after_id=last_id, limit=batch_size)
+        if not article_ids:
+            return result
+        try:
+            remove_articles(source.id, article_ids, archive=archive, now=now)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        last_id = article_ids[-1]
+        result.removed += len(article_ids)
+        result.batches += 1
+
+def apply_retention(batch_size=None, archive=None, now=None):
+    """Apply the retention policy to every source that has one. Returns the results."""
+    now = now or datetime.utcnow()
+    results = []
+    for source in FeedSource.query.order_by(FeedSource.id).all():
+        if source.get_retention_cutoff(now) is None:
+            continue
+        try:
+            results.append(apply_source_retention(source, batch_size, archive, now))
+        except Exception:
+            logger.exception('Error applying retention to source %s', source.id)
+    return results
\ No newline at end of file
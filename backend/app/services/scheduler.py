@@ -0,0 +1,129 @@
+import heapq
+import logging
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_
+from app import db
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.services.fetcher import refresh_sources
+from app.services.retention import apply_retention
+
+logger = logging.getLogger(__name__)
+
+class FeedScheduler:
+    """Priority queue of feed sources ordered by when they are next due for a fetch.
+    
+    FeedSource.next_fetch_at is the source of truth, so the queue is rebuilt
+    from the database every RSS_SCHEDULER_RELOAD_INTERVAL seconds to pick up
+    new, edited and deleted subscriptions. Between reloads due sources are
+    popped in batches, refreshed concurrently and pushed back at their new
+    due time. The article retention policy is applied every
+    ARTICLE_RETENTION_INTERVAL seconds.
+    """
+    
+    def __init__(self, batch_size=None, reload_interval=None):
+        config = current_app.config
+        self.batch_size = batch_size or config['RSS_SCHEDULER_BATCH_SIZE']
+        self.reload_interval = reload_interval or config['RSS_SCHEDULER_RELOAD_INTERVAL']
+        self.retention_interval = config['ARTICLE_RETENTION_INTERVAL']
+        self._retention_at = None
+        self._heap = []
+        self._due = {}
+        self._loaded_at = None
+    
+    def __len__(self):
+        return len(self._due)
+    
+    def push(self, source_id, due_at):
+        """Queue a source, replacing any earlier entry for it"""
+        self._due[source_id] = due_at
+        heapq.heappush(self._heap, (due_at, source_id))
+    
+    @staticmethod
+    def _eligible():
+        """Sources with at least one active, auto-updating subscription"""
+        return FeedSource.subscriptions.any(and_(Feed.is_active == True, Feed.auto_update == True))
+    
+    def load(self):
+        """Rebuild the queue from the sources that are eligible for automatic updates"""
+        now = datetime.utcnow()
+        rows = db.session.query(FeedSource.id, FeedSource.next_fetch_at).filter(self._eligible()).all()
+        db.session.commit()
+        
+        self._heap = []
+        self._due = {}
+        for source_id, next_fetch_at in rows:
+            self.push(source_id, next_fetch_at or now)
+        self._loaded_at = time.monotonic()
+    
+    def next_due(self):
+        """Return the earliest due time in the queue, or None if it is empty"""
+        while self._heap:
+            due_at, source_id = self._heap[0]
+            if self._due.get(source_id) == due_at:
+                return due_at
+            heapq.heappop(self._heap)  # stale entry
+        return None
+    
+    def pop_due(self, now=None):
+        """Remove and return up to batch_size source ids that are due"""
+        now = now or datetime.utcnow()
+        source_ids = []
+        while len(source_ids) < self.batch_size:
+            due_at = self.next_due()
+            if due_at is None or due_at > now:
+                break
+            _, source_id = heapq.heappop(self._heap)
+            del self._due[source_id]
+            source_ids.append(source_id)
+        return source_ids
+    
+    def run_once(self):
+        """Refresh every source that is currently due and requeue it. Returns the results."""
+        source_ids = self.pop_due()
+        if not source_ids:
+            return []
+        
+        sources = FeedSource.query.filter(FeedSource.id.in_(source_ids), self._eligible()).all()
+        results = refresh_sources(sources)
+        
+        for source in sources:
+            self.push(source.id, source.next_fetch_at or datetime.utcnow())
+        db.session.commit()
+        return results
+    
+    def run_retention(self):
+        """Apply the retention policy if it is due. Returns the number of articles removed."""
+        if self._retention_at is not None and time.monotonic() - self._retention_at < self.retention_interval:
+            return 0
+        self._retention_at = time.monotonic()
+        removed = sum(result.removed for result in apply_retention())
+        if removed:
+            logger.info('Retention removed %d articles', removed)
+        return removed
+    
+    def run_forever(self, max_sleep=30):
+        """Run the scheduling loop until interrupted"""
+        self.load()
+        logger.info('Feed scheduler started with %d sources', len(self))
+        
+        while True:
+            if time.monotonic() - self._loaded_at >= self.reload_interval:
+                self.load()
+            self.run_retention()
+            
+            results = self.run_once()
+            if results:
+                failed = sum(1 for r in results if not r.ok)
+                new_articles = sum(r.new_articles for r in results)
+                logger.info('Refreshed %d sources (%d failed, %d new articles)', len(results), failed, new_articles)
+                continue
+            
+            due_at = self.next_due()
+            sleep_for = max_sleep
+            if due_at is not None:
+                sleep_for = min(max_sleep, max((due_at - datetime.utcnow()).total_seconds(), 0))
+            time.sleep(max(sleep_for, 0.1))
\ No newline at end of file
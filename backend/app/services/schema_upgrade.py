@@ -0,0 +1,243 @@
+import json
+import logging
+from collections import defaultdict
+from datetime import datetime
+from alembic.operations import Operations
+from alembic.runtime.migration import MigrationContext
+from sqlalchemy import MetaData, Table, inspect, select, update, delete, func
+from app import db
+from app.models.feed_source import normalize_feed_url
+
+logger = logging.getLogger(__name__)
+
+# Fetch state that lived on each feed before sources were shared
+LEGACY_SOURCE_COLUMNS = (
+    'title', 'description', 'site_url', 'image_url', 'fetch_interval', 'next_fetch_at',
+    'last_fetched', 'etag', 'last_modified', 'fetch_errors', 'last_error'
+)
+
+class UpgradeResult:
+    """What upgrade_schema changed"""
+    
+    def __init__(self):
+        self.tables = []
+        self.columns = []
+        self.sources = 0
+        self.merged_feeds = 0
+        self.merged_articles = 0
+        self.indexes = []
+
+def _operations(connection):
+    return Operations(MigrationContext.configure(connection))
+
+def _reflect(connection, name):
+    return Table(name, MetaData(), autoload_with=connection)
+
+def add_missing_columns(connection):
+    """Add model columns an existing table does not have yet. Returns 'table.column' names.
+    
+    Columns are added as nullable and rows get their scalar default, so the
+    statement works on populated tables of every dialect.
+    """
+    inspector = inspect(connection)
+    op = _operations(connection)
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            op.add_column(table.name, db.Column(column.name, column.type, nullable=True))
+            if column.default is not None and column.default.is_scalar:
+                connection.execute(update(table).values({column.name: column.default.arg}))
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+def needs_source_migration(connection):
+    """Whether articles still belong to per-user feeds (the layout before shared sources)"""
+    inspector = inspect(connection)
+    return 'feed_id' in {column['name'] for column in inspector.get_columns('articles')}
+
+def _create_sources(connection, feeds):
+    """Create one source per normalized feed URL and point the feeds at it. Returns {feed id: source id}."""
+    from app.models.feed_source import FeedSource
+    
+    groups = defaultdict(list)
+    for row in connection.execute(select(feeds)).mappings():
+        groups[normalize_feed_url(row['url'])].append(row)
+    
+    existing = dict(connection.execute(select(FeedSource.url, FeedSource.id)).all())
+    source_ids = {}
+    for url, rows in groups.items():
+        source_id = existing.get(url)
+        if source_id is None:
+            # The most recently fetched subscription has the freshest HTTP validators
+            latest = max(rows, key=lambda row: row.get('last_fetched') or datetime.min)
+            values = {key: latest.get(key) for key in LEGACY_SOURCE_COLUMNS if key in latest}
+            now = datetime.utcnow()
+            source_id = connection.execute(FeedSource.__table__.insert().values(
+                url=url, created_at=now, updated_at=now, total_articles=0, **values
+            )).inserted_primary_key[0]
+        for row in rows:
+            source_ids[row['id']] = source_id
+    
+    for feed_id, source_id in source_ids.items():
+        connection.execute(update(feeds).where(feeds.c.id == feed_id).values(source_id=source_id))
+    return source_ids
+
+def _merge_user_state(keep, other):
+    """Values of one UserArticle that combines two users' rows for the same article"""
+    merged = {
+        'is_read': bool(keep['is_read'] or other['is_read']),
+        'is_bookmarked': bool(keep['is_bookmarked'] or other['is_bookmarked']),
+        'rating': keep['rating'] or other['rating'],
+        'notes': keep['notes'] or other['notes'],
+        'reading_position': max(keep['reading_position'] or 0.0, other['reading_position'] or 0.0),
+        'reading_time': (keep['reading_time'] or 0) + (other['reading_time'] or 0),
+        'read_at': min(filter(None, (keep['read_at'], other['read_at'])), default=None),
+        'bookmarked_at': keep['bookmarked_at'] or other['bookmarked_at']
+    }
+    if (keep['reading_status'] or 'unread') == 'unread':
+        merged['reading_status'] = other['reading_status']
+    if keep.get('highlights') and other.get('highlights'):
+        try:
+            merged['highlights'] = json.dumps(json.loads(keep['highlights']) + json.loads(other['highlights']))
+        except (ValueError, TypeError):
+            pass
+    elif other.get('highlights'):
+        merged['highlights'] = other['highlights']
+    return merged
+
+def merge_duplicate_articles(connection):
+    """Fold articles with the same (source_id, guid) into the oldest one. Returns how many were removed.
+    
+    Read state and highlights move to the kept article; when a user has
+    state on both, the two rows are combined.
+    """
+    articles = _reflect(connection, 'articles')
+    user_articles = _reflect(connection, 'user_articles')
+    highlights = _reflect(connection, 'highlights')
+    
+    duplicates = connection.execute(
+        select(articles.c.source_id, articles.c.guid).where(articles.c.guid.isnot(None))
+        .group_by(articles.c.source_id, articles.c.guid).having(func.count() > 1)
+    ).all()
+    removed = 0
+    for source_id, guid in duplicates:
+        ids = connection.execute(select(articles.c.id).where(
+            articles.c.source_id == source_id,
+            articles.c.guid == guid
+        ).order_by(articles.c.id)).scalars().all()
+        keep_id, other_ids = ids[0], ids[1:]
+        
+        kept = {row['user_id']: row for row in connection.execute(
+            select(user_articles).where(user_articles.c.article_id == keep_id)
+        ).mappings()}
+        for row in connection.execute(select(user_articles).where(user_articles.c.article_id.in_(other_ids))).mappings().all():
+            keep = kept.get(row['user_id'])
+            if keep is None:
+                connection.execute(update(user_articles).where(user_articles.c.id == row['id']).values(article_id=keep_id))
+                kept[row['user_id']] = row
+                continue
+            connection.execute(update(user_articles).where(user_articles.c.id == keep['id']).values(
+                _merge_user_state(keep, row)
+            ))
+            connection.execute(delete(user_articles).where(user_articles.c.id == row['id']))
+        
+        connection.execute(update(highlights).where(highlights.c.article_id.in_(other_ids)).values(article_id=keep_id))
+        connection.execute(delete(articles).where(articles.c.id.in_(other_ids)))
+        removed += len(other_ids)
+    return removed
+
+def merge_duplicate_subscriptions(connection):
+    """Keep one feed per user and source (the oldest); the others only differed by URL spelling"""
+    feeds = _reflect(connection, 'feeds')
+    rows = connection.execute(select(feeds.c.id, feeds.c.user_id, feeds.c.source_id).order_by(feeds.c.id)).all()
+    seen = set()
+    duplicates = []
+    for feed_id, user_id, source_id in rows:
+        if (user_id, source_id) in seen:
+            duplicates.append(feed_id)
+        seen.add((user_id, source_id))
+    if duplicates:
+        connection.execute(delete(feeds).where(feeds.c.id.in_(duplicates)))
+    return len(duplicates)
+
+def _finish_articles_table(connection):
+    """Replace the feed_id key of articles with the source_id one"""
+    inspector = inspect(connection)
+    foreign_keys = [fk['name'] for fk in inspector.get_foreign_keys('articles')
+                    if fk['constrained_columns'] == ['feed_id'] and fk['name']]
+    uniques = [uc['name'] for uc in inspector.get_unique_constraints('articles')
+               if 'feed_id' in uc['column_names'] and uc['name']]
+    indexes = [ix['name'] for ix in inspector.get_indexes('articles')
+               if 'feed_id' in ix['column_names'] and ix['name'] and ix['name'] not in uniques]
+    
+    with _operations(connection).batch_alter_table('articles') as batch:
+        for name in foreign_keys:
+            batch.drop_constraint(name, type_='foreignkey')
+        for name in uniques:
+            batch.drop_constraint(name, type_='unique')
+        for name in indexes:
+            batch.drop_index(name)
+        batch.drop_column('feed_id')
+        batch.alter_column('source_id', existing_type=db.Integer(), nullable=False)
+        batch.create_unique_constraint('article_source_guid_unique', ['source_id', 'guid'])
+        batch.create_foreign_key('fk_articles_source_id', 'feed_sources', ['source_id'], ['id'])
+
+def _finish_feeds_table(connection):
+    """Make source_id required and unique per user, as in the model"""
+    with _operations(connection).batch_alter_table('feeds') as batch:
+        batch.alter_column('source_id', existing_type=db.Integer(), nullable=False)
+        batch.create_unique_constraint('feed_user_source_unique', ['user_id', 'source_id'])
+        batch.create_foreign_key('fk_feeds_source_id', 'feed_sources', ['source_id'], ['id'])
+
+def migrate_to_sources(connection, result):
+    """Move a database from per-feed articles to shared feed sources"""
+    feeds = _reflect(connection, 'feeds')
+    articles = _reflect(connection, 'articles')
+    
+    source_ids = _create_sources(connection, feeds)
+    result.sources = len(set(source_ids.values()))
+    
+    # Articles of every subscription to a URL now belong to its source
+    connection.execute(update(articles).values(source_id=select(feeds.c.source_id).where(
+        feeds.c.id == articles.c.feed_id
+    ).scalar_subquery()))
+    result.merged_articles = merge_duplicate_articles(connection)
+    result.merged_feeds = merge_duplicate_subscriptions(connection)
+    
+    _finish_articles_table(connection)
+    _finish_feeds_table(connection)
+
+def upgrade_schema():
+    """Bring an existing database up to the current models, in one transaction where the database allows it.
+    
+    Creates missing tables, columns and indexes, and moves databases from
+    before shared feed sources to the source layout without losing
+    subscriptions, read state, bookmarks or highlights. Safe to run again.
+    """
+    from app.models.feed import Feed
+    from app.models.feed_source import FeedSource
+    from app.utils.query_plans import create_missing_indexes
+    
+    result = UpgradeResult()
+    connection = db.session.connection()
+    existing = set(inspect(connection).get_table_names())
+    result.tables = [table.name for table in db.metadata.sorted_tables if table.name not in existing]
+    db.metadata.create_all(connection, tables=[db.metadata.tables[name] for name in result.tables])
+    result.columns = add_missing_columns(connection)
+    
+    if needs_source_migration(connection):
+        migrate_to_sources(connection, result)
+        db.session.flush()
+        for source in FeedSource.query:
+            source.total_articles = source.articles.count()
+        for feed in Feed.query:
+            feed.recount_stats()
+    
+    result.indexes = create_missing_indexes(connection)
+    db.session.commit()
+    return result
\ No newline at end of file
@@ -0,0 +1,73 @@
+import zlib
+from sqlalchemy.types import TypeDecorator, LargeBinary
+from sqlalchemy.dialects import mysql
+
+try:
+    import zstandard
+except ImportError:  # optional, zlib is used instead
+    zstandard = None
+
+# Compressed values start with a byte that never begins UTF-8 text, followed by the codec
+MAGIC = b'\xff'
+ZLIB = b'z'
+ZSTD = b's'
+
+def compress_text(text, threshold=1024):
+    """Encode text for storage, compressing it when it is at least `threshold` bytes"""
+    data = text.encode('utf-8')
+    if len(data) < threshold:
+        return data
+    if zstandard is not None:
+        packed = MAGIC + ZSTD + zstandard.ZstdCompressor(level=3).compress(data)
+    else:
+        packed = MAGIC + ZLIB + zlib.compress(data, 6)
+    return packed if len(packed) < len(data) else data
+
+def decompress_text(value):
+    """Decode a stored value, whether compressed, plain UTF-8 or legacy text"""
+    if isinstance(value, str):
+        return value
+    value = bytes(value)
+    if value[:1] != MAGIC:
+        return value.decode('utf-8')
+    
+    codec, payload = value[1:2], value[2:]
+    if codec == ZLIB:
+        return zlib.decompress(payload).decode('utf-8')
+    if codec == ZSTD:
+        if zstandard is None:
+            raise RuntimeError('zstandard is required to read zstd-compressed text')
+        return zstandard.ZstdDecompressor().decompress(payload).decode('utf-8')
+    raise ValueError(f'Unknown compression codec {codec!r}')
+
+def is_compressed(value):
+    """Whether a raw stored value is already compressed"""
+    return isinstance(value, (bytes, bytearray, memoryview)) and bytes(value[:1]) == MAGIC
+
+class CompressedText(TypeDecorator):
+    """Text column stored as a blob, zstd- or zlib-compressed above `threshold` bytes.
+    
+    Values are decompressed when rows are loaded, so the column should be
+    deferred where it is not always needed.
+    """
+    impl = LargeBinary
+    cache_ok = True
+    
+    def __init__(self, threshold=1024):
+        super().__init__()
+        self.threshold = threshold
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == 'mysql':
+            return dialect.type_descriptor(mysql.MEDIUMBLOB())
+        return dialect.type_descriptor(LargeBinary())
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return compress_text(value, self.threshold)
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return decompress_text(value)
\ No newline at end of file
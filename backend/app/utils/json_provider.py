@@ -0,0 +1,142 @@
+import dataclasses
+import decimal
+import json
+import logging
+import uuid
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used instead
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+class RawJSON:
+    """An already encoded JSON document that is written to the response as is.
+    
+    Build it with raw_json from columns written by json_list, which only
+    stores valid JSON: with orjson 3.10+ it is copied into the output
+    without being parsed again.
+    """
+    
+    __slots__ = ('text',)
+    
+    def __init__(self, text):
+        self.text = text
+    
+    def __repr__(self):
+        return f'RawJSON({self.text!r})'
+
+def json_list(values):
+    """Encode a list for a JSON text column; None when it is not a list or not strict JSON (e.g. NaN)"""
+    if not isinstance(values, list):
+        return None
+    try:
+        return json.dumps(values, allow_nan=False)
+    except (TypeError, ValueError):
+        return None
+
+def raw_json(text, empty='[]'):
+    """Wrap a JSON column for output, with `empty` standing in for NULL and empty values"""
+    return RawJSON(text or empty)
+
+def clear_malformed_json(batch_size=1000):
+    """Set JSON list columns written before json_list validated them to NULL where they do not parse.
+    
+    Returns {'table.column': rows cleared}.
+    """
+    from app import db
+    from app.models.article import Article
+    from app.models.feed import Feed
+    
+    cleared = {}
+    for model, column in ((Article, Article.tags), (Article, Article.media_urls), (Feed, Feed.tags)):
+        count = 0
+        last_id = 0
+        while True:
+            rows = db.session.query(model.id, column).filter(
+                model.id > last_id,
+                column.isnot(None)
+            ).order_by(model.id).limit(batch_size).all()
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            malformed = []
+            for row_id, text in rows:
+                try:
+                    json.loads(text)
+                except ValueError:
+                    malformed.append(row_id)
+            if malformed:
+                model.query.filter(model.id.in_(malformed)).update({column: None}, synchronize_session=False)
+                db.session.commit()
+                count += len(malformed)
+        cleared[f'{model.__tablename__}.{column.key}'] = count
+    return cleared
+
+def _default(o):
+    """Types the stdlib encoder does not know, encoded the way the API always has"""
+    if isinstance(o, RawJSON):
+        return json.loads(o.text)
+    if isinstance(o, date):
+        return o.isoformat()
+    if isinstance(o, (decimal.Decimal, uuid.UUID)):
+        return str(o)
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's provider, but with ISO 8601 datetimes and RawJSON support"""
+    
+    default = staticmethod(_default)
+    sort_keys = False
+
+class OrjsonProvider(StdlibJSONProvider):
+    """JSON provider backed by orjson.
+    
+    Datetimes, dates and UUIDs are encoded natively, RawJSON values are
+    spliced in as orjson fragments when the installed version has them.
+    Calls with arguments orjson does not support use the stdlib encoder.
+    """
+    
+    _NATIVE_ARGS = {'indent', 'sort_keys', 'separators', 'ensure_ascii', 'default'}
+    
+    def dumps(self, obj, **kwargs):
+        if not kwargs.keys() <= self._NATIVE_ARGS:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_NON_STR_KEYS
+        if kwargs.get('sort_keys', self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get('indent'):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=_orjson_default, option=option).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+def _orjson_default(o):
+    if isinstance(o, RawJSON):
+        if hasattr(orjson, 'Fragment'):
+            return orjson.Fragment(o.text)
+        return orjson.loads(o.text)
+    return _default(o)
+
+PROVIDERS = {
+    'orjson': OrjsonProvider,
+    'stdlib': StdlibJSONProvider
+}
+
+def init_app(app):
+    """Install the JSON_PROVIDER chosen in the config, falling back to stdlib without orjson"""
+    name = app.config['JSON_PROVIDER']
+    if name == 'orjson' and orjson is None:
+        logger.warning('orjson is not installed, using the stdlib JSON provider')
+        name = 'stdlib'
+    app.json = PROVIDERS[name](app)
\ No newline at end of file
@@ -0,0 +1,175 @@
+import hmac
+import threading
+import time
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+class Histogram:
+    """Cumulative Prometheus histogram keyed by a tuple of label values"""
+    
+    def __init__(self, name, documentation, labelnames, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, labels, value):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += value
+            series[2] += 1
+    
+    def collect(self):
+        """Lines in the Prometheus text exposition format"""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            series = sorted((labels, [list(counts), total, count]) for labels, (counts, total, count) in self._series.items())
+        for labels, (counts, total, count) in series:
+            label_text = ','.join(f'{key}="{_escape(value)}"' for key, value in zip(self.labelnames, labels))
+            prefix = label_text + ',' if label_text else ''
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{prefix}le="{_format(bound)}"}} {bucket_count}')
+            lines.append(f'{self.name}_bucket{{{prefix}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{label_text}}} {_format(total)}')
+            lines.append(f'{self.name}_count{{{label_text}}} {count}')
+        return lines
+    
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format(value):
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class RequestMetrics:
+    """Per-route request metrics collected from Flask request hooks and SQLAlchemy engine events.
+    
+    For every request it records the SQL statement count and time, the time
+    spent serializing JSON, the response size and the total duration, and
+    exposes them as Prometheus histograms. Values are per worker process.
+    In debug mode (or with METRICS_DEBUG_HEADERS) each response also carries
+    X-Query-Count and Server-Timing headers.
+    """
+    
+    LABELS = ('method', 'route', 'status')
+    
+    def __init__(self):
+        self.duration = Histogram('wiserss_http_request_duration_seconds',
+                                  'Time spent handling the request', self.LABELS, DURATION_BUCKETS)
+        self.queries = Histogram('wiserss_http_request_queries',
+                                 'SQL statements executed per request', self.LABELS, QUERY_BUCKETS)
+        self.sql_time = Histogram('wiserss_http_request_sql_seconds',
+                                  'Time spent executing SQL per request', self.LABELS, DURATION_BUCKETS)
+        self.serialization = Histogram('wiserss_http_response_serialization_seconds',
+                                       'Time spent encoding the JSON response', self.LABELS, DURATION_BUCKETS)
+        self.response_size = Histogram('wiserss_http_response_size_bytes',
+                                       'Response body size', self.LABELS, SIZE_BUCKETS)
+        self.histograms = (self.duration, self.queries, self.sql_time, self.serialization, self.response_size)
+        self.debug_headers = False
+        self._listening = False
+    
+    def init_app(self, app):
+        if not app.config['METRICS_ENABLED']:
+            return
+        self.debug_headers = app.debug or app.config['METRICS_DEBUG_HEADERS']
+        
+        if not self._listening:
+            # Listen on the Engine class so every engine of every app is covered
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+        
+        self._time_json(app)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+    
+    def _time_json(self, app):
+        """Wrap the app's JSON encoder to add its time to the current request"""
+        dumps = app.json.dumps
+        
+        def timed_dumps(obj, **kwargs):
+            started = time.perf_counter()
+            try:
+                return dumps(obj, **kwargs)
+            finally:
+                if has_request_context() and 'metrics_started' in g:
+                    g.metrics_json_time += time.perf_counter() - started
+        
+        app.json.dumps = timed_dumps
+    
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = 0
+        g.metrics_sql_time = 0.0
+        g.metrics_json_time = 0.0
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None and has_request_context():
+            context.metrics_started = time.perf_counter()
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'metrics_started', None)
+        if started is None or not has_request_context() or 'metrics_started' not in g:
+            return
+        g.metrics_queries += 1
+        g.metrics_sql_time += time.perf_counter() - started
+    
+    def _after_request(self, response):
+        if 'metrics_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.metrics_started
+        route = request.url_rule.rule if request.url_rule else '<unmatched>'
+        labels = (request.method, route, str(response.status_code))
+        
+        self.duration.observe(labels, elapsed)
+        self.queries.observe(labels, g.metrics_queries)
+        self.sql_time.observe(labels, g.metrics_sql_time)
+        self.serialization.observe(labels, g.metrics_json_time)
+        if not response.is_streamed:
+            self.response_size.observe(labels, response.calculate_content_length() or 0)
+        
+        if self.debug_headers:
+            response.headers['X-Query-Count'] = str(g.metrics_queries)
+            response.headers['Server-Timing'] = ', '.join([
+                f'db;desc="{g.metrics_queries} queries";dur={g.metrics_sql_time * 1000:.2f}',
+                f'json;dur={g.metrics_json_time * 1000:.2f}',
+                f'app;dur={elapsed * 1000:.2f}'
+            ])
+        return response
+    
+    @staticmethod
+    def authorized(request, token):
+        """Whether a scrape request carries the configured token (any request when none is set)"""
+        if not token:
+            return True
+        scheme, _, credentials = request.headers.get('Authorization', '').partition(' ')
+        return scheme.lower() == 'bearer' and hmac.compare_digest(credentials.strip().encode(), token.encode())
+    
+    def render(self):
+        """All metrics in the Prometheus text format"""
+        lines = []
+        for histogram in self.histograms:
+            lines.extend(histogram.collect())
+        return '\n'.join(lines) + '\n'
+    
+    def clear(self):
+        for histogram in self.histograms:
+            histogram.clear()
+
+request_metrics = RequestMetrics()
\ No newline at end of file
@@ -0,0 +1,84 @@
+import base64
+import json
+from datetime import datetime
+from sqlalchemy import and_, or_, desc
+from app.models.article import Article
+
+def encode_cursor(published_at, article_id):
+    """Encode an article's sort key as an opaque URL-safe cursor"""
+    key = [published_at.isoformat() if published_at else None, article_id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a cursor into (published_at, article_id). Raises ValueError if malformed."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        published_at, article_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        published_at = datetime.fromisoformat(published_at) if published_at else None
+        return published_at, int(article_id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError('Invalid cursor') from e
+
+def order_articles(query):
+    """Newest first, with the id as a tie-breaker so the order is total"""
+    return query.order_by(desc(Article.published_at), desc(Article.id))
+
+def apply_cursor(query, cursor):
+    """Restrict an ordered article query to rows after the cursor.
+    
+    NULL published_at values sort last in descending order on MySQL and
+    SQLite, so they come after every dated article.
+    """
+    published_at, article_id = decode_cursor(cursor)
+    if published_at is None:
+        return query.filter(Article.published_at.is_(None), Article.id < article_id)
+    return query.filter(or_(
+        Article.published_at < published_at,
+        and_(Article.published_at == published_at, Article.id < article_id),
+        Article.published_at.is_(None)
+    ))
+
+def paginate_articles(query, page, per_page, cursor=None, cursor_mode=False, order_by=None):
+    """Paginate (Article, ...) rows by page number or, in cursor mode, by keyset.
+    
+    Cursor mode skips the COUNT(*) and OFFSET scan, so every page costs the
+    same as the first one. Page mode sorts by `order_by` (e.g. search
+    relevance) when given, newest first otherwise; cursor mode is always
+    newest first and rejects `order_by` with ValueError rather than
+    silently ignoring it. Returns (rows, pagination dict).
+    """
+    if not cursor_mode:
+        if order_by is not None:
+            query = query.order_by(order_by, desc(Article.id))
+        else:
+            query = order_articles(query)
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return pagination.items, {
+            'page': pagination.page,
+            'pages': pagination.pages,
+            'per_page': pagination.per_page,
+            'total': pagination.total,
+            'has_prev': pagination.has_prev,
+            'has_next': pagination.has_next
+        }
+    
+    if order_by is not None:
+        raise ValueError('Cursor pagination only supports the date order')
+    query = order_articles(query)
+    if cursor:
+        query = apply_cursor(query, cursor)
+    
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    
+    next_cursor = None
+    if has_next:
+        last = rows[-1][0]
+        next_cursor = encode_cursor(last.published_at, last.id)
+    
+    return rows, {
+        'per_page': per_page,
+        'has_next': has_next,
+        'next_cursor': next_cursor
+    }
\ No newline at end of file
@@ -0,0 +1,102 @@
+import re
+from sqlalchemy import inspect, desc, or_, func, case
+from app import db
+from app.utils.sql import get_dialect_name
+
+# SQLite reports a full scan as "SCAN <table>", with or without a covering index
+_SQLITE_SCAN_RE = re.compile(r'^SCAN (\w+)')
+
+def create_missing_indexes(bind=None):
+    """Create the model indexes an existing database does not have yet. Returns their names.
+    
+    init-db and upgrade-db call it, pass `bind` to run it on a connection inside their transaction.
+    """
+    bind = bind if bind is not None else db.engine
+    inspector = inspect(bind)
+    existing_tables = set(inspector.get_table_names())
+    created = []
+    for table in db.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                index.create(bind)
+                created.append(index.name)
+    return created
+
+def hot_queries(user_id=1, article_id=1, source_id=1):
+    """The queries behind the busiest endpoints, built the way the views build them"""
+    from app.models.article import Article
+    from app.models.feed import Feed
+    from app.models.highlight import Highlight
+    from app.models.user_article import UserArticle
+    from app.utils.pagination import order_articles
+    
+    with_state = Article.query_with_user_state(user_id)
+    return {
+        'articles: later': order_articles(with_state.filter(or_(
+            UserArticle.reading_status == 'later',
+            UserArticle.reading_status.is_(None)
+        ))).limit(20),
+        'articles: archive': order_articles(with_state.filter(UserArticle.reading_status == 'archive')).limit(20),
+        'articles: unread': order_articles(with_state.filter(or_(
+            UserArticle.is_read == False,
+            UserArticle.is_read.is_(None)
+        ))).limit(20),
+        'articles: bookmarked': order_articles(with_state.filter(UserArticle.is_bookmarked == True)).limit(20),
+        'articles: by feed': order_articles(with_state.filter(Feed.id == 1)).limit(20),
+        'articles: by category': order_articles(with_state.filter(Feed.category == 'Tech')).limit(20),
+        'article: by id': with_state.filter(Article.id == article_id),
+        'feeds: list': Feed.query.filter_by(user_id=user_id).order_by(desc(Feed.updated_at)).limit(20),
+        'feeds: stats': db.session.query(
+            func.count(Feed.id),
+            func.sum(case((Feed.is_active == True, 1), else_=0)),
+            func.sum(Feed.unread_count)
+        ).filter(Feed.user_id == user_id),
+        'feeds: categories': db.session.query(Feed.category, func.count(Feed.id)).filter(
+            Feed.user_id == user_id,
+            Feed.category.isnot(None)
+        ).group_by(Feed.category),
+        'highlights: for article': Highlight.for_article(user_id, article_id),
+        'retention: user state by article': UserArticle.query.filter(UserArticle.article_id == article_id),
+        'retention: highlights by article': Highlight.query.filter(Highlight.article_id == article_id),
+        'ingestion: existing keys': db.session.query(Article.guid, Article.content_hash).filter(
+            Article.source_id == source_id,
+            or_(Article.guid.in_(['a', 'b']), Article.content_hash.in_(['c', 'd']))
+        ),
+    }
+
+def explain(query):
+    """EXPLAIN a query on the current connection. Returns a list of row dicts."""
+    name = get_dialect_name()
+    statement = query.statement.compile(
+        dialect=db.engine.dialect,
+        compile_kwargs={'literal_binds': True, 'render_postcompile': True}
+    )
+    prefix = 'EXPLAIN QUERY PLAN ' if name == 'sqlite' else 'EXPLAIN '
+    result = db.session.execute(db.text(prefix + str(statement)))
+    return [dict(row._mapping) for row in result]
+
+def full_scans(plan):
+    """Tables a plan reads in full"""
+    name = get_dialect_name()
+    tables = set(db.metadata.tables)
+    scans = []
+    for row in plan:
+        if name == 'sqlite':
+            match = _SQLITE_SCAN_RE.match(str(row.get('detail', '')))
+            if match and match.group(1) in tables:
+                scans.append(match.group(1))
+        elif row.get('table') in tables and row.get('type') in ('ALL', 'index'):
+            # MySQL: ALL is a table scan, index a scan of an entire index
+            scans.append(row['table'])
+    return scans
+
+def check_query_plans():
+    """EXPLAIN every hot query. Returns [(name, plan, full-scanned tables)]."""
+    results = []
+    for name, query in hot_queries().items():
+        plan = explain(query)
+        results.append((name, plan, full_scans(plan)))
+    return results
\ No newline at end of file
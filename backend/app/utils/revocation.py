@@ -0,0 +1,85 @@
+import logging
+import threading
+import time
+from app.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+REDIS_KEY_PREFIX = 'wiserss:revoked:'
+REDIS_CHANNEL = 'wiserss:revoked'
+
+class RevocationStore:
+    """Denylist of revoked JWT ids, checked in memory on every request.
+    
+    Each jti is kept until the token it belongs to expires, after which the
+    token would be rejected anyway. With JWT_REVOCATION_REDIS enabled,
+    revocations are also written to Redis and broadcast over pub/sub so
+    every worker process sees them. Lookups still only read local memory.
+    """
+    
+    def __init__(self):
+        self._revoked = TTLCache(maxsize=None)  # never evict a token that is still valid
+        self._redis = None
+        self._last_purge = time.monotonic()
+    
+    def init_app(self, app):
+        if not app.config['JWT_REVOCATION_REDIS']:
+            return
+        try:
+            import redis
+        except ImportError:
+            logger.warning('JWT_REVOCATION_REDIS is set but the redis package is not installed; '
+                           'revoked tokens are only tracked per process')
+            return
+        
+        self._redis = redis.Redis.from_url(app.config['REDIS_URL'])
+        threading.Thread(target=self._listen, name='jwt-revocations', daemon=True).start()
+    
+    def is_revoked(self, jti):
+        return self._revoked.get(jti) is not None
+    
+    def revoke(self, jti, expires_at):
+        """Revoke a token id until `expires_at` (a Unix timestamp)"""
+        ttl = max(int(expires_at - time.time()), 1)
+        self._add(jti, ttl)
+        if self._redis is not None:
+            pipe = self._redis.pipeline()
+            pipe.setex(REDIS_KEY_PREFIX + jti, ttl, 1)
+            pipe.publish(REDIS_CHANNEL, f'{jti} {ttl}')
+            pipe.execute()
+    
+    def _add(self, jti, ttl):
+        self._revoked.set(jti, True, ttl)
+        # Drop the entries of tokens that have expired since, at most once a minute
+        if time.monotonic() - self._last_purge > 60:
+            self._last_purge = time.monotonic()
+            self._revoked.purge()
+    
+    def _load_from_redis(self):
+        """Copy revocations made before this process started"""
+        keys = list(self._redis.scan_iter(match=REDIS_KEY_PREFIX + '*', count=1000))
+        if not keys:
+            return
+        pipe = self._redis.pipeline()
+        for key in keys:
+            pipe.ttl(key)
+        for key, ttl in zip(keys, pipe.execute()):
+            if ttl and ttl > 0:
+                self._add(key.decode('utf-8')[len(REDIS_KEY_PREFIX):], ttl)
+    
+    def _listen(self):
+        """Apply revocations published by other processes"""
+        while True:
+            try:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(REDIS_CHANNEL)
+                # Catch up on anything revoked while we were not subscribed
+                self._load_from_redis()
+                for message in pubsub.listen():
+                    jti, ttl = message['data'].decode('utf-8').split(' ')
+                    self._add(jti, int(ttl))
+            except Exception as e:
+                logger.warning('Token revocation listener error: %s', e)
+                time.sleep(5)
+
+revocation_store = RevocationStore()
\ No newline at end of file
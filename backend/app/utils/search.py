@@ -0,0 +1,197 @@
+import logging
+import re
+from sqlalchemy import DDL, event, table, column, literal, literal_column, func, select, delete, or_, false, type_coerce, cast
+from sqlalchemy.types import String, Text, LargeBinary
+from sqlalchemy.dialects import mysql
+from app import db
+from app.utils.sql import get_dialect_name
+
+logger = logging.getLogger(__name__)
+
+# The searchable text lives outside the articles table, keyed by article id, so
+# article bodies can be stored compressed and list scans never touch the index
+
+# SQLite: an FTS5 table whose rowid is the article id
+FTS_TABLE = 'articles_fts'
+fts_table = table(FTS_TABLE, column('rowid'), column('title'), column('body'))
+
+FTS_CREATE_SQL = f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(title, body, tokenize="unicode61")'
+
+# MySQL: a table with a FULLTEXT index split into n-grams, so CJK text is searchable
+MYSQL_SEARCH_TABLE = 'articles_search'
+mysql_search_table = table(MYSQL_SEARCH_TABLE, column('article_id'), column('title'), column('body'))
+
+MYSQL_SEARCH_CREATE_SQL = (
+    f'CREATE TABLE IF NOT EXISTS {MYSQL_SEARCH_TABLE} ('
+    'article_id INTEGER NOT NULL PRIMARY KEY, '
+    'title VARCHAR(500) NOT NULL, '
+    'body MEDIUMTEXT, '
+    'FULLTEXT INDEX ft_articles_search (title, body) WITH PARSER ngram, '
+    'FOREIGN KEY (article_id) REFERENCES articles (id) ON DELETE CASCADE'
+    ') ENGINE=InnoDB DEFAULT CHARSET=utf8mb4'
+)
+
+# Hiragana/katakana, CJK ideographs and Hangul have no spaces between words
+_CJK_RE = re.compile(r'([぀-ヿ㐀-䶿一-鿿豈-﫿가-힯])')
+_TAG_RE = re.compile(r'<[^>]+>')
+_SPACE_RE = re.compile(r'\s+')
+_LIKE_SPECIAL_RE = re.compile(r'[%_\\]')
+
+def strip_tags(text):
+    """Plain text of an HTML fragment, with whitespace collapsed"""
+    if not text:
+        return ''
+    return _SPACE_RE.sub(' ', _TAG_RE.sub(' ', text)).strip()
+
+def segment(text):
+    """Split CJK characters into separate tokens for the FTS5 unicode61 tokenizer"""
+    if not text:
+        return ''
+    return _CJK_RE.sub(r' \1 ', strip_tags(text))
+
+def build_match_query(q):
+    """Turn user input into an FTS5 query: every term must match, CJK runs as phrases"""
+    phrases = []
+    for term in q.split():
+        tokens = segment(term.replace('"', ' ')).split()
+        if tokens:
+            phrases.append('"' + ' '.join(tokens) + '"')
+    return ' '.join(phrases)
+
+def register_search_index(articles_table):
+    """Create the dialect's full-text index whenever the articles table is created"""
+    event.listen(articles_table, 'after_create', DDL(FTS_CREATE_SQL).execute_if(dialect='sqlite'))
+    event.listen(articles_table, 'after_create', DDL(MYSQL_SEARCH_CREATE_SQL).execute_if(dialect='mysql'))
+    event.listen(articles_table, 'before_drop', DDL(f'DROP TABLE IF EXISTS {MYSQL_SEARCH_TABLE}').execute_if(dialect='mysql'))
+    event.listen(articles_table, 'after_drop', DDL(f'DROP TABLE IF EXISTS {FTS_TABLE}').execute_if(dialect='sqlite'))
+
+def index_articles(article_query, batch_size=1000):
+    """Add (or refresh) the articles selected by a query in the search index"""
+    name = get_dialect_name()
+    if name not in ('sqlite', 'mysql'):
+        return
+    from app.models.article import Article
+    from app.models.article_body import ArticleBody
+    
+    # Shared bodies, falling back to content not yet moved to the body store
+    content = func.coalesce(ArticleBody.content, Article.content)
+    rows = article_query.outerjoin(ArticleBody, ArticleBody.hash == Article.body_hash).with_entities(
+        Article.id, Article.title, Article.summary, content.label('content'), Article.author
+    ).order_by(None).yield_per(batch_size)
+    
+    batch = []
+    for row in rows:
+        body = ' '.join(filter(None, (row.author, row.summary, row.content)))
+        if name == 'sqlite':
+            batch.append({'rowid': row.id, 'title': segment(row.title), 'body': segment(body)})
+        else:
+            batch.append({'article_id': row.id, 'title': row.title, 'body': strip_tags(body)})
+        if len(batch) >= batch_size:
+            _write_index_rows(name, batch)
+            batch = []
+    if batch:
+        _write_index_rows(name, batch)
+
+def _write_index_rows(name, rows):
+    if name == 'sqlite':
+        db.session.execute(fts_table.insert().prefix_with('OR REPLACE'), rows)
+    else:
+        stmt = mysql.insert(mysql_search_table)
+        stmt = stmt.on_duplicate_key_update(title=stmt.inserted.title, body=stmt.inserted.body)
+        db.session.execute(stmt, rows)
+
+def unindex_articles(article_ids):
+    """Remove articles (ids or a select of ids) from the search index before deleting them"""
+    name = get_dialect_name()
+    if name == 'sqlite':
+        db.session.execute(delete(fts_table).where(fts_table.c.rowid.in_(article_ids)))
+    elif name == 'mysql':
+        db.session.execute(delete(mysql_search_table).where(mysql_search_table.c.article_id.in_(article_ids)))
+
+def search(query, q):
+    """Filter an Article query by a full-text search for `q`.
+    
+    Returns the filtered query and the ORDER BY clause that ranks the
+    matches by relevance. SQLite ranks with FTS5's bm25() and MySQL with
+    its natural language relevance; other databases fall back to LIKE
+    matching (see like_search) and have no relevance order (None).
+    """
+    from app.models.article import Article
+    name = get_dialect_name()
+    
+    if name == 'sqlite':
+        match_query = build_match_query(q)
+        if not match_query:
+            return query.filter(false()), None
+        # Title matches weigh ten times as much as body matches
+        rank = func.bm25(literal_column(FTS_TABLE), 10.0, 1.0)
+        matches = select(fts_table.c.rowid.label('article_id'), rank.label('rank')).where(
+            literal_column(FTS_TABLE).op('MATCH')(match_query)
+        ).subquery()
+        query = query.join(matches, matches.c.article_id == Article.id)
+        return query, matches.c.rank.asc()
+    
+    if name == 'mysql':
+        relevance = mysql.match(
+            mysql_search_table.c.title, mysql_search_table.c.body, against=q
+        ).in_natural_language_mode()
+        query = query.join(mysql_search_table, mysql_search_table.c.article_id == Article.id)
+        return query.filter(relevance > 0), relevance.desc()
+    
+    return like_search(query, q), None
+
+def like_search(query, q):
+    """Filter an Article query with LIKE on the title, author and summary.
+    
+    Summaries are stored as blobs, so they are matched byte for byte
+    (case-sensitively), and ones long enough to be stored compressed
+    are only found through their title or author.
+    """
+    from app.models.article import Article
+    pattern = '%' + _LIKE_SPECIAL_RE.sub(lambda match: '\\' + match.group(), q) + '%'
+    if get_dialect_name() == 'postgresql':
+        # bytea has its own LIKE; casting it to text would give the hex form
+        summary_matches = type_coerce(Article.summary, String).like(
+            literal(pattern.encode('utf-8'), LargeBinary), escape='\\'
+        )
+    else:
+        summary_matches = cast(type_coerce(Article.summary, LargeBinary), Text).like(pattern, escape='\\')
+    return query.filter(or_(
+        Article.title.contains(q),
+        Article.author.contains(q),
+        summary_matches
+    ))
+
+def drop_legacy_fulltext_index():
+    """Drop the FULLTEXT index older versions put on the articles table itself (MySQL)"""
+    from app.models.article import Article
+    exists = db.session.execute(db.text(
+        'SELECT COUNT(*) FROM information_schema.statistics '
+        'WHERE table_schema = DATABASE() AND table_name = :table AND index_name = :index'
+    ), {'table': Article.__tablename__, 'index': 'ft_articles_search'}).scalar()
+    if exists:
+        db.session.execute(db.text(f'ALTER TABLE {Article.__tablename__} DROP INDEX ft_articles_search'))
+
+def rebuild_index():
+    """Create the search index if it is missing and (re)index every article.
+    
+    Returns False for databases without full-text support, which search
+    with LIKE and need no index.
+    """
+    from app.models.article import Article
+    name = get_dialect_name()
+    
+    if name == 'sqlite':
+        db.session.execute(db.text(FTS_CREATE_SQL))
+        db.session.execute(delete(fts_table))
+    elif name == 'mysql':
+        drop_legacy_fulltext_index()
+        db.session.execute(db.text(MYSQL_SEARCH_CREATE_SQL))
+        db.session.execute(delete(mysql_search_table))
+    else:
+        logger.info('Full-text search is not supported for %s, searching with LIKE instead', name)
+        return False
+    
+    index_articles(Article.query)
+    db.session.commit()
+    return True
\ No newline at end of file
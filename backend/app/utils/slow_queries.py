@@ -0,0 +1,206 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from flask import request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/|--[^\n]*', re.S)
+_STRING_RE = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PARAM_RE = re.compile(r'%\([^)]+\)s|%s|:\w+|\?')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_ROWS_RE = re.compile(r'(\(\?\))(?:\s*,\s*\(\?\))+')
+_SPACE_RE = re.compile(r'\s+')
+
+def fingerprint(statement):
+    """Normalize a SQL statement so that executions differing only in values share a key.
+    
+    Literals and bound parameters become ?, IN lists and multi-row VALUES
+    collapse to a single element, and comments and whitespace are dropped.
+    """
+    sql = _COMMENT_RE.sub(' ', statement)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PARAM_RE.sub('?', sql)
+    sql = _LIST_RE.sub('(?)', sql)
+    sql = _ROWS_RE.sub(r'\1', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+def fingerprint_id(normalized):
+    """Short stable id of a fingerprint"""
+    return hashlib.sha1(normalized.encode('utf-8')).hexdigest()[:12]
+
+class StatementStats:
+    """Rolling statistics of one fingerprint in this process"""
+    
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=200)
+        self.explained_at = None
+    
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        self.recent.append(duration)
+    
+    def to_dict(self):
+        recent = sorted(self.recent)
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3),
+            'p95_ms': round(recent[int(len(recent) * 0.95) if len(recent) > 1 else 0] * 1000, 3),
+            'max_ms': round(self.max * 1000, 3)
+        }
+
+class SlowQueryLog:
+    """Fingerprints every SQL statement and logs the slow ones with their EXPLAIN plan.
+    
+    Rolling stats are kept in memory for up to SLOW_QUERY_MAX_FINGERPRINTS
+    statements per process. Executions slower than SLOW_QUERY_THRESHOLD_MS
+    are appended to the SLOW_QUERY_LOG file as JSON lines, together with
+    the statement's stats and, for SELECTs, a plan captured at most once
+    per SLOW_QUERY_EXPLAIN_INTERVAL seconds per fingerprint.
+    `python run.py slow-queries` aggregates that file.
+    """
+    
+    def __init__(self):
+        self.threshold = 0
+        self.path = None
+        self.explain = True
+        self.explain_interval = 3600
+        self.max_fingerprints = 1000
+        self._stats = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+    
+    def init_app(self, app):
+        config = app.config
+        self.threshold = config['SLOW_QUERY_THRESHOLD_MS'] / 1000
+        if self.threshold <= 0:
+            return
+        self.path = config['SLOW_QUERY_LOG']
+        self.explain = config['SLOW_QUERY_EXPLAIN']
+        self.explain_interval = config['SLOW_QUERY_EXPLAIN_INTERVAL']
+        self.max_fingerprints = config['SLOW_QUERY_MAX_FINGERPRINTS']
+        
+        if not self._listening:
+            event.listen(Engine, 'before_cursor_execute', self._before_cursor_execute)
+            event.listen(Engine, 'after_cursor_execute', self._after_cursor_execute)
+            self._listening = True
+    
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.slow_query_started = time.perf_counter()
+    
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'slow_query_started', None)
+        if started is None or self.threshold <= 0:
+            return
+        duration = time.perf_counter() - started
+        normalized = fingerprint(statement)
+        
+        with self._lock:
+            stats = self._stats.get(normalized)
+            if stats is None:
+                stats = self._stats[normalized] = StatementStats()
+                while len(self._stats) > self.max_fingerprints:
+                    self._stats.popitem(last=False)
+            else:
+                self._stats.move_to_end(normalized)
+            stats.add(duration)
+            if duration < self.threshold:
+                return
+            # A streamed result (yield_per) is still pending on the connection's unbuffered
+            # cursor; another statement on that connection would discard it
+            explain = (self.explain and not executemany and statement.lstrip()[:6].upper() == 'SELECT'
+                       and not context.execution_options.get('stream_results')
+                       and (stats.explained_at is None or time.monotonic() - stats.explained_at > self.explain_interval))
+            if explain:
+                stats.explained_at = time.monotonic()
+            summary = stats.to_dict()
+        
+        try:
+            self._write({
+                'time': datetime.utcnow().isoformat(),
+                'fingerprint_id': fingerprint_id(normalized),
+                'fingerprint': normalized,
+                'duration_ms': round(duration * 1000, 3),
+                'route': f'{request.method} {request.url_rule.rule}' if has_request_context() and request.url_rule else None,
+                'statement': statement,
+                'stats': summary,
+                'plan': self._explain(conn, statement, parameters) if explain else None
+            })
+        except Exception as e:
+            logger.warning('Could not record slow query: %s', e)
+    
+    @staticmethod
+    def _explain(conn, statement, parameters):
+        """Plan of a statement, run on a separate cursor of the same connection"""
+        prefix = 'EXPLAIN QUERY PLAN ' if conn.dialect.name == 'sqlite' else 'EXPLAIN '
+        cursor = conn.connection.cursor()
+        try:
+            cursor.execute(prefix + statement, parameters)
+            columns = [column[0] for column in cursor.description or ()]
+            return [dict(zip(columns, [str(value) for value in row])) for row in cursor.fetchall()]
+        except Exception as e:
+            return [{'error': str(e)}]
+        finally:
+            cursor.close()
+    
+    def _write(self, entry):
+        line = json.dumps(entry, ensure_ascii=False, default=str) + '\n'
+        directory = os.path.dirname(self.path)
+        with self._lock:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line)
+    
+    def stats(self):
+        """In-memory stats of this process, {fingerprint: stats dict}"""
+        with self._lock:
+            return {normalized: stats.to_dict() for normalized, stats in self._stats.items()}
+
+def summarize(path, since=None):
+    """Aggregate a slow query log by fingerprint, for the slow-queries command"""
+    summary = {}
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if since and entry['time'] < since:
+                continue
+            item = summary.setdefault(entry['fingerprint_id'], {
+                'fingerprint_id': entry['fingerprint_id'],
+                'fingerprint': entry['fingerprint'],
+                'slow_count': 0,
+                'slow_total_ms': 0.0,
+                'slow_max_ms': 0.0,
+                'routes': set(),
+                'stats': None,
+                'plan': None
+            })
+            item['slow_count'] += 1
+            item['slow_total_ms'] += entry['duration_ms']
+            item['slow_max_ms'] = max(item['slow_max_ms'], entry['duration_ms'])
+            if entry.get('route'):
+                item['routes'].add(entry['route'])
+            item['stats'] = entry.get('stats') or item['stats']
+            item['plan'] = entry.get('plan') or item['plan']
+    return list(summary.values())
+
+slow_query_log = SlowQueryLog()
\ No newline at end of file
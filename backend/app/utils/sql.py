@@ -0,0 +1,51 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from app import db
+
+_DIALECT_INSERTS = {
+    'mysql': mysql.insert,
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert
+}
+
+def get_dialect_name():
+    """Name of the dialect the session is bound to"""
+    return db.session.get_bind().dialect.name
+
+def dialect_insert(table):
+    """INSERT construct for the current dialect, with its upsert extensions"""
+    return _DIALECT_INSERTS.get(get_dialect_name(), insert)(table)
+
+def insert_ignore(table):
+    """INSERT that silently skips rows violating a unique constraint"""
+    stmt = dialect_insert(table)
+    name = get_dialect_name()
+    if name == 'mysql':
+        # A no-op update, unlike INSERT IGNORE, does not also swallow data errors
+        pk = list(table.primary_key.columns)[0]
+        return stmt.on_duplicate_key_update({pk.name: pk})
+    if name in ('sqlite', 'postgresql'):
+        return stmt.on_conflict_do_nothing()
+    raise NotImplementedError(f'insert_ignore is not supported for {name}')
+
+def upsert(table, index_elements, update_columns, increment_columns=(), where=None):
+    """INSERT that overwrites `update_columns` with the new values when the unique key already exists.
+    
+    `increment_columns` are added to the existing value instead of replacing it.
+    With `where`, an existing row is only updated when it matches the condition
+    (not available on MySQL, whose ON DUPLICATE KEY UPDATE takes no condition).
+    """
+    stmt = dialect_insert(table)
+    name = get_dialect_name()
+    if name == 'mysql':
+        if where is not None:
+            raise NotImplementedError('conditional upserts are not supported for mysql')
+        return stmt.on_duplicate_key_update(
+            [(column, stmt.inserted[column]) for column in update_columns] +
+            [(column, table.c[column] + stmt.inserted[column]) for column in increment_columns]
+        )
+    if name in ('sqlite', 'postgresql'):
+        set_ = {column: stmt.excluded[column] for column in update_columns}
+        set_.update({column: table.c[column] + stmt.excluded[column] for column in increment_columns})
+        return stmt.on_conflict_do_update(index_elements=index_elements, set_=set_, where=where)
+    raise NotImplementedError(f'upsert is not supported for {name}')
\ No newline at end of file
@@ -1,13 +1,41 @@
+from datetime import datetime
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.feed import Feed
-from app.models.article import Article
+from app.models.article import Article, ARTICLE_FIELDS, USER_FIELDS, SUMMARY_FIELDS, DEFERRABLE_FIELDS
 from app.models.user_article import UserArticle
+from app.models.highlight import Highlight
+from app.services.progress import progress_buffer
+from app.utils.pagination import decode_cursor, paginate_articles
+from app.utils.search import search
 from sqlalchemy import or_, desc, func, and_
+from sqlalchemy.orm import defer, undefer
 
 articles_bp = Blueprint('articles', __name__)
 
+def get_requested_fields():
+    """Article fields asked for with ?fields= or ?view=summary, or None for all of them"""
+    fields = request.args.get('fields', '').strip()
+    if fields:
+        fields = {field.strip() for field in fields.split(',') if field.strip()}
+        unknown = fields - set(ARTICLE_FIELDS + USER_FIELDS)
+        if unknown:
+            raise ValueError(f'Unknown fields: {sorted(unknown)}')
+        return fields
+    if request.args.get('view') == 'summary':
+        return SUMMARY_FIELDS
+    return None
+
+def defer_unrequested(query, fields):
+    """Keep the large article columns that no requested field needs out of the SELECT"""
+    if fields is None:
+        return query.options(undefer(Article.content))
+    if 'content' in fields:
+        query = query.options(undefer(Article.content))
+    deferred = [defer(getattr(Article, key)) for key in DEFERRABLE_FIELDS if key not in fields]
+    return query.options(*deferred) if deferred else query
+
 @articles_bp.route('', methods=['GET'])
 @jwt_required()
 def get_articles():
@@ -24,14 +52,24 @@ def get_articles():
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 20)), 100)
         
-        # Build base query - get articles from user's feeds
-        query = db.session.query(Article).join(Feed).filter(Feed.user_id == user_id)
-        
-        # Left join with UserArticle to get user-specific data
-        query = query.outerjoin(UserArticle, and_(
-            UserArticle.article_id == Article.id,
-            UserArticle.user_id == user_id
-        ))
+        # Field projection: ?fields=title,summary or ?view=summary leaves out the content
+        try:
+            fields = get_requested_fields()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Opt-in keyset pagination: pagination=cursor, or any request carrying a cursor
+        cursor = request.args.get('cursor', '').strip()
+        cursor_mode = bool(cursor) or request.args.get('pagination') == 'cursor'
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Build base query - articles from user's feeds, with the feed and
+        # user-specific data loaded in the same statement
+        query = Article.query_with_user_state(user_id)
         
         # Apply status filter based on reading_status
         if status == 'later':
@@ -59,32 +97,24 @@ def get_articles():
         
         # Apply feed filter
         if feed_id:
-            query = query.filter(Article.feed_id == int(feed_id))
+            query = query.filter(Feed.id == int(feed_id))
         
         # Apply category filter
         if category:
             query = query.filter(Feed.category == category)
         
-        # Order by published date (newest first)
-        query = query.order_by(desc(Article.published_at))
-        
-        # Paginate
-        articles = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Order by published date (newest first) and paginate
+        query = defer_unrequested(query, fields)
+        rows, pagination = paginate_articles(query, page, per_page, cursor, cursor_mode)
+        if fields is None or 'content' in fields:
+            Article.prefetch_bodies(article for article, _, _ in rows)
         
         return jsonify({
-            'articles': [article.to_dict(user_id=user_id) for article in articles.items],
-            'pagination': {
-                'page': articles.page,
-                'pages': articles.pages,
-                'per_page': articles.per_page,
-                'total': articles.total,
-                'has_prev': articles.has_prev,
-                'has_next': articles.has_next
-            }
+            'articles': [
+                article.to_dict(user_id=user_id, feed=feed, user_article=user_article, fields=fields)
+                for article, feed, user_article in rows
+            ],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -98,15 +128,15 @@ def get_article(article_id):
         user_id = int(get_jwt_identity())
         
         # Verify user has access to this article through their feeds
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        row = Article.query_with_user_state(user_id).options(
+            undefer(Article.content)
+        ).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
         
-        return jsonify({'article': article.to_dict(user_id=user_id)}), 200
+        article, feed, user_article = row
+        return jsonify({'article': article.to_dict(user_id=user_id, feed=feed, user_article=user_article)}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -118,22 +148,24 @@ def mark_as_read(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        user_article.mark_as_read()
+        user_article = UserArticle.apply_state(user_id, article, {
+            'is_read': True,
+            'reading_status': 'read',
+            'read_at': datetime.utcnow()
+        }, current=user_article)
+        result = article.to_dict(user_id=user_id, feed=feed, user_article=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': 'Article marked as read',
-            'article': article.to_dict(user_id=user_id)
+            'article': result
         }), 200
         
     except Exception as e:
@@ -147,22 +179,24 @@ def mark_as_unread(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        user_article.mark_as_unread()
+        user_article = UserArticle.apply_state(user_id, article, {
+            'is_read': False,
+            'reading_status': 'unread',
+            'read_at': None
+        }, current=user_article)
+        result = article.to_dict(user_id=user_id, feed=feed, user_article=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': 'Article marked as unread',
-            'article': article.to_dict(user_id=user_id)
+            'article': result
         }), 200
         
     except Exception as e:
@@ -176,23 +210,25 @@ def toggle_bookmark(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        is_bookmarked = user_article.toggle_bookmark()
+        is_bookmarked = not (user_article and user_article.is_bookmarked)
+        user_article = UserArticle.apply_state(user_id, article, {
+            'is_bookmarked': is_bookmarked,
+            'bookmarked_at': datetime.utcnow() if is_bookmarked else None
+        }, current=user_article)
+        result = article.to_dict(user_id=user_id, feed=feed, user_article=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': f'Article {"bookmarked" if is_bookmarked else "unbookmarked"}',
             'is_bookmarked': is_bookmarked,
-            'article': article.to_dict(user_id=user_id)
+            'article': result
         }), 200
         
     except Exception as e:
@@ -206,14 +242,12 @@ def update_reading_status(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
         data = request.get_json()
         if not data or 'status' not in data:
@@ -225,13 +259,19 @@ def update_reading_status(article_id):
         if status not in valid_statuses:
             return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        user_article.set_reading_status(status)
+        values = {'reading_status': status}
+        if status == 'read' and not (user_article and user_article.is_read):
+            values.update({'is_read': True, 'read_at': datetime.utcnow()})
+        elif status == 'unread':
+            values.update({'is_read': False, 'read_at': None})
+        
+        user_article = UserArticle.apply_state(user_id, article, values, current=user_article)
+        result = article.to_dict(user_id=user_id, feed=feed, user_article=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': f'Article status updated to {status}',
-            'article': article.to_dict(user_id=user_id)
+            'article': result
         }), 200
         
     except Exception as e:
@@ -245,14 +285,12 @@ def rate_article(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
         data = request.get_json()
         if not data or 'rating' not in data:
@@ -262,13 +300,73 @@ def rate_article(article_id):
         if not isinstance(rating, int) or rating < 1 or rating > 5:
             return jsonify({'error': 'Rating must be an integer between 1 and 5'}), 400
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        user_article.set_rating(rating)
+        user_article = UserArticle.apply_state(user_id, article, {'rating': rating}, current=user_article)
+        result = article.to_dict(user_id=user_id, feed=feed, user_article=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': f'Article rated {rating} stars',
-            'article': article.to_dict(user_id=user_id)
+            'article': result
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@articles_bp.route('/<int:article_id>/progress', methods=['PUT'])
+@jwt_required()
+def update_reading_progress(article_id):
+    """Report reading progress; buffered and written in batches"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
+        
+        if not row:
+            return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
+        
+        data = request.get_json()
+        if not data or 'position' not in data:
+            return jsonify({'error': 'Position is required'}), 400
+        
+        position = data['position']
+        time_spent = data.get('time_spent', 0)
+        if not isinstance(position, (int, float)) or not isinstance(time_spent, int) or time_spent < 0:
+            return jsonify({'error': 'Position must be a number and time_spent a non-negative integer'}), 400
+        position = max(0.0, min(1.0, float(position)))  # Clamp between 0 and 1
+        
+        is_read = bool(user_article and user_article.is_read)
+        
+        # Auto-mark as read if fully read, writing the progress right away
+        if position >= 0.95 and not is_read:
+            pending = progress_buffer.pop(user_id, article_id)
+            UserArticle.add_progress([{
+                'user_id': user_id,
+                'article_id': article_id,
+                'reading_position': position,
+                'reading_time': time_spent + (pending['reading_time'] if pending else 0)
+            }])
+            UserArticle.apply_state(user_id, article, {
+                'is_read': True,
+                'reading_status': 'read',
+                'read_at': datetime.utcnow()
+            }, current=user_article)
+            db.session.commit()
+            
+            return jsonify({
+                'message': 'Article marked as read',
+                'reading_position': position,
+                'is_read': True
+            }), 200
+        
+        progress_buffer.record(user_id, article_id, position, time_spent)
+        
+        return jsonify({
+            'message': 'Reading progress saved',
+            'reading_position': position,
+            'is_read': is_read
         }), 200
         
     except Exception as e:
@@ -297,7 +395,7 @@ def get_notes(article_id):
             notes.append({
                 'id': 1,
                 'content': user_article.notes,
-                'created_at': user_article.updated_at.isoformat()
+                'created_at': user_article.updated_at
             })
         
         return jsonify({'notes': notes}), 200
@@ -312,14 +410,12 @@ def add_note(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        # Verify user has access to this article and load the user's current state
+        row = Article.query_with_user_state(user_id).filter(Article.id == article_id).first()
         
-        if not article:
+        if not row:
             return jsonify({'error': 'Article not found'}), 404
+        article, feed, user_article = row
         
         data = request.get_json()
         if not data or 'note' not in data:
@@ -329,16 +425,15 @@ def add_note(article_id):
         if not note_content:
             return jsonify({'error': 'Note content cannot be empty'}), 400
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        user_article.add_note(note_content)
+        user_article = UserArticle.apply_state(user_id, article, {'notes': note_content}, current=user_article)
+        db.session.commit()
         
         return jsonify({
             'message': 'Note added successfully',
             'note': {
                 'id': 1,
                 'content': note_content,
-                'created_at': user_article.updated_at.isoformat()
+                'created_at': user_article.updated_at
             }
         }), 201
         
@@ -353,16 +448,8 @@ def get_highlights(article_id):
     try:
         user_id = int(get_jwt_identity())
         
-        user_article = UserArticle.query.filter_by(
-            user_id=user_id,
-            article_id=article_id
-        ).first()
-        
-        if not user_article:
-            return jsonify({'highlights': []}), 200
-        
-        highlights = user_article.get_highlights()
-        return jsonify({'highlights': highlights}), 200
+        highlights = Highlight.for_article(user_id, article_id).all()
+        return jsonify({'highlights': [highlight.to_dict() for highlight in highlights]}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -375,10 +462,7 @@ def add_highlight(article_id):
         user_id = int(get_jwt_identity())
         
         # Verify user has access to this article
-        article = db.session.query(Article).join(Feed).filter(
-            Article.id == article_id,
-            Feed.user_id == user_id
-        ).first()
+        article = Article.query_for_user(user_id).filter(Article.id == article_id).first()
         
         if not article:
             return jsonify({'error': 'Article not found'}), 404
@@ -395,19 +479,118 @@ def add_highlight(article_id):
         end_pos = data.get('end_pos')
         color = data.get('color', 'yellow')
         
-        # Get or create UserArticle
-        user_article = UserArticle.get_or_create(user_id, article_id)
-        highlight = user_article.add_highlight(text, start_pos, end_pos, color)
+        highlight = Highlight(user_id, article_id, text, start_pos=start_pos, end_pos=end_pos, color=color)
+        db.session.add(highlight)
+        db.session.commit()
         
         return jsonify({
             'message': 'Highlight added successfully',
-            'highlight': highlight
+            'highlight': highlight.to_dict()
         }), 201
         
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+@articles_bp.route('/<int:article_id>/highlights/<int:highlight_id>', methods=['DELETE'])
+@jwt_required()
+def delete_highlight(article_id, highlight_id):
+    """Delete a highlight from an article"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        deleted = Highlight.query.filter_by(
+            id=highlight_id,
+            user_id=user_id,
+            article_id=article_id
+        ).delete(synchronize_session=False)
+        
+        if not deleted:
+            return jsonify({'error': 'Highlight not found'}), 404
+        
+        db.session.commit()
+        return jsonify({'message': 'Highlight deleted successfully'}), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@articles_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_update_articles():
+    """Mark many articles read/unread, (un)bookmark them or set their status in one request"""
+    try:
+        user_id = int(get_jwt_identity())
+        
+        data = request.get_json()
+        if not data or 'action' not in data:
+            return jsonify({'error': 'Action is required'}), 400
+        
+        # Translate the action into the UserArticle columns to set
+        action = data['action']
+        now = datetime.utcnow()
+        if action == 'read':
+            values = {'is_read': True, 'reading_status': 'read', 'read_at': now}
+        elif action == 'unread':
+            values = {'is_read': False, 'reading_status': 'unread', 'read_at': None}
+        elif action == 'bookmark':
+            values = {'is_bookmarked': True, 'bookmarked_at': now}
+        elif action == 'unbookmark':
+            values = {'is_bookmarked': False, 'bookmarked_at': None}
+        elif action == 'status':
+            status = data.get('status')
+            valid_statuses = ['unread', 'reading', 'read', 'later', 'shortlist', 'archive']
+            if status not in valid_statuses:
+                return jsonify({'error': f'Invalid status. Must be one of: {valid_statuses}'}), 400
+            values = {'reading_status': status}
+            if status == 'read':
+                values.update({'is_read': True, 'read_at': now})
+            elif status == 'unread':
+                values.update({'is_read': False, 'read_at': None})
+        else:
+            return jsonify({'error': 'Invalid action. Must be one of: read, unread, bookmark, unbookmark, status'}), 400
+        
+        # Select the articles by id and/or by feed, category and publish date
+        article_ids = data.get('article_ids')
+        feed_id = data.get('feed_id')
+        category = data.get('category')
+        before = data.get('before')
+        if article_ids is None and not any([feed_id, category, before, data.get('all')]):
+            return jsonify({'error': 'Provide article_ids, a feed_id/category/before filter, or all: true'}), 400
+        
+        query = Article.query_for_user(user_id)
+        
+        if article_ids is not None:
+            if not isinstance(article_ids, list) or not all(isinstance(i, int) for i in article_ids):
+                return jsonify({'error': 'article_ids must be a list of integers'}), 400
+            if len(article_ids) > 10000:
+                return jsonify({'error': 'At most 10000 article_ids per request'}), 400
+            query = query.filter(Article.id.in_(article_ids))
+        
+        if feed_id:
+            query = query.filter(Feed.id == int(feed_id))
+        
+        if category:
+            query = query.filter(Feed.category == category)
+        
+        if before:
+            try:
+                before = datetime.fromisoformat(before)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'before must be an ISO 8601 datetime'}), 400
+            query = query.filter(Article.published_at <= before)
+        
+        updated = UserArticle.bulk_apply(user_id, query, values)
+        
+        return jsonify({
+            'message': f'{updated} articles updated',
+            'updated': updated
+        }), 200
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @articles_bp.route('/search', methods=['GET'])
 @jwt_required()
 def search_articles():
@@ -422,48 +605,51 @@ def search_articles():
         
         feed_id = request.args.get('feed_id', '').strip()
         category = request.args.get('category', '').strip()
+        sort = request.args.get('sort', 'relevance')  # relevance, date
         page = int(request.args.get('page', 1))
         per_page = min(int(request.args.get('per_page', 20)), 100)
         
-        # Build search query
-        query = db.session.query(Article).join(Feed).filter(Feed.user_id == user_id)
-        
-        # Add text search
-        query = query.filter(or_(
-            Article.title.contains(q),
-            Article.summary.contains(q),
-            Article.content.contains(q),
-            Article.author.contains(q)
-        ))
+        # Field projection: ?fields=title,summary or ?view=summary leaves out the content
+        try:
+            fields = get_requested_fields()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Opt-in keyset pagination: pagination=cursor, or any request carrying a cursor
+        cursor = request.args.get('cursor', '').strip()
+        cursor_mode = bool(cursor) or request.args.get('pagination') == 'cursor'
+        if cursor_mode and sort == 'relevance':
+            return jsonify({'error': 'Cursor pagination orders by date, pass sort=date'}), 400
+        if cursor:
+            try:
+                decode_cursor(cursor)
+            except ValueError:
+                return jsonify({'error': 'Invalid cursor'}), 400
+        
+        # Build search query on the full-text index
+        query, relevance = search(Article.query_with_user_state(user_id), q)
         
         # Apply filters
         if feed_id:
-            query = query.filter(Article.feed_id == int(feed_id))
+            query = query.filter(Feed.id == int(feed_id))
         
         if category:
             query = query.filter(Feed.category == category)
         
-        # Order by relevance (for now, just use published date)
-        query = query.order_by(desc(Article.published_at))
-        
-        # Paginate
-        articles = query.paginate(
-            page=page,
-            per_page=per_page,
-            error_out=False
-        )
+        # Order by relevance, or by published date when asked to, and paginate
+        order_by = relevance if sort == 'relevance' else None
+        query = defer_unrequested(query, fields)
+        rows, pagination = paginate_articles(query, page, per_page, cursor, cursor_mode, order_by)
+        if fields is None or 'content' in fields:
+            Article.prefetch_bodies(article for article, _, _ in rows)
         
         return jsonify({
             'query': q,
-            'articles': [article.to_dict(user_id=user_id) for article in articles.items],
-            'pagination': {
-                'page': articles.page,
-                'pages': articles.pages,
-                'per_page': articles.per_page,
-                'total': articles.total,
-                'has_prev': articles.has_prev,
-                'has_next': articles.has_next
-            }
+            'articles': [
+                article.to_dict(user_id=user_id, feed=feed, user_article=user_article, fields=fields)
+                for article, feed, user_article in rows
+            ],
+            'pagination': pagination
         }), 200
         
     except Exception as e:
@@ -1,7 +1,8 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_current_user, get_jwt, decode_token
 from app import db
 from app.models.user import User
+from app.utils.revocation import revocation_store
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -98,8 +99,7 @@ def register():
 def verify():
     """Verify JWT token and return user info"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user or not user.is_active:
             return jsonify({'error': 'Invalid token'}), 401
@@ -117,13 +117,12 @@ def verify():
 def refresh():
     """Refresh access token"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user or not user.is_active:
             return jsonify({'error': 'Invalid token'}), 401
         
-        access_token = create_access_token(identity=user_id)
+        access_token = create_access_token(identity=user.id)
         
         return jsonify({
             'token': access_token,
@@ -136,10 +135,21 @@ def refresh():
 @auth_bp.route('/logout', methods=['POST'])
 @jwt_required()
 def logout():
-    """Logout endpoint (client should discard tokens)"""
+    """Logout endpoint, revokes the access token and the refresh token if one is sent"""
     try:
-        # In a real implementation, you might want to blacklist the token
-        # For now, we'll just return a success message
+        token = get_jwt()
+        revocation_store.revoke(token['jti'], token['exp'])
+        
+        data = request.get_json(silent=True) or {}
+        if data.get('refresh_token'):
+            try:
+                refresh_token = decode_token(data['refresh_token'])
+            except Exception:
+                refresh_token = None
+            # Only revoke refresh tokens that belong to the same user
+            if refresh_token and refresh_token['type'] == 'refresh' and refresh_token['sub'] == token['sub']:
+                revocation_store.revoke(refresh_token['jti'], refresh_token['exp'])
+        
         return jsonify({'message': 'Logout successful'}), 200
         
     except Exception as e:
@@ -150,8 +160,7 @@ def logout():
 def get_profile():
     """Get user profile"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -166,8 +175,7 @@ def get_profile():
 def update_profile():
     """Update user profile"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -198,8 +206,7 @@ def update_profile():
 def change_password():
     """Change user password"""
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
+        user = get_current_user()
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
@@ -2,8 +2,10 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.feed import Feed
+from app.models.feed_source import FeedSource
 from app.models.article import Article
-from sqlalchemy import or_, desc, func
+from app.services.fetcher import refresh_sources
+from sqlalchemy import or_, desc, func, and_, case
 
 feeds_bp = Blueprint('feeds', __name__)
 
@@ -108,9 +110,9 @@ def create_feed():
         if not title or not url:
             return jsonify({'error': 'Title and URL are required'}), 400
         
-        # Check if feed already exists for this user
-        existing_feed = Feed.query.filter_by(user_id=user_id, url=url).first()
-        if existing_feed:
+        # Check if the user already subscribes to this feed under any spelling of the URL
+        source = FeedSource.find_by_url(url)
+        if source and Feed.query.filter_by(user_id=user_id, source_id=source.id).first():
             return jsonify({'error': 'Feed already exists'}), 409
         
         # Create new feed
@@ -172,6 +174,10 @@ def update_feed(feed_id):
         if 'tags' in data and isinstance(data['tags'], list):
             feed.set_tags(data['tags'])
         
+        # Restart adaptive scheduling from the new preferred interval
+        if 'update_interval' in data:
+            feed.source.fetch_interval = None
+        
         db.session.commit()
         
         return jsonify({
@@ -186,7 +192,7 @@ def update_feed(feed_id):
 @feeds_bp.route('/<int:feed_id>', methods=['DELETE'])
 @jwt_required()
 def delete_feed(feed_id):
-    """Delete feed and all associated articles"""
+    """Unsubscribe from a feed and drop the user's state for its articles"""
     try:
         user_id = int(get_jwt_identity())
         
@@ -196,8 +202,8 @@ def delete_feed(feed_id):
         
         feed_title = feed.title
         
-        # Delete the feed (cascades to articles and user_articles)
-        db.session.delete(feed)
+        # Remove the subscription; the shared source goes once nobody subscribes
+        feed.source.remove_subscription(feed)
         db.session.commit()
         
         return jsonify({'message': f'Feed "{feed_title}" deleted successfully'}), 200
@@ -217,16 +223,17 @@ def refresh_feed(feed_id):
         if not feed:
             return jsonify({'error': 'Feed not found'}), 404
         
-        # TODO: Implement RSS fetching logic here
-        # This would typically be handled by a background task
-        # For now, we'll just mark it as refreshed
+        result = refresh_sources([feed.source], force=True)[0]
         
-        from datetime import datetime
-        feed.last_fetched = datetime.utcnow()
-        db.session.commit()
+        if not result.ok:
+            return jsonify({
+                'error': f'Failed to refresh feed: {result.error}',
+                'feed': feed.to_dict()
+            }), 502
         
         return jsonify({
-            'message': 'Feed refresh initiated',
+            'message': 'Feed refreshed successfully',
+            'new_articles': result.new_articles,
             'feed': feed.to_dict()
         }), 200
         
@@ -241,29 +248,23 @@ def get_feed_stats():
     try:
         user_id = int(get_jwt_identity())
         
-        # Get feed counts by status
-        total_feeds = Feed.query.filter_by(user_id=user_id).count()
-        active_feeds = Feed.query.filter_by(user_id=user_id, is_active=True).filter(Feed.fetch_errors <= 5).count()
-        inactive_feeds = Feed.query.filter_by(user_id=user_id, is_active=False).count()
-        pending_feeds = Feed.query.filter_by(user_id=user_id).filter(Feed.last_fetched.is_(None)).count()
-        error_feeds = Feed.query.filter_by(user_id=user_id).filter(Feed.fetch_errors > 5).count()
-        
-        # Get article count for today
-        from datetime import datetime, timedelta
+        # Feed counts by status and the maintained article counters, in one pass over the user's feeds
+        from datetime import datetime
         today = datetime.utcnow().date()
-        new_articles_today = db.session.query(Article).join(Feed).filter(
-            Feed.user_id == user_id,
-            func.date(Article.created_at) == today
-        ).count()
-        
-        return jsonify({
-            'total': total_feeds,
-            'active': active_feeds,
-            'inactive': inactive_feeds,
-            'pending': pending_feeds,
-            'error': error_feeds,
-            'new_articles_today': new_articles_today
-        }), 200
+        stats = db.session.query(
+            func.count(Feed.id).label('total'),
+            func.sum(case((and_(Feed.is_active == True, Feed.fetch_errors <= 5), 1), else_=0)).label('active'),
+            func.sum(case((Feed.is_active == False, 1), else_=0)).label('inactive'),
+            func.sum(case((Feed.last_fetched.is_(None), 1), else_=0)).label('pending'),
+            func.sum(case((Feed.fetch_errors > 5, 1), else_=0)).label('error'),
+            func.sum(Feed.total_articles).label('total_articles'),
+            func.sum(Feed.unread_count).label('unread'),
+            func.sum(Feed.bookmarked_count).label('bookmarked'),
+            func.sum(Feed.archived_count).label('archived'),
+            func.sum(case((Feed.new_today_date == today, Feed.new_today), else_=0)).label('new_articles_today')
+        ).filter(Feed.user_id == user_id).one()
+        
+        return jsonify({key: int(value or 0) for key, value in stats._asdict().items()}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -0,0 +1,4 @@
+"""Synthetic-data benchmarks for the API hot paths.
+
+Run with `python -m benchmarks --help` from the backend directory.
+"""
\ No newline at end of file
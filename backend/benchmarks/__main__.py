@@ -0,0 +1,75 @@
+import json
+import random
+import sys
+
+import click
+from app import create_app, db
+from benchmarks.data import Scale, generate
+from benchmarks.runner import SCENARIOS, build_contexts, run, compare, save
+
+@click.command()
+@click.option('--articles', type=int, default=1000, help='Articles to generate (1k to 10M)')
+@click.option('--users', type=int, default=10, help='Users to generate (1 to 100k)')
+@click.option('--feeds-per-user', type=int, default=20, help='Subscriptions per user')
+@click.option('--articles-per-source', type=int, default=200, help='Articles per feed source')
+@click.option('--read-ratio', type=float, default=0.3, help='Share of a subscription\'s articles each user has read')
+@click.option('--bookmark-ratio', type=float, default=0.02, help='Share each user has bookmarked')
+@click.option('--archive-ratio', type=float, default=0.05, help='Share each user has archived')
+@click.option('--database-url', default=None, help='Database to load, e.g. sqlite:///bench.db or a local MySQL URL '
+                                                    '(default: the TestingConfig in-memory SQLite)')
+@click.option('--reuse', is_flag=True, help='Benchmark data already loaded into --database-url instead of regenerating it')
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(SCENARIOS)), help='Only run these scenarios')
+@click.option('--iterations', type=int, default=100, help='Timed requests per scenario')
+@click.option('--sample-users', type=int, default=20, help='Users requests are made as')
+@click.option('--seed', type=int, default=42)
+@click.option('--output', type=click.Path(dir_okay=False), help='Write the results as JSON')
+@click.option('--baseline', type=click.Path(exists=True, dir_okay=False), help='Fail if slower than this earlier --output')
+@click.option('--max-regression', type=float, default=1.25, help='Allowed latency ratio against the baseline')
+def main(articles, users, feeds_per_user, articles_per_source, read_ratio, bookmark_ratio, archive_ratio,
+         database_url, reuse, scenarios, iterations, sample_users, seed, output, baseline, max_regression):
+    """Generate synthetic data and time the API hot paths through the Flask test client"""
+    overrides = {
+        # Keep buffered progress in memory for the whole run
+        'READING_PROGRESS_FLUSH_INTERVAL': 24 * 3600
+    }
+    if database_url:
+        overrides['SQLALCHEMY_DATABASE_URI'] = database_url
+    app = create_app('testing', overrides)
+    scale = Scale(articles, users, feeds_per_user, articles_per_source, read_ratio,
+                  bookmark_ratio, archive_ratio, seed=seed)
+    
+    with app.app_context():
+        if reuse:
+            from app.models.user import User
+            user_ids = [row.id for row in db.session.query(User.id)]
+        else:
+            db.drop_all()
+            db.create_all()
+            user_ids = generate(scale)
+        
+        rng = random.Random(seed)
+        contexts = build_contexts(user_ids, sample_users, rng)
+        if not contexts:
+            print('❌ No user has any articles to benchmark')
+            sys.exit(1)
+        
+        print(f'⏱  {iterations} requests per scenario on {db.engine.url.render_as_string(hide_password=True)}')
+        results = run(app.test_client(), contexts, scenarios, iterations, seed=seed)
+        backend = db.engine.url.get_backend_name()
+    
+    if output:
+        save(output, scale, backend, results)
+        print(f'✅ Results written to {output}')
+    
+    if baseline:
+        with open(baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), max_regression)
+        if regressions:
+            print('❌ Regressions against the baseline:')
+            for regression in regressions:
+                print(f'   {regression}')
+            sys.exit(1)
+        print('✅ No regressions against the baseline')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,141 @@
+import random
+from datetime import datetime, timedelta
+
+import bcrypt
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.user import User
+from app.models.user_article import UserArticle
+
+PASSWORD = 'benchmark'
+
+# Mixed English and Chinese vocabulary, so search exercises both tokenizers
+WORDS = (
+    'python flask database index query cache latency throughput server client request '
+    'feed article reader news release update security cloud data model network design '
+    '資料庫 索引 快取 伺服器 新聞 文章 更新 安全 雲端 網路 設計 效能 閱讀 訂閱 模型'
+).split()
+
+CATEGORIES = ['Tech', 'News', 'Design', 'Science', 'Business', None]
+
+class Scale:
+    """Size and shape of a generated dataset"""
+    
+    def __init__(self, articles=1000, users=10, feeds_per_user=20, articles_per_source=200,
+                 read_ratio=0.3, bookmark_ratio=0.02, archive_ratio=0.05, content_words=300, seed=42):
+        self.articles = articles
+        self.users = users
+        self.sources = max(1, articles // articles_per_source)
+        self.feeds_per_user = min(feeds_per_user, self.sources)
+        self.read_ratio = read_ratio
+        self.bookmark_ratio = bookmark_ratio
+        self.archive_ratio = archive_ratio
+        self.content_words = content_words
+        self.seed = seed
+    
+    def __repr__(self):
+        return (f'<Scale articles={self.articles} users={self.users} sources={self.sources} '
+                f'feeds_per_user={self.feeds_per_user}>')
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def _insert(table, rows, batch_size):
+    for start in range(0, len(rows), batch_size):
+        db.session.execute(table.insert(), rows[start:start + batch_size])
+
+def generate(scale, batch_size=1000, log=print):
+    """Fill an empty database with users, sources, articles and user state.
+    
+    Articles go through Article.bulk_insert so the body store and search
+    index are populated the way ingestion populates them. Feed counters are
+    computed from the generated state instead of being recounted. Returns
+    the ids of the generated users.
+    """
+    rng = random.Random(scale.seed)
+    now = datetime.utcnow()
+    # One bcrypt hash for every user; hashing per user would dominate large runs
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(rounds=4)).decode('utf-8')
+    
+    log(f'Generating {scale}')
+    _insert(User.__table__, [
+        {'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password_hash': password_hash,
+         'is_active': True, 'is_admin': False, 'created_at': now, 'updated_at': now}
+        for i in range(scale.users)
+    ], batch_size)
+    _insert(FeedSource.__table__, [
+        {'url': f'https://bench{i}.example.com/feed', 'title': f'Source {i}',
+         'created_at': now, 'updated_at': now, 'last_fetched': now, 'fetch_errors': 0}
+        for i in range(scale.sources)
+    ], batch_size)
+    db.session.commit()
+    user_ids = [row.id for row in db.session.query(User.id).order_by(User.id)]
+    source_ids = [row.id for row in db.session.query(FeedSource.id).order_by(FeedSource.id)]
+    
+    # Articles, spread evenly over the sources and over the last 90 days
+    for start in range(0, scale.articles, batch_size):
+        articles = []
+        for i in range(start, min(start + batch_size, scale.articles)):
+            published_at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+            article = Article(
+                source_id=source_ids[i % len(source_ids)],
+                title=_text(rng, 8),
+                url=f'https://example.com/articles/{i}',
+                guid=f'bench-{i}',
+                summary=_text(rng, 40),
+                content='<p>' + _text(rng, scale.content_words) + '</p>',
+                author=f'Author {i % 50}',
+                published_at=published_at,
+                created_at=published_at
+            )
+            article.calculate_read_time()
+            articles.append(article)
+        Article.bulk_insert(articles)
+        db.session.commit()
+        log(f'  {min(start + batch_size, scale.articles)}/{scale.articles} articles')
+    
+    articles_by_source = {source_id: [] for source_id in source_ids}
+    for row in db.session.query(Article.id, Article.source_id):
+        articles_by_source[row.source_id].append(row.id)
+    db.session.execute(db.update(FeedSource), [
+        {'id': source_id, 'total_articles': len(article_ids)}
+        for source_id, article_ids in articles_by_source.items()
+    ])
+    
+    # Subscriptions and per-article state, with the counters they imply
+    feeds, states = [], []
+    for user_id in user_ids:
+        for source_id in rng.sample(source_ids, scale.feeds_per_user):
+            article_ids = articles_by_source[source_id]
+            read = set(rng.sample(article_ids, int(len(article_ids) * scale.read_ratio)))
+            bookmarked = set(rng.sample(article_ids, int(len(article_ids) * scale.bookmark_ratio)))
+            archived = set(rng.sample(sorted(read), min(len(read), int(len(article_ids) * scale.archive_ratio))))
+            for article_id in read | bookmarked:
+                states.append({
+                    'user_id': user_id, 'article_id': article_id,
+                    'is_read': article_id in read, 'is_bookmarked': article_id in bookmarked,
+                    'reading_status': 'archive' if article_id in archived else ('read' if article_id in read else 'later'),
+                    'reading_position': 1.0 if article_id in read else 0.0, 'reading_time': 0,
+                    'created_at': now, 'updated_at': now
+                })
+            feeds.append({
+                'user_id': user_id, 'source_id': source_id, 'title': f'Source {source_id}',
+                'url': f'https://bench{source_id}.example.com/feed', 'category': rng.choice(CATEGORIES),
+                'is_active': True, 'auto_update': True, 'update_interval': 3600,
+                'created_at': now - timedelta(days=90), 'updated_at': now, 'last_fetched': now,
+                'total_articles': len(article_ids), 'fetch_errors': 0,
+                'unread_count': len(article_ids) - len(read), 'bookmarked_count': len(bookmarked),
+                'archived_count': len(archived), 'new_today': 0
+            })
+        if len(states) >= batch_size * 10:
+            _insert(Feed.__table__, feeds, batch_size)
+            _insert(UserArticle.__table__, states, batch_size)
+            db.session.commit()
+            feeds, states = [], []
+    _insert(Feed.__table__, feeds, batch_size)
+    _insert(UserArticle.__table__, states, batch_size)
+    db.session.commit()
+    log(f'  {Feed.query.count()} subscriptions, {UserArticle.query.count()} user_articles')
+    return user_ids
\ No newline at end of file
@@ -0,0 +1,138 @@
+import json
+import random
+import statistics
+import time
+
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import db
+from app.models.article import Article
+from benchmarks.data import WORDS
+
+class QueryCounter:
+    """Counts the SQL statements executed while it is active"""
+    
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+    
+    def _before_execute(self, *args):
+        self.count += 1
+    
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._before_execute)
+        return self
+    
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._before_execute)
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+class Context:
+    """A benchmark user with a token and some of the articles they can see"""
+    
+    def __init__(self, user_id, article_ids):
+        self.user_id = user_id
+        self.headers = {'Authorization': 'Bearer ' + create_access_token(identity=user_id)}
+        self.article_ids = article_ids
+
+# name -> (method, function building (url, json body) for a context and rng)
+SCENARIOS = {
+    'get_articles': ('get', lambda ctx, rng: ('/api/articles?per_page=20', None)),
+    'get_articles_cursor': ('get', lambda ctx, rng: ('/api/articles?per_page=20&pagination=cursor', None)),
+    'get_articles_summary': ('get', lambda ctx, rng: ('/api/articles?per_page=20&view=summary', None)),
+    'get_articles_unread': ('get', lambda ctx, rng: ('/api/articles?status=all&is_read=false&per_page=20', None)),
+    'search_articles': ('get', lambda ctx, rng: (f'/api/articles/search?q={rng.choice(WORDS)}&per_page=20', None)),
+    'get_feed_stats': ('get', lambda ctx, rng: ('/api/feeds/stats', None)),
+    'get_categories': ('get', lambda ctx, rng: ('/api/feeds/categories', None)),
+    'mark_as_read': ('put', lambda ctx, rng: (f'/api/articles/{rng.choice(ctx.article_ids)}/read', None)),
+    'mark_as_unread': ('put', lambda ctx, rng: (f'/api/articles/{rng.choice(ctx.article_ids)}/unread', None)),
+    'toggle_bookmark': ('put', lambda ctx, rng: (f'/api/articles/{rng.choice(ctx.article_ids)}/bookmark', None)),
+    'update_status': ('put', lambda ctx, rng: (
+        f'/api/articles/{rng.choice(ctx.article_ids)}/status',
+        {'status': rng.choice(['later', 'shortlist', 'archive'])}
+    )),
+    'update_progress': ('put', lambda ctx, rng: (
+        f'/api/articles/{rng.choice(ctx.article_ids)}/progress',
+        {'position': round(rng.random() * 0.9, 2), 'time_spent': 10}
+    )),
+    'bulk_read': ('post', lambda ctx, rng: (
+        '/api/articles/bulk',
+        {'action': 'read', 'article_ids': rng.sample(ctx.article_ids, min(50, len(ctx.article_ids)))}
+    )),
+}
+
+def build_contexts(user_ids, sample_users, rng, articles_per_user=200):
+    """Pick the users requests are made as, with articles from their subscriptions"""
+    contexts = []
+    for user_id in rng.sample(user_ids, min(sample_users, len(user_ids))):
+        article_ids = [row.id for row in Article.query_for_user(user_id).with_entities(Article.id).limit(articles_per_user)]
+        if article_ids:
+            contexts.append(Context(user_id, article_ids))
+    return contexts
+
+def run(client, contexts, scenarios=None, iterations=100, warmup=5, seed=42, log=print):
+    """Time each scenario through the test client. Returns {name: stats}."""
+    rng = random.Random(seed)
+    results = {}
+    for name in scenarios or SCENARIOS:
+        method, build = SCENARIOS[name]
+        timings, queries, errors = [], [], 0
+        # Load every user into the user cache so query counts do not depend on request order
+        for ctx in contexts:
+            client.get('/api/auth/verify', headers=ctx.headers)
+        for i in range(warmup + iterations):
+            ctx = rng.choice(contexts)
+            url, body = build(ctx, rng)
+            with QueryCounter(db.engine) as counter:
+                started = time.perf_counter()
+                response = getattr(client, method)(url, headers=ctx.headers, json=body)
+                elapsed = time.perf_counter() - started
+            if response.status_code >= 400:
+                errors += 1
+            if i >= warmup:
+                timings.append(elapsed * 1000)
+                queries.append(counter.count)
+        
+        results[name] = {
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(statistics.mean(timings), 3),
+            'queries': round(statistics.mean(queries), 2),
+            'max_queries': max(queries),
+            'errors': errors
+        }
+        log(format_row(name, results[name]))
+    return results
+
+def format_row(name, stats):
+    return (f"{name:<24} p50 {stats['p50_ms']:>9.2f} ms   p99 {stats['p99_ms']:>9.2f} ms   "
+            f"queries {stats['queries']:>6.1f} (max {stats['max_queries']})"
+            + (f"   errors {stats['errors']}" if stats['errors'] else ''))
+
+def compare(results, baseline, max_ratio=1.25, min_delta_ms=1.0):
+    """Regressions against a baseline run: slower p50/p99 or more queries per request"""
+    regressions = []
+    for name, stats in results.items():
+        before = baseline.get('results', {}).get(name)
+        if not before:
+            continue
+        for key in ('p50_ms', 'p99_ms'):
+            if stats[key] > before[key] * max_ratio and stats[key] - before[key] >= min_delta_ms:
+                regressions.append(f'{name}: {key} {before[key]:.2f} -> {stats[key]:.2f}')
+        if stats['max_queries'] > before['max_queries']:
+            regressions.append(f"{name}: queries {before['max_queries']} -> {stats['max_queries']}")
+    return regressions
+
+def save(path, scale, database, results):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({
+            'scale': vars(scale),
+            'database': database,
+            'results': results
+        }, f, indent=2, ensure_ascii=False)
\ No newline at end of file
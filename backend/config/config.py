@@ -28,6 +28,12 @@ class Config:
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or SECRET_KEY
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
+    JWT_REVOCATION_REDIS = os.environ.get('JWT_REVOCATION_REDIS', 'false').lower() == 'true'  # share revoked tokens between processes
+    
+    # User cache for JWT user lookups
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 60))  # seconds
+    ARTICLE_BODY_CACHE_TTL = int(os.environ.get('ARTICLE_BODY_CACHE_TTL', 3600))  # seconds
+    ARTICLE_BODY_CACHE_SIZE = int(os.environ.get('ARTICLE_BODY_CACHE_SIZE', 1000))  # bodies per process, 0 disables the cache
     
     # Redis configuration (for Celery)
     REDIS_HOST = os.environ.get('REDIS_HOST', 'localhost')
@@ -41,8 +47,44 @@ class Config:
     
     # RSS configuration
     RSS_UPDATE_INTERVAL = int(os.environ.get('RSS_UPDATE_INTERVAL', 3600))  # seconds
+    RSS_MIN_UPDATE_INTERVAL = int(os.environ.get('RSS_MIN_UPDATE_INTERVAL', 300))  # seconds
+    RSS_MAX_UPDATE_INTERVAL = int(os.environ.get('RSS_MAX_UPDATE_INTERVAL', 86400))  # seconds
     RSS_REQUEST_TIMEOUT = int(os.environ.get('RSS_REQUEST_TIMEOUT', 30))  # seconds
+    RSS_PROBE_TIMEOUT = int(os.environ.get('RSS_PROBE_TIMEOUT', 10))  # seconds, for feeds with an open circuit
+    RSS_BACKOFF_BASE = int(os.environ.get('RSS_BACKOFF_BASE', 60))  # seconds
+    RSS_BACKOFF_MAX = int(os.environ.get('RSS_BACKOFF_MAX', 3600))  # seconds
+    RSS_CIRCUIT_BREAKER_THRESHOLD = int(os.environ.get('RSS_CIRCUIT_BREAKER_THRESHOLD', 5))  # consecutive failures
+    RSS_CIRCUIT_BREAKER_RESET = int(os.environ.get('RSS_CIRCUIT_BREAKER_RESET', 21600))  # seconds between probes
+    RSS_HOST_FAILURE_THRESHOLD = int(os.environ.get('RSS_HOST_FAILURE_THRESHOLD', 3))  # per refresh run
     RSS_MAX_ARTICLES_PER_FEED = int(os.environ.get('RSS_MAX_ARTICLES_PER_FEED', 100))
+    RSS_FETCH_CONCURRENCY = int(os.environ.get('RSS_FETCH_CONCURRENCY', 32))  # parallel fetches
+    RSS_SCHEDULER_BATCH_SIZE = int(os.environ.get('RSS_SCHEDULER_BATCH_SIZE', 500))  # feeds per scheduler tick
+    RSS_SCHEDULER_RELOAD_INTERVAL = int(os.environ.get('RSS_SCHEDULER_RELOAD_INTERVAL', 60))  # seconds
+    
+    # Reading progress heartbeats are buffered and written in batches
+    READING_PROGRESS_FLUSH_INTERVAL = int(os.environ.get('READING_PROGRESS_FLUSH_INTERVAL', 10))  # seconds
+    
+    # Article retention: 0 keeps articles forever, sources can override the number of days
+    ARTICLE_RETENTION_DAYS = int(os.environ.get('ARTICLE_RETENTION_DAYS', 0))
+    ARTICLE_RETENTION_MODE = os.environ.get('ARTICLE_RETENTION_MODE', 'archive')  # archive or delete
+    ARTICLE_RETENTION_BATCH_SIZE = int(os.environ.get('ARTICLE_RETENTION_BATCH_SIZE', 500))  # articles per transaction
+    ARTICLE_RETENTION_INTERVAL = int(os.environ.get('ARTICLE_RETENTION_INTERVAL', 3600))  # seconds, in run-scheduler
+    
+    # Request metrics at /api/metrics; debug mode also adds X-Query-Count and Server-Timing headers.
+    # Off by default: the endpoint exposes route timings, so set METRICS_TOKEN when it is reachable.
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'false').lower() == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # scrapers send it as a Bearer token
+    METRICS_DEBUG_HEADERS = os.environ.get('METRICS_DEBUG_HEADERS', 'false').lower() == 'true'
+    
+    # Statements slower than the threshold are logged as JSON lines with their EXPLAIN plan (0 disables)
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+    SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', 'logs/slow_queries.jsonl')
+    SLOW_QUERY_EXPLAIN = os.environ.get('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_EXPLAIN_INTERVAL = int(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 3600))  # seconds per fingerprint
+    SLOW_QUERY_MAX_FINGERPRINTS = int(os.environ.get('SLOW_QUERY_MAX_FINGERPRINTS', 1000))  # statements tracked per process
+    
+    # JSON encoder for API responses: orjson (falls back to stdlib when not installed) or stdlib
+    JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'orjson')
     
     # File upload configuration
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER', 'uploads')
@@ -65,6 +107,8 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = {}  # SQLite does not take the MySQL pool settings
+    SLOW_QUERY_THRESHOLD_MS = 0
 
 config = {
     'development': DevelopmentConfig,
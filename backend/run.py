@@ -1,10 +1,13 @@
 #!/usr/bin/env python3
 import os
 import sys
+import time
+import logging
+import click
 from flask import Flask
 from flask.cli import FlaskGroup
 from app import create_app, db
-from app.models import User, Feed, Article, UserArticle
+from app.models import User, FeedSource, Feed, Article, UserArticle
 
 def create_cli_app():
     """Create Flask app for CLI commands"""
@@ -17,7 +20,13 @@ cli = FlaskGroup(create_app=create_cli_app)
 def init_db():
     """Initialize the database"""
     try:
+        from app.utils.query_plans import create_missing_indexes
+        
         db.create_all()
+        # create_all skips tables that already exist, so add the indexes they are missing
+        created = create_missing_indexes()
+        if created:
+            print(f"✅ Created {len(created)} indexes: {', '.join(created)}")
         print("✅ Database initialized successfully!")
     except Exception as e:
         print(f"❌ Error initializing database: {e}")
@@ -44,6 +53,29 @@ def recreate_db():
         print(f"❌ Error recreating database: {e}")
         sys.exit(1)
 
+@cli.command('upgrade-db')
+def upgrade_db():
+    """Upgrade an existing database to the current schema, keeping its data"""
+    try:
+        from app.services.schema_upgrade import upgrade_schema
+        
+        result = upgrade_schema()
+        if result.tables:
+            print(f"✅ Created tables: {', '.join(result.tables)}")
+        if result.columns:
+            print(f"✅ Added columns: {', '.join(result.columns)}")
+        if result.indexes:
+            print(f"✅ Created indexes: {', '.join(result.indexes)}")
+        if result.sources:
+            print(f"✅ Moved feeds to {result.sources} shared sources "
+                  f"({result.merged_feeds} duplicate subscriptions and {result.merged_articles} duplicate articles merged)")
+        print("✅ Database schema is up to date")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error upgrading database: {e}")
+        sys.exit(1)
+
 @cli.command('create-admin')
 def create_admin():
     """Create admin user"""
@@ -146,6 +178,268 @@ def create_demo_data():
         print(f"❌ Error creating demo data: {e}")
         sys.exit(1)
 
+@cli.command('refresh-feeds')
+@click.option('--concurrency', type=int, default=None, help='Number of feeds fetched in parallel')
+def refresh_all_feeds(concurrency):
+    """Fetch all subscribed feed sources and store new articles"""
+    try:
+        from app.services.fetcher import refresh_sources
+        
+        sources = FeedSource.query.filter(
+            FeedSource.subscriptions.any(is_active=True, auto_update=True)
+        ).all()
+        started = time.monotonic()
+        results = refresh_sources(sources, max_workers=concurrency)
+        elapsed = time.monotonic() - started
+        
+        failed = [r for r in results if not r.ok]
+        new_articles = sum(r.new_articles for r in results)
+        print(f"✅ Refreshed {len(results) - len(failed)}/{len(results)} feeds in {elapsed:.1f}s, {new_articles} new articles")
+        for result in failed:
+            print(f"   ⚠️  Source {result.source_id}: {result.error}")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error refreshing feeds: {e}")
+        sys.exit(1)
+
+@cli.command('run-scheduler')
+def run_scheduler():
+    """Run the adaptive feed refresh scheduler"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        from app.services.scheduler import FeedScheduler
+        
+        print("🕒 Feed scheduler running (Ctrl+C to stop)")
+        FeedScheduler().run_forever()
+        
+    except KeyboardInterrupt:
+        print("👋 Feed scheduler stopped")
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Scheduler error: {e}")
+        sys.exit(1)
+
+@cli.command('rebuild-counters')
+def rebuild_counters():
+    """Recompute the article counters of every source and subscription"""
+    try:
+        for source in FeedSource.query.all():
+            source.update_stats()
+        for feed in Feed.query.all():
+            feed.recount_stats()
+        db.session.commit()
+        print(f"✅ Counters rebuilt for {Feed.query.count()} feeds")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error rebuilding counters: {e}")
+        sys.exit(1)
+
+@cli.command('migrate-highlights')
+@click.option('--batch-size', type=int, default=500, help='user_articles rows migrated per transaction')
+def migrate_highlights(batch_size):
+    """Move JSON highlights from user_articles into the highlights table"""
+    try:
+        from app.models.highlight import Highlight
+        
+        migrated, created = Highlight.migrate_json(batch_size=batch_size)
+        print(f"✅ Migrated {created} highlights from {migrated} user articles")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error migrating highlights: {e}")
+        sys.exit(1)
+
+@cli.command('clean-json-columns')
+@click.option('--batch-size', type=int, default=1000, help='Rows checked per query')
+def clean_json_columns(batch_size):
+    """Clear stored tags and media URLs that are not valid JSON"""
+    try:
+        from app.utils.json_provider import clear_malformed_json
+        
+        for column, count in clear_malformed_json(batch_size=batch_size).items():
+            print(f"✅ Cleared {count} malformed values in {column}")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error cleaning JSON columns: {e}")
+        sys.exit(1)
+
+@cli.command('rebuild-search-index')
+def rebuild_search_index():
+    """Create the full-text search index if needed and index existing articles"""
+    try:
+        from app.utils.search import rebuild_index
+        
+        if rebuild_index():
+            print(f"✅ Search index rebuilt for {Article.query.count()} articles")
+        else:
+            print("⚠️  This database has no full-text search support, search uses LIKE matching")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error rebuilding search index: {e}")
+        sys.exit(1)
+
+@cli.command('compress-articles')
+@click.option('--batch-size', type=int, default=500, help='Articles rewritten per transaction')
+def compress_articles(batch_size):
+    """Compress article summaries and contents stored before compression was enabled"""
+    try:
+        rewritten = Article.compress_bodies(batch_size=batch_size)
+        print(f"✅ Compressed {rewritten} articles")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error compressing articles: {e}")
+        sys.exit(1)
+
+@cli.command('migrate-bodies')
+@click.option('--batch-size', type=int, default=500, help='Articles migrated per transaction')
+def migrate_bodies(batch_size):
+    """Move article contents into the shared, deduplicated body store"""
+    try:
+        from app.models.article_body import ArticleBody
+        
+        migrated, stored = ArticleBody.migrate_articles(batch_size=batch_size)
+        print(f"✅ Migrated {migrated} articles into {stored} new bodies")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error migrating article bodies: {e}")
+        sys.exit(1)
+
+@cli.command('set-retention')
+@click.argument('url')
+@click.argument('days', type=int, required=False)
+def set_retention(url, days):
+    """Set how many days a feed source keeps articles (0 forever, omit for the global default)"""
+    try:
+        source = FeedSource.find_by_url(url)
+        if not source:
+            print(f"❌ No feed source for {url}")
+            sys.exit(1)
+        
+        source.retention_days = days
+        db.session.commit()
+        print(f"✅ Retention for {source.url}: {'default' if days is None else f'{days} days'}")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error setting retention: {e}")
+        sys.exit(1)
+
+@cli.command('apply-retention')
+@click.option('--batch-size', type=int, default=None, help='Articles removed per transaction')
+@click.option('--mode', type=click.Choice(['archive', 'delete']), default=None, help='Override ARTICLE_RETENTION_MODE')
+def apply_retention(batch_size, mode):
+    """Archive or delete old articles that nobody bookmarked, rated, annotated or highlighted"""
+    try:
+        from app.services.retention import apply_retention as run_retention
+        
+        archive = None if mode is None else mode == 'archive'
+        results = run_retention(batch_size=batch_size, archive=archive)
+        removed = sum(result.removed for result in results)
+        print(f"✅ Removed {removed} articles from {len(results)} sources")
+        
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error applying retention: {e}")
+        sys.exit(1)
+
+@cli.command('slow-queries')
+@click.option('--log', 'path', default=None, help='Slow query log to read (default: SLOW_QUERY_LOG)')
+@click.option('--top', type=int, default=10, help='Number of statements to show')
+@click.option('--sort', type=click.Choice(['total', 'count', 'max', 'mean']), default='total', help='Rank by slow time')
+@click.option('--since', default=None, help='Only entries logged after this ISO 8601 time')
+@click.option('--plans/--no-plans', default=True, help='Show captured EXPLAIN plans')
+def slow_queries(path, top, sort, since, plans):
+    """Show the statements that spent the most time over the slow query threshold"""
+    try:
+        from flask import current_app
+        from app.utils.slow_queries import summarize
+        
+        path = path or current_app.config['SLOW_QUERY_LOG']
+        if not os.path.exists(path):
+            print(f"✅ No slow queries logged ({path} does not exist)")
+            return
+        
+        keys = {
+            'total': lambda item: item['slow_total_ms'],
+            'count': lambda item: item['slow_count'],
+            'max': lambda item: item['slow_max_ms'],
+            'mean': lambda item: item['slow_total_ms'] / item['slow_count']
+        }
+        items = sorted(summarize(path, since), key=keys[sort], reverse=True)[:top]
+        print(f"🐢 Top {len(items)} slow statements in {path} by {sort}")
+        for rank, item in enumerate(items, 1):
+            print(f"\n#{rank} [{item['fingerprint_id']}] slow {item['slow_count']}x, "
+                  f"total {item['slow_total_ms']:.0f} ms, max {item['slow_max_ms']:.0f} ms")
+            if item['stats']:
+                stats = item['stats']
+                print(f"   all runs: {stats['count']}x, mean {stats['mean_ms']:.1f} ms, p95 {stats['p95_ms']:.1f} ms")
+            if item['routes']:
+                print(f"   routes: {', '.join(sorted(item['routes']))}")
+            print(f"   {item['fingerprint'][:500]}")
+            if plans and item['plan']:
+                print("   plan:")
+                for row in item['plan']:
+                    print("     " + '  '.join(f'{key}={value}' for key, value in row.items()))
+        
+    except Exception as e:
+        print(f"❌ Error reading slow query log: {e}")
+        sys.exit(1)
+
+@cli.command('create-indexes')
+def create_indexes():
+    """Create the model indexes an existing database is missing (init-db and upgrade-db also do this)"""
+    try:
+        from app.utils.query_plans import create_missing_indexes
+        
+        created = create_missing_indexes()
+        if created:
+            print(f"✅ Created {len(created)} indexes: {', '.join(created)}")
+        else:
+            print("✅ All indexes already exist")
+        
+    except Exception as e:
+        print(f"❌ Error creating indexes: {e}")
+        sys.exit(1)
+
+@cli.command('check-query-plans')
+@click.option('--fresh', is_flag=True, help='Create the tables first (for an empty or in-memory database)')
+@click.option('--verbose', is_flag=True, help='Show every plan, not only the failing ones')
+def check_query_plans(fresh, verbose):
+    """EXPLAIN the hot endpoint queries and fail if any of them scans a whole table"""
+    try:
+        from app.utils.query_plans import check_query_plans as run_checks
+        
+        if fresh:
+            db.create_all()
+        
+        failures = 0
+        for name, plan, scans in run_checks():
+            if scans:
+                failures += 1
+                print(f"❌ {name}: full scan of {', '.join(scans)}")
+            else:
+                print(f"✅ {name}")
+            if scans or verbose:
+                for row in plan:
+                    print("     " + '  '.join(f'{key}={value}' for key, value in row.items()))
+        
+        if failures:
+            print(f"❌ {failures} queries scan a whole table")
+            sys.exit(1)
+        print("✅ No hot query scans a whole table")
+        
+    except SystemExit:
+        raise
+    except Exception as e:
+        print(f"❌ Error checking query plans: {e}")
+        sys.exit(1)
+
 @cli.command('test-db-connection')
 def test_db_connection():
     """Test database connection"""
@@ -0,0 +1,31 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User, _user_cache
+from app.models.article_body import get_body_cache
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+        # In-process caches outlive the in-memory database
+        _user_cache.clear()
+        get_body_cache().clear()
+
+@pytest.fixture
+def user(app):
+    user = User(username='reader', email='reader@example.com', password='password123')
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+@pytest.fixture
+def client(app, user):
+    """Test client authenticated as `user`"""
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + create_access_token(identity=user.id)
+    return client
\ No newline at end of file
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models import article_body
+from app.models.article import Article
+from app.models.article_body import ArticleBody, get_body_cache
+from app.models.feed_source import FeedSource
+
+BODY = '<p>The same post, syndicated by two feeds</p>'
+
+@contextmanager
+def body_queries():
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.startswith('SELECT') and 'FROM article_bodies' in statement:
+            statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def articles(app):
+    """Two sources carrying the same body, and one article with its own"""
+    articles = []
+    for n in range(2):
+        source = FeedSource(f'https://example.com/{n}/rss')
+        db.session.add(source)
+        db.session.flush()
+        articles.append(Article(source.id, 'Shared', f'https://example.com/{n}/1', guid='1', content=BODY))
+    articles.append(Article(source.id, 'Own', 'https://example.com/1/2', guid='2', content='<p>Other</p>'))
+    Article.bulk_insert(articles)
+    db.session.commit()
+    return Article.query.order_by(Article.id).all()
+
+def test_duplicate_bodies_are_stored_once(articles):
+    assert ArticleBody.query.count() == 2
+    assert articles[0].body_hash == articles[1].body_hash == ArticleBody.hash_content(BODY)
+    assert articles[0].content is None
+    assert [article.get_content() for article in articles] == [BODY, BODY, '<p>Other</p>']
+
+def test_bodies_are_served_from_the_cache(articles):
+    get_body_cache().clear()
+    with body_queries() as statements:
+        Article.prefetch_bodies(articles)
+        assert [article.get_content() for article in articles] == [BODY, BODY, '<p>Other</p>']
+    assert len(statements) == 1
+
+def test_cache_size_comes_from_the_config(app, articles, monkeypatch):
+    monkeypatch.setattr(article_body, '_body_cache', None)
+    app.config['ARTICLE_BODY_CACHE_SIZE'] = 1
+    
+    ArticleBody.get_many(article.body_hash for article in articles)
+    
+    assert get_body_cache().maxsize == 1
+    assert len(get_body_cache()) == 1
+
+def test_bodies_are_deleted_with_their_last_article(articles):
+    shared = articles[0].body_hash
+    ArticleBody.get_content(shared)
+    
+    Article.query.filter_by(id=articles[0].id).delete()
+    ArticleBody.delete_unreferenced([shared])
+    assert ArticleBody.get_content(shared) == BODY
+    
+    Article.query.filter_by(id=articles[1].id).delete()
+    ArticleBody.delete_unreferenced([shared])
+    db.session.commit()
+    assert ArticleBody.get_content(shared) is None
+    assert ArticleBody.query.count() == 1
+
+def test_migrate_articles_moves_legacy_content(app):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add_all([
+        Article(source.id, f'Legacy {n}', f'https://example.com/{n}', guid=str(n), content=BODY)
+        for n in range(3)
+    ])
+    db.session.commit()
+    
+    assert ArticleBody.migrate_articles(batch_size=2) == (3, 1)
+    assert ArticleBody.migrate_articles() == (0, 0)
+    assert {(article.content, article.get_content()) for article in Article.query} == {(None, BODY)}
\ No newline at end of file
@@ -0,0 +1,88 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.article import Article
+from app.models.article_body import get_body_cache
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.highlight import Highlight
+from app.models.user_article import UserArticle
+
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def articles(user):
+    """70 articles over two subscriptions, some of them with reading state and highlights"""
+    articles = []
+    for n in range(2):
+        source = FeedSource(f'https://example.com/{n}/rss', title=f'Source {n}')
+        db.session.add(source)
+        db.session.flush()
+        db.session.add(Feed(user.id, f'Feed {n}', source.url, source_id=source.id, category='Tech'))
+        articles.extend(
+            Article(source_id=source.id, title=f'Article {n}-{i}', url=f'https://example.com/{n}/{i}',
+                    guid=f'{n}-{i}', summary='Summary', content=f'Body of article {n}-{i}')
+            for i in range(35)
+        )
+    Article.bulk_insert(articles)
+    db.session.commit()
+    
+    ids = [row.id for row in Article.query.with_entities(Article.id).order_by(Article.id)]
+    for article_id in ids[::3]:
+        db.session.add(UserArticle(user.id, article_id, is_read=True, is_bookmarked=True, reading_status='read'))
+        db.session.add(Highlight(user.id, article_id, 'Highlighted text'))
+    db.session.commit()
+    return ids
+
+def fetch(client, url):
+    """GET a page with cold caches. Returns (statement count, JSON body)."""
+    get_body_cache().clear()
+    with count_queries() as statements:
+        response = client.get(url)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_json()
+
+@pytest.mark.parametrize('pagination', ['page', 'cursor'])
+def test_article_list_query_count_does_not_grow_with_page_size(client, articles, pagination):
+    # The first request loads the user into the user cache
+    client.get('/api/auth/verify')
+    
+    small, small_page = fetch(client, f'/api/articles?status=all&per_page=10&pagination={pagination}')
+    large, large_page = fetch(client, f'/api/articles?status=all&per_page=60&pagination={pagination}')
+    
+    assert len(small_page['articles']) == 10
+    assert len(large_page['articles']) == 60
+    assert small == large
+
+def test_search_query_count_does_not_grow_with_page_size(client, articles):
+    client.get('/api/auth/verify')
+    
+    small, small_page = fetch(client, '/api/articles/search?q=Article&per_page=10')
+    large, large_page = fetch(client, '/api/articles/search?q=Article&per_page=60')
+    
+    assert len(small_page['articles']) == 10
+    assert len(large_page['articles']) == 60
+    assert small == large
+
+def test_article_detail_loads_feed_and_state_in_one_statement(client, articles):
+    client.get('/api/auth/verify')
+    
+    count, data = fetch(client, f'/api/articles/{articles[0]}')
+    
+    assert data['article']['feed_name'] == 'Feed 0'
+    assert data['article']['is_read'] is True
+    # The article with its feed and state, then its body
+    assert count == 2
\ No newline at end of file
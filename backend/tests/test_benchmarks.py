@@ -0,0 +1,37 @@
+import random
+from benchmarks.data import Scale, generate
+from benchmarks.runner import SCENARIOS, build_contexts, compare, run
+from app.models.feed import Feed
+from app.services.progress import progress_buffer
+
+def test_every_scenario_runs_without_errors(app, monkeypatch):
+    # Buffered progress stays in memory instead of being flushed by a background thread
+    monkeypatch.setattr(progress_buffer, '_ensure_started', lambda: None)
+    user_ids = generate(Scale(articles=200, users=3, feeds_per_user=4, articles_per_source=50, content_words=20),
+                        log=lambda *args: None)
+    contexts = build_contexts(user_ids, 3, random.Random(1))
+    
+    results = run(app.test_client(), contexts, iterations=3, warmup=1, log=lambda *args: None)
+    progress_buffer.flush()
+    
+    assert set(results) == set(SCENARIOS)
+    assert {name: stats['errors'] for name, stats in results.items()} == {name: 0 for name in SCENARIOS}
+    # The generated counters match the generated article state
+    for feed in Feed.query:
+        counters = (feed.unread_count, feed.bookmarked_count, feed.archived_count)
+        feed.recount_stats()
+        assert counters == (feed.unread_count, feed.bookmarked_count, feed.archived_count)
+
+def test_compare_reports_slower_runs_and_extra_queries():
+    baseline = {'results': {
+        'list': {'p50_ms': 10.0, 'p99_ms': 20.0, 'max_queries': 2},
+        'search': {'p50_ms': 0.5, 'p99_ms': 0.6, 'max_queries': 3},
+    }}
+    results = {
+        'list': {'p50_ms': 13.0, 'p99_ms': 21.0, 'max_queries': 3},
+        # Twice as slow, but by less than a millisecond
+        'search': {'p50_ms': 1.0, 'p99_ms': 1.2, 'max_queries': 3},
+        'new': {'p50_ms': 99.0, 'p99_ms': 99.0, 'max_queries': 9},
+    }
+    
+    assert compare(results, baseline) == ['list: p50_ms 10.00 -> 13.00', 'list: queries 2 -> 3']
\ No newline at end of file
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.user_article import UserArticle
+
+COUNTERS = ('unread_count', 'bookmarked_count', 'archived_count')
+
+@pytest.fixture
+def feeds(user):
+    """Two subscriptions in different categories with four dated articles each"""
+    feeds = []
+    start = datetime(2024, 1, 1)
+    for n, category in enumerate(['Tech', 'News']):
+        source = FeedSource(f'https://example.com/{n}/rss')
+        db.session.add(source)
+        db.session.flush()
+        feed = Feed(user.id, f'Feed {n}', source.url, source_id=source.id, category=category)
+        db.session.add(feed)
+        Article.bulk_insert([
+            Article(source.id, f'Article {n}-{i}', f'https://example.com/{n}/{i}', guid=str(i),
+                    published_at=start + timedelta(days=i))
+            for i in range(4)
+        ])
+        feeds.append(feed)
+    db.session.commit()
+    for feed in feeds:
+        feed.recount_stats()
+    db.session.commit()
+    return feeds
+
+def bulk(client, **data):
+    response = client.post('/api/articles/bulk', json=data)
+    return response.status_code, response.get_json()
+
+def assert_counters_exact(feeds):
+    for feed in feeds:
+        db.session.refresh(feed)
+        counters = [getattr(feed, key) for key in COUNTERS]
+        feed.recount_stats()
+        assert counters == [getattr(feed, key) for key in COUNTERS]
+    db.session.rollback()
+
+def test_mark_a_feed_read_skips_articles_already_read(client, feeds):
+    first = feeds[0].source.articles.first()
+    assert client.put(f'/api/articles/{first.id}/read').status_code == 200
+    
+    assert bulk(client, action='read', feed_id=feeds[0].id) == (200, {'message': '3 articles updated', 'updated': 3})
+    assert bulk(client, action='read', feed_id=feeds[0].id)[1]['updated'] == 0
+    
+    db.session.refresh(feeds[0])
+    assert feeds[0].unread_count == 0
+    assert_counters_exact(feeds)
+
+def test_bulk_selects_by_category_date_and_ids(client, feeds):
+    assert bulk(client, action='bookmark', category='News')[1]['updated'] == 4
+    assert bulk(client, action='status', status='archive', before='2024-01-02T00:00:00', all=True)[1]['updated'] == 4
+    ids = [article.id for article in feeds[0].source.articles]
+    assert bulk(client, action='unbookmark', article_ids=ids + [10 ** 6])[1]['updated'] == 0
+    assert bulk(client, action='read', all=True)[1]['updated'] == 8
+    
+    assert UserArticle.query.filter_by(is_bookmarked=True).count() == 4
+    assert UserArticle.query.filter_by(reading_status='archive').count() == 0
+    assert_counters_exact(feeds)
+
+@pytest.mark.parametrize('data', [
+    {},
+    {'action': 'read'},
+    {'action': 'delete', 'all': True},
+    {'action': 'status', 'status': 'gone', 'all': True},
+    {'action': 'read', 'article_ids': 'all'},
+    {'action': 'read', 'before': 'yesterday'},
+])
+def test_invalid_bulk_requests_are_rejected(client, feeds, data):
+    assert bulk(client, **data)[0] == 400
\ No newline at end of file
@@ -0,0 +1,68 @@
+import zlib
+import pytest
+from sqlalchemy import table, column, select
+from app import db
+from app.models.article import Article
+from app.models.feed_source import FeedSource
+from app.utils import compression
+from app.utils.compression import MAGIC, ZLIB, compress_text, decompress_text, is_compressed
+
+LONG_TEXT = '<p>重複的內容 repeated content</p>' * 200
+
+@pytest.mark.parametrize('text', ['', 'short', '中文', LONG_TEXT])
+def test_round_trip(text):
+    assert decompress_text(compress_text(text)) == text
+
+def test_only_large_text_is_compressed(monkeypatch):
+    # zlib when zstandard is not installed
+    monkeypatch.setattr(compression, 'zstandard', None)
+    assert compress_text('short') == b'short'
+    packed = compress_text(LONG_TEXT)
+    assert packed[:2] == MAGIC + ZLIB
+    assert len(packed) < len(LONG_TEXT.encode('utf-8')) / 10
+    assert is_compressed(packed) and not is_compressed(b'short')
+
+def test_legacy_values_are_read_as_they_are():
+    assert decompress_text('legacy text') == 'legacy text'
+    assert decompress_text(memoryview('中文'.encode('utf-8'))) == '中文'
+    with pytest.raises(ValueError):
+        decompress_text(MAGIC + b'?' + zlib.compress(b'x'))
+
+def stored(article_id):
+    raw = table('articles', column('id'), column('summary'), column('content'))
+    return db.session.execute(select(raw.c.summary, raw.c.content).where(raw.c.id == article_id)).one()
+
+def test_columns_are_stored_compressed_and_loaded_as_text(app):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    article = Article(source.id, 'Article', 'https://example.com/1', guid='1', summary='Short', content=LONG_TEXT)
+    db.session.add(article)
+    db.session.commit()
+    
+    summary, content = stored(article.id)
+    assert summary == b'Short'
+    assert is_compressed(content)
+    
+    db.session.expire_all()
+    assert db.session.get(Article, article.id).content == LONG_TEXT
+
+def test_compress_bodies_rewrites_uncompressed_rows(app):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.commit()
+    # Rows written before compression, as TEXT
+    db.session.execute(db.text(
+        "INSERT INTO articles (id, source_id, title, url, summary, content) VALUES "
+        "(1, :source_id, 'Old', 'https://example.com/1', 'Old summary', :content), "
+        "(2, :source_id, 'Empty', 'https://example.com/2', NULL, NULL)"
+    ), {'source_id': source.id, 'content': LONG_TEXT})
+    db.session.commit()
+    
+    assert Article.compress_bodies(batch_size=1) == 1
+    assert Article.compress_bodies() == 0
+    
+    summary, content = stored(1)
+    assert summary == b'Old summary'
+    assert is_compressed(content)
+    assert db.session.get(Article, 1).content == LONG_TEXT
\ No newline at end of file
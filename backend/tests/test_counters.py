@@ -0,0 +1,76 @@
+import pytest
+from app import db
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.services.fetcher import store_entries
+
+COUNTERS = ('unread_count', 'bookmarked_count', 'archived_count', 'new_today')
+
+def entry(n):
+    return {
+        'title': f'Entry {n}',
+        'url': f'https://example.com/posts/{n}',
+        'guid': f'entry-{n}',
+        'summary': 'Summary',
+        'content': None,
+        'author': None,
+        'published_at': None,
+        'image_url': None,
+        'media_urls': [],
+        'tags': []
+    }
+
+@pytest.fixture
+def feed(user):
+    """A subscription whose source then ingests five articles"""
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    feed = Feed(user.id, 'Example', source.url, source_id=source.id)
+    db.session.add(feed)
+    db.session.commit()
+    
+    source.record_new_articles(store_entries(source, [entry(n) for n in range(5)]))
+    db.session.commit()
+    return feed
+
+def counters(feed):
+    db.session.refresh(feed)
+    return {key: getattr(feed, key) for key in COUNTERS}
+
+def recounted(feed):
+    feed.recount_stats()
+    db.session.commit()
+    return counters(feed)
+
+def test_ingestion_counts_new_articles(client, feed):
+    assert counters(feed) == {'unread_count': 5, 'bookmarked_count': 0, 'archived_count': 0, 'new_today': 5}
+    assert recounted(feed) == counters(feed)
+
+def test_counters_follow_state_changes(client, feed):
+    ids = [article.id for article in feed.source.articles]
+    for url, body in [
+        (f'/api/articles/{ids[0]}/read', None),
+        (f'/api/articles/{ids[0]}/read', None),
+        (f'/api/articles/{ids[1]}/bookmark', None),
+        (f'/api/articles/{ids[2]}/status', {'status': 'archive'}),
+        (f'/api/articles/{ids[3]}/status', {'status': 'read'}),
+        (f'/api/articles/{ids[3]}/unread', None),
+    ]:
+        assert client.put(url, json=body).status_code == 200
+        assert counters(feed) == recounted(feed)
+    
+    assert counters(feed) == {'unread_count': 4, 'bookmarked_count': 1, 'archived_count': 1, 'new_today': 5}
+    stats = client.get('/api/feeds/stats').get_json()
+    assert (stats['unread'], stats['bookmarked'], stats['archived'], stats['new_articles_today']) == (4, 1, 1, 5)
+
+def test_counter_that_would_go_negative_is_recounted(client, feed):
+    # A counter that drifted to 0 while articles are still unread
+    Feed.query.update({'unread_count': 0, 'bookmarked_count': 3})
+    db.session.commit()
+    article_id = feed.source.articles.first().id
+    
+    assert client.put(f'/api/articles/{article_id}/read').status_code == 200
+    
+    assert counters(feed)['unread_count'] == 4
+    assert counters(feed)['bookmarked_count'] == 0
\ No newline at end of file
@@ -0,0 +1,82 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource, normalize_feed_url
+from app.models.user import User
+from app.services.fetcher import store_entries
+
+@pytest.mark.parametrize('url, normalized', [
+    ('https://Example.COM/rss', 'https://example.com/rss'),
+    ('https://example.com:443/rss', 'https://example.com/rss'),
+    ('http://example.com:80/rss', 'http://example.com/rss'),
+    ('http://example.com:8080/rss', 'http://example.com:8080/rss'),
+    ('  https://example.com/rss#top ', 'https://example.com/rss'),
+    ('https://example.com', 'https://example.com/'),
+    ('https://example.com/rss?format=atom', 'https://example.com/rss?format=atom'),
+])
+def test_normalize_feed_url(url, normalized):
+    assert normalize_feed_url(url) == normalized
+
+def subscribe(client, url, title='Example'):
+    return client.post('/api/feeds', json={'title': title, 'url': url})
+
+def entry(n):
+    return {
+        'title': f'Entry {n}',
+        'url': f'https://example.com/posts/{n}',
+        'guid': f'entry-{n}',
+        'summary': f'Summary {n}',
+        'content': None,
+        'author': None,
+        'published_at': None,
+        'image_url': None,
+        'media_urls': [],
+        'tags': []
+    }
+
+@pytest.fixture
+def other_client(app):
+    other = User(username='other', email='other@example.com', password='password123')
+    db.session.add(other)
+    db.session.commit()
+    client = app.test_client()
+    client.environ_base['HTTP_AUTHORIZATION'] = 'Bearer ' + create_access_token(identity=other.id)
+    return client
+
+def test_subscribers_share_one_source(client, other_client):
+    assert subscribe(client, 'https://Example.com/rss').status_code == 201
+    assert subscribe(other_client, 'https://example.com:443/rss', title='Mine').status_code == 201
+    # The same user cannot subscribe twice under another spelling
+    assert subscribe(client, 'https://example.com/rss#latest').status_code == 409
+    
+    source = FeedSource.query.one()
+    assert source.url == 'https://example.com/rss'
+    assert Feed.query.filter_by(source_id=source.id).count() == 2
+    
+    # Entries are stored once per source, however often they are fetched
+    assert store_entries(source, [entry(1), entry(2), entry(2)]) == 2
+    assert store_entries(source, [entry(1), entry(2), entry(3)]) == 1
+    db.session.commit()
+    assert Article.query.count() == 3
+    
+    for api in (client, other_client):
+        response = api.get('/api/articles?status=all')
+        assert sorted(article['title'] for article in response.get_json()['articles']) == ['Entry 1', 'Entry 2', 'Entry 3']
+    titles = {article['feed_name'] for article in other_client.get('/api/articles?status=all').get_json()['articles']}
+    assert titles == {'Mine'}
+
+def test_source_is_removed_with_its_last_subscription(client, other_client):
+    feed_id = subscribe(client, 'https://example.com/rss').get_json()['feed']['id']
+    other_feed_id = subscribe(other_client, 'https://example.com/rss').get_json()['feed']['id']
+    store_entries(FeedSource.query.one(), [entry(1)])
+    db.session.commit()
+    
+    assert client.delete(f'/api/feeds/{feed_id}').status_code == 200
+    assert FeedSource.query.count() == 1
+    assert Article.query.count() == 1
+    
+    assert other_client.delete(f'/api/feeds/{other_feed_id}').status_code == 200
+    assert FeedSource.query.count() == 0
+    assert Article.query.count() == 0
\ No newline at end of file
@@ -0,0 +1,64 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.article import Article, SUMMARY_FIELDS
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+
+@contextmanager
+def statements():
+    executed = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        executed.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield executed
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def articles(client, user):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    Article.bulk_insert([
+        Article(source.id, f'Article {n}', f'https://example.com/{n}', guid=str(n),
+                summary='Summary', content=f'<p>Body {n}</p>')
+        for n in range(3)
+    ])
+    db.session.commit()
+    # Load the user into the user cache
+    client.get('/api/auth/verify')
+
+def test_fields_limit_the_keys(client, articles):
+    response = client.get('/api/articles?status=all&fields=title,is_read')
+    
+    assert response.status_code == 200
+    assert [sorted(article) for article in response.get_json()['articles']] == [['id', 'is_read', 'title']] * 3
+
+def test_summary_view_leaves_the_content_out_of_sql(client, articles):
+    with statements() as executed:
+        response = client.get('/api/articles?status=all&view=summary')
+    
+    listed = response.get_json()['articles']
+    assert set(listed[0]) == SUMMARY_FIELDS
+    assert listed[0]['summary'] == 'Summary'
+    # The page and the COUNT for the pagination, without a body lookup
+    assert len(executed) == 2
+    page_query = next(statement for statement in executed if 'LIMIT' in statement)
+    assert 'articles.content AS' not in page_query
+    assert not any('article_bodies' in statement for statement in executed)
+
+def test_full_view_includes_the_content(client, articles):
+    listed = client.get('/api/articles?status=all').get_json()['articles']
+    assert sorted(article['content'] for article in listed) == ['<p>Body 0</p>', '<p>Body 1</p>', '<p>Body 2</p>']
+
+def test_unknown_fields_are_rejected(client, articles):
+    response = client.get('/api/articles?fields=title,password')
+    
+    assert response.status_code == 400
+    assert 'password' in response.get_json()['error']
\ No newline at end of file
@@ -0,0 +1,52 @@
+import json
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.highlight import Highlight
+from app.models.user_article import UserArticle
+
+@pytest.fixture
+def article_id(user):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    article = Article(source.id, 'Article', 'https://example.com/1', guid='1')
+    db.session.add(article)
+    db.session.commit()
+    return article.id
+
+def test_add_list_and_delete_highlights(client, article_id):
+    url = f'/api/articles/{article_id}/highlights'
+    first = client.post(url, json={'text': ' First ', 'start_pos': 0, 'end_pos': 5}).get_json()['highlight']
+    second = client.post(url, json={'text': 'Second', 'color': 'green'}).get_json()['highlight']
+    
+    highlights = client.get(url).get_json()['highlights']
+    assert [(h['text'], h['color']) for h in highlights] == [('First', 'yellow'), ('Second', 'green')]
+    
+    assert client.delete(f'{url}/{first["id"]}').status_code == 200
+    assert client.delete(f'{url}/{first["id"]}').status_code == 404
+    assert [h['id'] for h in client.get(url).get_json()['highlights']] == [second['id']]
+    # Highlighting does not create or rewrite the user's article state
+    assert UserArticle.query.count() == 0
+
+def test_highlights_require_access_and_text(client, article_id):
+    assert client.post(f'/api/articles/{article_id}/highlights', json={'text': '  '}).status_code == 400
+    assert client.post(f'/api/articles/{article_id + 1}/highlights', json={'text': 'Hi'}).status_code == 404
+
+def test_migrate_json_highlights(user, article_id):
+    db.session.add(UserArticle(user.id, article_id, highlights=json.dumps([
+        {'text': 'Kept', 'start_pos': 1, 'end_pos': 4, 'color': 'blue', 'created_at': '2024-01-01T00:00:00'},
+        {'text': ''},
+        'not a highlight'
+    ])))
+    db.session.commit()
+    
+    assert Highlight.migrate_json(batch_size=1) == (1, 1)
+    assert Highlight.migrate_json() == (0, 0)
+    
+    highlight = Highlight.query.one()
+    assert (highlight.text, highlight.color, highlight.created_at.year) == ('Kept', 'blue', 2024)
+    assert UserArticle.query.one().highlights is None
\ No newline at end of file
@@ -0,0 +1,48 @@
+from datetime import datetime
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.utils.json_provider import PROVIDERS, orjson, json_list, clear_malformed_json
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, app):
+    if request.param == 'orjson' and orjson is None:
+        pytest.skip('orjson is not installed')
+    app.json = PROVIDERS[request.param](app)
+    return request.param
+
+def test_article_json_columns_and_datetimes(client, user, provider):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    good = Article(source_id=source.id, title='Good', url='https://example.com/1', guid='1',
+                   published_at=datetime(2024, 1, 2, 3, 4, 5, 6))
+    good.set_tags(['python', '中文'])
+    good.set_media_urls(['https://example.com/1.mp3'])
+    # Written before set_tags validated its input, or missing
+    bad = Article(source_id=source.id, title='Bad', url='https://example.com/2', guid='2',
+                  published_at=datetime(2024, 1, 1))
+    bad.tags = '["unterminated'
+    bad.media_urls = None
+    db.session.add_all([good, bad])
+    db.session.commit()
+    assert clear_malformed_json() == {'articles.tags': 1, 'articles.media_urls': 0, 'feeds.tags': 0}
+    
+    response = client.get('/api/articles?status=all')
+    
+    assert response.status_code == 200
+    articles = {article['title']: article for article in response.get_json()['articles']}
+    assert articles['Good']['tags'] == ['python', '中文']
+    assert articles['Good']['media_urls'] == ['https://example.com/1.mp3']
+    assert articles['Good']['published_at'] == '2024-01-02T03:04:05.000006'
+    assert articles['Bad']['tags'] == []
+    assert articles['Bad']['media_urls'] == []
+
+def test_json_list_only_stores_strict_json():
+    assert json_list(['a', 1]) == '["a", 1]'
+    assert json_list([float('nan')]) is None
+    assert json_list([object()]) is None
+    assert json_list('a') is None
\ No newline at end of file
@@ -0,0 +1,67 @@
+import pytest
+from flask_jwt_extended import create_access_token
+from app import create_app, db
+from app.models.user import User, _user_cache
+from app.utils.metrics import request_metrics
+
+@pytest.fixture
+def metrics_app():
+    request_metrics.clear()
+    app = create_app('testing', {'METRICS_ENABLED': True, 'METRICS_TOKEN': 'scrape-secret'})
+    with app.app_context():
+        db.create_all()
+        user = User(username='reader', email='reader@example.com', password='password123')
+        db.session.add(user)
+        db.session.commit()
+        yield app, create_access_token(identity=user.id)
+        db.session.remove()
+        db.drop_all()
+        _user_cache.clear()
+    request_metrics.clear()
+
+def scrape(client, token='scrape-secret'):
+    return client.get('/api/metrics', headers={'Authorization': f'Bearer {token}'})
+
+def test_metrics_disabled_by_default(app):
+    assert app.config['METRICS_ENABLED'] is False
+    assert app.test_client().get('/api/metrics').status_code == 404
+
+def test_metrics_require_token(metrics_app):
+    app, _ = metrics_app
+    client = app.test_client()
+    
+    response = client.get('/api/metrics')
+    assert response.status_code == 401
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+    assert scrape(client, 'wrong').status_code == 401
+    assert scrape(client).status_code == 200
+
+def test_metrics_open_without_token():
+    app = create_app('testing', {'METRICS_ENABLED': True, 'METRICS_TOKEN': None})
+    assert app.test_client().get('/api/metrics').status_code == 200
+
+def test_metrics_count_queries_per_route(metrics_app):
+    app, token = metrics_app
+    client = app.test_client()
+    for _ in range(3):
+        assert client.get('/api/feeds', headers={'Authorization': f'Bearer {token}'}).status_code == 200
+    
+    response = scrape(client)
+    assert response.headers['Content-Type'].startswith('text/plain')
+    body = response.get_data(as_text=True)
+    labels = 'method="GET",route="/api/feeds",status="200"'
+    assert f'wiserss_http_request_duration_seconds_count{{{labels}}} 3' in body
+    assert f'wiserss_http_request_queries_count{{{labels}}} 3' in body
+    # Every request runs at least the user lookup
+    assert f'wiserss_http_request_queries_bucket{{{labels},le="0"}} 0' in body
+    assert f'wiserss_http_response_size_bytes_count{{{labels}}} 3' in body
+
+def test_metrics_debug_headers(metrics_app):
+    app, token = metrics_app
+    request_metrics.debug_headers = True
+    try:
+        response = app.test_client().get('/api/feeds', headers={'Authorization': f'Bearer {token}'})
+    finally:
+        request_metrics.debug_headers = False
+    assert int(response.headers['X-Query-Count']) >= 1
+    assert response.headers['Server-Timing'].startswith('db;desc=')
\ No newline at end of file
@@ -0,0 +1,66 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.utils.pagination import encode_cursor, decode_cursor
+
+@pytest.fixture
+def articles(user):
+    """Pairs of articles sharing a published_at, then a few undated ones"""
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    start = datetime(2024, 1, 1)
+    Article.bulk_insert([
+        Article(source.id, f'Article {n}', f'https://example.com/{n}', guid=str(n),
+                published_at=start + timedelta(days=n // 2) if n < 11 else None)
+        for n in range(14)
+    ])
+    db.session.commit()
+
+def walk(client, url, per_page):
+    """Follow next_cursor to the end; returns the article ids in order and the number of pages"""
+    ids, pages, cursor = [], 0, None
+    while True:
+        page_url = f'{url}&per_page={per_page}&pagination=cursor' + (f'&cursor={cursor}' if cursor else '')
+        data = client.get(page_url).get_json()
+        ids += [article['id'] for article in data['articles']]
+        pages += 1
+        cursor = data['pagination']['next_cursor']
+        if not data['pagination']['has_next']:
+            assert cursor is None
+            return ids, pages
+
+def test_cursor_round_trip():
+    published_at = datetime(2024, 1, 2, 3, 4, 5, 6)
+    assert decode_cursor(encode_cursor(published_at, 7)) == (published_at, 7)
+    assert decode_cursor(encode_cursor(None, 7)) == (None, 7)
+    with pytest.raises(ValueError):
+        decode_cursor('not a cursor')
+
+@pytest.mark.parametrize('per_page', [1, 3, 5, 14, 20])
+def test_cursor_pages_match_the_page_order(client, articles, per_page):
+    expected = [article['id'] for article in client.get('/api/articles?status=all&per_page=100').get_json()['articles']]
+    
+    ids, pages = walk(client, '/api/articles?status=all', per_page)
+    
+    # Ties on published_at and undated articles are neither skipped nor repeated
+    assert ids == expected
+    assert len(expected) == 14
+    assert pages == max(1, -(-14 // per_page))
+
+def test_invalid_cursor_is_rejected(client, articles):
+    response = client.get('/api/articles?cursor=not-a-cursor')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Invalid cursor'
+
+def test_search_cursor_pages_are_ordered_by_date(client, articles):
+    response = client.get('/api/articles/search?q=Article&pagination=cursor')
+    assert response.status_code == 400
+    
+    ids, pages = walk(client, '/api/articles/search?q=Article&sort=date', 5)
+    expected = [article['id'] for article in client.get('/api/articles?status=all&per_page=100').get_json()['articles']]
+    assert ids == expected
\ No newline at end of file
@@ -0,0 +1,74 @@
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.user_article import UserArticle
+from app.services.progress import ProgressBuffer, progress_buffer
+
+@pytest.fixture
+def article_id(user):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    article = Article(source.id, 'Article', 'https://example.com/1', guid='1')
+    db.session.add(article)
+    db.session.commit()
+    return article.id
+
+@pytest.fixture
+def buffer(monkeypatch):
+    """The app's buffer, without the background flush thread and emptied afterwards"""
+    monkeypatch.setattr(progress_buffer, '_ensure_started', lambda: None)
+    yield progress_buffer
+    progress_buffer._pending.clear()
+
+def progress(user_id, article_id):
+    db.session.expire_all()
+    state = UserArticle.query.filter_by(user_id=user_id, article_id=article_id).one_or_none()
+    return state and (state.reading_position, state.reading_time)
+
+def test_heartbeats_are_coalesced_into_one_write(app, user, article_id):
+    buffer = ProgressBuffer()
+    buffer.record(user.id, article_id, 0.2, 5)
+    buffer.record(user.id, article_id, 0.4, 5)
+    
+    assert buffer.flush() == 1
+    assert progress(user.id, article_id) == (0.4, 10)
+    
+    buffer.record(user.id, article_id, 0.3, 7)
+    assert buffer.flush() == 1
+    assert buffer.flush() == 0
+    # The latest position wins and the time adds up to the stored total
+    assert progress(user.id, article_id) == (0.3, 17)
+
+def test_failed_flush_is_requeued_under_newer_heartbeats(app, user, article_id, monkeypatch):
+    buffer = ProgressBuffer()
+    buffer.record(user.id, article_id, 0.2, 5)
+    
+    def fail(entries):
+        raise RuntimeError('database is down')
+    monkeypatch.setattr(UserArticle, 'add_progress', fail)
+    assert buffer.flush() == 0
+    monkeypatch.undo()
+    
+    buffer.record(user.id, article_id, 0.6, 3)
+    assert buffer.flush() == 1
+    assert progress(user.id, article_id) == (0.6, 8)
+
+def test_progress_endpoint_buffers_until_the_article_is_finished(client, user, article_id, buffer):
+    response = client.put(f'/api/articles/{article_id}/progress', json={'position': 0.5, 'time_spent': 30})
+    assert response.get_json()['is_read'] is False
+    assert progress(user.id, article_id) is None
+    
+    # Finishing the article writes the buffered time right away and marks it read
+    response = client.put(f'/api/articles/{article_id}/progress', json={'position': 1.2, 'time_spent': 10})
+    assert response.get_json()['is_read'] is True
+    assert progress(user.id, article_id) == (1.0, 40)
+    assert UserArticle.query.one().is_read is True
+    assert buffer.flush() == 0
+
+@pytest.mark.parametrize('body', [{}, {'position': 'half'}, {'position': 0.5, 'time_spent': -1}])
+def test_invalid_progress_is_rejected(client, article_id, buffer, body):
+    assert client.put(f'/api/articles/{article_id}/progress', json=body).status_code == 400
\ No newline at end of file
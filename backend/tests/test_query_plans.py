@@ -0,0 +1,11 @@
+from app.utils.query_plans import check_query_plans, create_missing_indexes
+
+def test_hot_queries_do_not_scan_whole_tables(app):
+    results = check_query_plans()
+    
+    assert results
+    scans = {name: tables for name, _, tables in results if tables}
+    assert not scans, f'Full table scans: {scans}'
+
+def test_model_indexes_exist_after_create_all(app):
+    assert create_missing_indexes() == []
\ No newline at end of file
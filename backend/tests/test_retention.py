@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+import pytest
+from app import db
+from app.models.article import Article
+from app.models.archived_article import ArchivedArticle
+from app.models.article_tombstone import ArticleTombstone
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.services.fetcher import store_entries
+from app.services.retention import apply_source_retention
+
+def entry(n, published_at=None):
+    return {
+        'title': f'Entry {n}',
+        'url': f'https://example.com/posts/{n}',
+        'guid': f'entry-{n}',
+        'summary': 'Summary',
+        'content': None,
+        'author': None,
+        'published_at': published_at,
+        'image_url': None,
+        'media_urls': [],
+        'tags': []
+    }
+
+def expired_source(user):
+    """A subscribed source with three undated entries, ingested long enough ago to expire"""
+    source = FeedSource('https://example.com/rss', retention_days=30)
+    db.session.add(source)
+    db.session.flush()
+    feed = Feed(user.id, 'Example', source.url, source_id=source.id)
+    db.session.add(feed)
+    db.session.commit()
+    
+    entries = [entry(n) for n in range(3)]
+    assert store_entries(source, entries) == 3
+    Article.query.update({'created_at': datetime.utcnow() - timedelta(days=60)})
+    db.session.commit()
+    return source, feed, entries
+
+@pytest.mark.parametrize('archive', [True, False])
+def test_removed_entries_are_not_fetched_again(user, archive):
+    source, feed, entries = expired_source(user)
+    
+    assert apply_source_retention(source, archive=archive).removed == 3
+    assert ArchivedArticle.query.count() == (3 if archive else 0)
+    assert ArticleTombstone.query.count() == (0 if archive else 3)
+    
+    # The next fetch still lists them; only the new entry is stored
+    assert store_entries(source, entries + [entry(3)]) == 1
+    db.session.commit()
+    assert [article.guid for article in Article.query.all()] == ['entry-3']
+
+@pytest.mark.parametrize('archive', [True, False])
+def test_removing_the_last_subscription_clears_the_archive(user, archive):
+    source, feed, entries = expired_source(user)
+    apply_source_retention(source, archive=archive)
+    
+    source.remove_subscription(feed)
+    db.session.commit()
+    
+    assert FeedSource.query.count() == 0
+    assert ArchivedArticle.query.count() == 0
+    assert ArticleTombstone.query.count() == 0
\ No newline at end of file
@@ -0,0 +1,99 @@
+from sqlalchemy import inspect
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.user import User
+from app.models.user_article import UserArticle
+from app.services.schema_upgrade import upgrade_schema
+from app.utils.query_plans import create_missing_indexes
+
+# The feeds and articles tables as they were before shared feed sources
+LEGACY_SCHEMA = [
+    'DROP TABLE IF EXISTS archived_articles',
+    'DROP TABLE IF EXISTS highlights',
+    'DROP TABLE IF EXISTS user_articles',
+    'DROP TABLE IF EXISTS articles',
+    'DROP TABLE IF EXISTS feeds',
+    'DROP TABLE IF EXISTS feed_sources',
+    '''CREATE TABLE feeds (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users (id),
+        title VARCHAR(200) NOT NULL, url VARCHAR(500) NOT NULL, category VARCHAR(100),
+        is_active BOOLEAN NOT NULL DEFAULT 1, created_at DATETIME, updated_at DATETIME,
+        last_fetched DATETIME, etag VARCHAR(100), last_modified VARCHAR(100),
+        CONSTRAINT feed_user_url_unique UNIQUE (user_id, url)
+    )''',
+    '''CREATE TABLE articles (
+        id INTEGER PRIMARY KEY, feed_id INTEGER NOT NULL REFERENCES feeds (id),
+        title VARCHAR(500) NOT NULL, url VARCHAR(1000) NOT NULL, guid VARCHAR(500),
+        summary TEXT, published_at DATETIME, created_at DATETIME,
+        CONSTRAINT article_feed_guid_unique UNIQUE (feed_id, guid)
+    )''',
+    '''CREATE TABLE user_articles (
+        id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL REFERENCES users (id),
+        article_id INTEGER NOT NULL REFERENCES articles (id),
+        is_read BOOLEAN NOT NULL DEFAULT 0, is_bookmarked BOOLEAN NOT NULL DEFAULT 0,
+        rating INTEGER, notes TEXT, highlights TEXT, reading_status VARCHAR(20) DEFAULT 'unread',
+        reading_position FLOAT, reading_time INTEGER, read_at DATETIME, bookmarked_at DATETIME,
+        created_at DATETIME, updated_at DATETIME,
+        CONSTRAINT user_article_unique UNIQUE (user_id, article_id)
+    )''',
+]
+
+def run(sql, **params):
+    db.session.execute(db.text(sql), params)
+
+def test_upgrade_moves_feeds_to_shared_sources(user):
+    for statement in LEGACY_SCHEMA:
+        run(statement)
+    other = User(username='other', email='other@example.com', password='password123')
+    db.session.add(other)
+    db.session.flush()
+    feeds = [
+        (1, user.id, 'https://Example.com/rss', '"old"', '2024-01-01'),
+        (2, other.id, 'https://example.com:443/rss', '"new"', '2024-02-01'),
+        (3, user.id, 'https://example.com/rss#latest', None, None),
+    ]
+    for feed_id, user_id, url, etag, fetched in feeds:
+        run('INSERT INTO feeds (id, user_id, title, url, etag, last_fetched, is_active) '
+            'VALUES (:id, :user_id, :title, :url, :etag, :fetched, 1)',
+            id=feed_id, user_id=user_id, title=f'Feed {feed_id}', url=url, etag=etag, fetched=fetched)
+    for article_id, feed_id, guid in [(1, 1, 'a'), (2, 1, 'b'), (3, 2, 'a'), (4, 3, 'a')]:
+        run("INSERT INTO articles (id, feed_id, title, url, guid) VALUES (:id, :feed_id, 'Post', 'https://example.com/p', :guid)",
+            id=article_id, feed_id=feed_id, guid=guid)
+    run("INSERT INTO user_articles (user_id, article_id, is_read, rating) VALUES (:user_id, 1, 1, 4)", user_id=user.id)
+    run("INSERT INTO user_articles (user_id, article_id, is_bookmarked, notes) VALUES (:user_id, 4, 1, 'note')", user_id=user.id)
+    run('INSERT INTO user_articles (user_id, article_id, is_read) VALUES (:user_id, 3, 1)', user_id=other.id)
+    db.session.commit()
+    
+    result = upgrade_schema()
+    assert (result.sources, result.merged_articles, result.merged_feeds) == (1, 2, 1)
+    assert 'feed_id' not in {column['name'] for column in inspect(db.engine).get_columns('articles')}
+    assert 'ix_user_articles_user_status' in result.indexes
+    assert create_missing_indexes() == []
+    
+    source = FeedSource.query.one()
+    assert source.url == 'https://example.com/rss'
+    assert source.etag == '"new"'
+    assert source.total_articles == 2
+    assert sorted(article.id for article in Article.query) == [1, 2]
+    assert sorted(feed.id for feed in Feed.query) == [1, 2]
+    
+    # Both copies of article "a" were folded into one row per user
+    state = UserArticle.query.filter_by(user_id=user.id).one()
+    assert (state.article_id, state.is_read, state.is_bookmarked, state.rating, state.notes) == (1, True, True, 4, 'note')
+    assert UserArticle.query.filter_by(user_id=other.id).one().article_id == 1
+    assert db.session.get(Feed, 1).unread_count == 1
+    assert db.session.get(Feed, 1).bookmarked_count == 1
+    
+    assert vars(upgrade_schema()) == {
+        'tables': [], 'columns': [], 'sources': 0, 'merged_feeds': 0, 'merged_articles': 0, 'indexes': []
+    }
+
+def test_upgrade_creates_missing_indexes(app):
+    run('DROP INDEX ix_user_articles_user_status')
+    run('DROP INDEX ix_feeds_source_id')
+    db.session.commit()
+    
+    assert upgrade_schema().indexes == ['ix_feeds_source_id', 'ix_user_articles_user_status']
+    assert create_missing_indexes() == []
\ No newline at end of file
@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.services.retention import apply_source_retention
+from app.utils import search
+
+def add_articles(*summaries):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    for n, summary in enumerate(summaries):
+        db.session.add(Article(source_id=source.id, title=f'Article {n}', url=f'https://example.com/{n}',
+                               guid=str(n), summary=summary))
+    db.session.commit()
+
+def titles(query):
+    return sorted(article.title for article in query)
+
+def test_like_search_matches_summaries(app):
+    add_articles('Build times down 50% with caching', 'Up 5 percent', 'snake_case names')
+    
+    assert titles(search.like_search(Article.query, 'caching')) == ['Article 0']
+    # LIKE wildcards in the query are matched literally
+    assert titles(search.like_search(Article.query, '50%')) == ['Article 0']
+    assert titles(search.like_search(Article.query, 'e_c')) == ['Article 2']
+    assert len(titles(search.like_search(Article.query, 'Article'))) == 3
+
+def test_rebuild_index_is_a_no_op_without_full_text_support(app, monkeypatch):
+    monkeypatch.setattr(search, 'get_dialect_name', lambda: 'postgresql')
+    
+    assert search.rebuild_index() is False
+    query, order_by = search.search(Article.query, 'caching')
+    assert order_by is None
+
+def subscribed_source(user, **kwargs):
+    source = FeedSource('https://example.com/rss', **kwargs)
+    db.session.add(source)
+    db.session.flush()
+    db.session.add(Feed(user.id, 'Example', source.url, source_id=source.id))
+    return source
+
+def search_titles(client, q):
+    response = client.get(f'/api/articles/search?q={q}')
+    assert response.status_code == 200
+    return [article['title'] for article in response.get_json()['articles']]
+
+def test_full_text_search_ranks_chinese_and_english_matches(client, user):
+    source = subscribed_source(user)
+    Article.bulk_insert([
+        Article(source.id, '今日新聞', 'https://example.com/1', guid='1', summary='<p>關於機器學習的一些消息</p>'),
+        Article(source.id, '機器學習入門', 'https://example.com/2', guid='2', summary='從零開始'),
+        Article(source.id, 'Weekly roundup', 'https://example.com/3', guid='3', summary='Notes on Python packaging'),
+        Article(source.id, 'Python packaging guide', 'https://example.com/4', guid='4', summary='Wheels and sdists'),
+        Article(source.id, '機器人', 'https://example.com/5', guid='5', summary='Robots, not learning'),
+    ])
+    db.session.commit()
+    
+    # Title matches outrank body matches, whatever the insertion order
+    assert search_titles(client, '機器學習') == ['機器學習入門', '今日新聞']
+    assert search_titles(client, 'python packaging') == ['Python packaging guide', 'Weekly roundup']
+    # Every term has to match, and markup is not indexed
+    assert search_titles(client, 'python wheels') == ['Python packaging guide']
+    assert search_titles(client, 'p') == []
+
+def test_retention_removes_articles_from_the_index(client, user):
+    source = subscribed_source(user, retention_days=30)
+    Article.bulk_insert([
+        Article(source.id, f'Caching notes {n}', f'https://example.com/{n}', guid=str(n))
+        for n in range(3)
+    ])
+    Article.query.filter(Article.guid != '0').update({'created_at': datetime.utcnow() - timedelta(days=60)})
+    db.session.commit()
+    assert len(search_titles(client, 'caching')) == 3
+    
+    assert apply_source_retention(source, archive=False).removed == 2
+    
+    assert search_titles(client, 'caching') == ['Caching notes 0']
+    indexed = db.session.execute(db.select(search.fts_table.c.rowid)).scalars().all()
+    assert indexed == [Article.query.one().id]
\ No newline at end of file
@@ -0,0 +1,89 @@
+import json
+import pytest
+from app import create_app, db
+from app.models.user import User, _user_cache
+from app.utils.slow_queries import slow_query_log, fingerprint, fingerprint_id, summarize
+
+@pytest.fixture
+def slow_log(tmp_path):
+    """An app logging every statement as slow to a temporary file"""
+    path = tmp_path / 'slow.jsonl'
+    app = create_app('testing', {'SLOW_QUERY_THRESHOLD_MS': 1, 'SLOW_QUERY_LOG': str(path)})
+    slow_query_log.threshold = 1e-9
+    slow_query_log._stats.clear()
+    with app.app_context():
+        db.create_all()
+        yield app, path
+        db.session.remove()
+        db.drop_all()
+        _user_cache.clear()
+    slow_query_log.threshold = 0
+    slow_query_log._stats.clear()
+
+def read_entries(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f]
+
+def test_fingerprint_normalizes_values():
+    assert fingerprint("SELECT * FROM articles WHERE id = 42 AND title = 'it''s'") == \
+        'SELECT * FROM articles WHERE id = ? AND title = ?'
+    assert fingerprint('SELECT id FROM feeds WHERE id IN (?, ?, ?) -- comment') == \
+        fingerprint('SELECT  id\nFROM feeds WHERE id IN (%s)')
+    assert fingerprint('INSERT INTO t (a) VALUES (1), (2), (3)') == 'INSERT INTO t (a) VALUES (?)'
+    assert fingerprint('SELECT :user_id /* hint */') == 'SELECT ?'
+
+def test_fingerprint_id_is_stable():
+    normalized = fingerprint('SELECT * FROM users WHERE id = 1')
+    assert fingerprint_id(normalized) == fingerprint_id(fingerprint('SELECT * FROM users WHERE id = 2'))
+    assert len(fingerprint_id(normalized)) == 12
+
+def test_slow_statements_logged_with_plan(slow_log):
+    app, path = slow_log
+    for user_id in (1, 2):
+        db.session.get(User, user_id)
+    
+    entries = [entry for entry in read_entries(path) if 'FROM users' in entry['fingerprint']]
+    assert len(entries) == 2
+    assert entries[0]['fingerprint_id'] == entries[1]['fingerprint_id']
+    assert '?' in entries[0]['fingerprint']
+    assert entries[1]['stats']['count'] == 2
+    # The plan is captured once per fingerprint and interval
+    assert entries[0]['plan'] and 'detail' in entries[0]['plan'][0]
+    assert entries[1]['plan'] is None
+    assert slow_query_log.stats()[entries[0]['fingerprint']]['count'] == 2
+
+def test_writes_are_not_explained(slow_log):
+    app, path = slow_log
+    db.session.add(User(username='writer', email='writer@example.com', password='password123'))
+    db.session.commit()
+    
+    inserts = [entry for entry in read_entries(path) if entry['fingerprint'].startswith('INSERT INTO users')]
+    assert len(inserts) == 1
+    assert inserts[0]['plan'] is None
+
+def test_route_recorded(slow_log):
+    app, path = slow_log
+    app.test_client().get('/api/feeds')
+    app.test_client().post('/api/auth/login', json={'username': 'nobody', 'password': 'x'})
+    
+    routes = {entry['route'] for entry in read_entries(path)}
+    assert 'POST /api/auth/login' in routes
+
+def test_disabled_in_testing_config(app):
+    assert slow_query_log.threshold == 0
+    db.session.get(User, 1)
+    assert not slow_query_log.stats()
+
+def test_summarize_aggregates_by_fingerprint(slow_log):
+    app, path = slow_log
+    for user_id in (1, 2, 3):
+        db.session.get(User, user_id)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('not json\n')
+    
+    summary = {item['fingerprint']: item for item in summarize(str(path))}
+    item = next(item for fingerprint, item in summary.items() if 'FROM users' in fingerprint)
+    assert item['slow_count'] == 3
+    assert item['plan']
+    assert item['slow_max_ms'] <= item['slow_total_ms']
+    assert summarize(str(path), since='9999') == []
\ No newline at end of file
@@ -0,0 +1,55 @@
+import time
+import pytest
+from flask_jwt_extended import create_refresh_token, decode_token
+from app.utils.revocation import RevocationStore, revocation_store
+
+@pytest.fixture
+def tokens(app, user):
+    response = app.test_client().post('/api/auth/login', json={'username': 'reader', 'password': 'password123'})
+    assert response.status_code == 200
+    data = response.get_json()
+    return data['token'], data['refresh_token']
+
+def bearer(token):
+    return {'Authorization': f'Bearer {token}'}
+
+def test_logout_revokes_the_access_and_refresh_tokens(app, tokens):
+    client = app.test_client()
+    access_token, refresh_token = tokens
+    assert client.get('/api/auth/verify', headers=bearer(access_token)).status_code == 200
+    
+    response = client.post('/api/auth/logout', json={'refresh_token': refresh_token}, headers=bearer(access_token))
+    
+    assert response.status_code == 200
+    assert client.get('/api/auth/verify', headers=bearer(access_token)).status_code == 401
+    assert client.post('/api/auth/refresh', headers=bearer(refresh_token)).status_code == 401
+
+def test_refresh_token_of_another_user_is_not_revoked(client):
+    other_refresh_token = create_refresh_token(identity=999)
+    
+    assert client.post('/api/auth/logout', json={'refresh_token': other_refresh_token}).status_code == 200
+    
+    assert not revocation_store.is_revoked(decode_token(other_refresh_token)['jti'])
+
+def test_refreshed_token_is_accepted_until_logout(app, tokens):
+    client = app.test_client()
+    access_token, refresh_token = tokens
+    
+    new_token = client.post('/api/auth/refresh', headers=bearer(refresh_token)).get_json()['token']
+    assert client.get('/api/auth/verify', headers=bearer(new_token)).status_code == 200
+    
+    client.post('/api/auth/logout', headers=bearer(new_token))
+    assert client.get('/api/auth/verify', headers=bearer(new_token)).status_code == 401
+    # Logging out one access token leaves the others and the refresh token valid
+    assert client.get('/api/auth/verify', headers=bearer(access_token)).status_code == 200
+    assert client.post('/api/auth/refresh', headers=bearer(refresh_token)).status_code == 200
+
+def test_revocations_expire_with_the_token():
+    store = RevocationStore()
+    store.revoke('expired', time.time() - 10)
+    store.revoke('valid', time.time() + 3600)
+    
+    assert store.is_revoked('valid')
+    time.sleep(1.1)
+    assert not store.is_revoked('expired')
+    assert store.is_revoked('valid')
\ No newline at end of file
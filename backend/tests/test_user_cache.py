@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from app import db
+from app.models.user import User
+
+@contextmanager
+def user_queries():
+    """Collect the statements that read the users table"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.startswith('SELECT') and 'FROM users' in statement:
+            statements.append(statement)
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+def test_user_is_loaded_once_per_ttl(client):
+    with user_queries() as statements:
+        for _ in range(3):
+            assert client.get('/api/auth/verify').status_code == 200
+    assert len(statements) == 1
+
+def test_cached_user_can_be_updated(client):
+    client.get('/api/auth/verify')
+    
+    response = client.put('/api/auth/profile', json={'theme': 'light'})
+    
+    assert response.status_code == 200
+    assert db.session.get(User, response.get_json()['user']['id']).theme == 'light'
+    assert client.get('/api/auth/verify').get_json()['user']['preferences']['theme'] == 'light'
+
+def test_deactivating_a_user_invalidates_the_cache(client, user):
+    client.get('/api/auth/verify')
+    
+    user.is_active = False
+    db.session.commit()
+    
+    assert client.get('/api/auth/verify').status_code == 401
+
+def test_zero_ttl_disables_the_cache(app, client):
+    app.config['USER_CACHE_TTL'] = 0
+    with user_queries() as statements:
+        client.get('/api/auth/verify')
+        client.get('/api/auth/verify')
+    assert len(statements) == 2
\ No newline at end of file
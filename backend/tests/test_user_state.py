@@ -0,0 +1,82 @@
+from contextlib import contextmanager
+import pytest
+from sqlalchemy import event
+from app import db
+from app.models.article import Article
+from app.models.feed import Feed
+from app.models.feed_source import FeedSource
+from app.models.user_article import UserArticle
+
+@contextmanager
+def writes():
+    """Collect the INSERT/UPDATE/DELETE statements run inside the block"""
+    statements = []
+    
+    def before_cursor_execute(conn, cursor, statement, *args):
+        if statement.split(None, 1)[0] in ('INSERT', 'UPDATE', 'DELETE'):
+            statements.append(' '.join(statement.split()[:3]))
+    
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+@pytest.fixture
+def feed(user):
+    source = FeedSource('https://example.com/rss')
+    db.session.add(source)
+    db.session.flush()
+    feed = Feed(user.id, 'Example', source.url, source_id=source.id)
+    db.session.add(feed)
+    Article.bulk_insert([Article(source.id, f'Article {n}', f'https://example.com/{n}', guid=str(n)) for n in range(3)])
+    db.session.commit()
+    feed.recount_stats()
+    db.session.commit()
+    return feed
+
+def unread(feed):
+    db.session.refresh(feed)
+    return feed.unread_count
+
+@pytest.mark.parametrize('change, undo', [
+    (('read', None), ('unread', None)),
+    (('bookmark', None), ('bookmark', None)),
+    (('status', {'status': 'archive'}), ('status', {'status': 'later'})),
+])
+def test_state_change_is_one_upsert_and_one_counter_update(client, feed, change, undo):
+    article = feed.source.articles.first()
+    
+    with writes() as statements:
+        # Creates the row, then updates it
+        for url, body in (change, undo):
+            assert client.put(f'/api/articles/{article.id}/{url}', json=body).status_code == 200
+    
+    assert statements == ['INSERT INTO user_articles', 'UPDATE feeds SET'] * 2
+
+def test_repeated_change_leaves_the_counters_alone(client, feed):
+    article = feed.source.articles.first()
+    client.put(f'/api/articles/{article.id}/read')
+    
+    with writes() as statements:
+        client.put(f'/api/articles/{article.id}/read')
+    
+    assert statements == ['INSERT INTO user_articles']
+    assert unread(feed) == 2
+
+def test_stale_state_falls_back_to_the_locked_write(user, feed):
+    article = feed.source.articles.first()
+    state = UserArticle(user.id, article.id)
+    db.session.add(state)
+    db.session.commit()
+    
+    # Another request marks the article read after this one loaded the state
+    UserArticle.query.update({'is_read': True, 'reading_status': 'read'})
+    Feed.query.update({'unread_count': Feed.unread_count - 1})
+    db.session.commit()
+    state = UserArticle.apply_state(user.id, article, {'is_read': True, 'reading_status': 'read'},
+                                    current=UserArticle(user.id, article.id, is_read=False, reading_status='unread'))
+    db.session.commit()
+    
+    assert state.is_read is True
+    assert unread(feed) == 2
\ No newline at end of file